@@ -0,0 +1,165 @@
+"""
+Cache backend and helpers shared by all apps.
+
+`TieredCache` keeps a small in-process LRU (a `LocMemCache`) in front of a shared cache,
+which is configured as another alias in `CACHES` and given as `LOCATION`:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'Toiler.cache.TieredCache',
+            'LOCATION': 'redis',
+            'OPTIONS': {'LOCAL_TIMEOUT': 5, 'LOCAL_MAX_ENTRIES': 1000, 'SHARED_ONLY': ['visible_projects_']},
+        },
+        'redis': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://127.0.0.1:6379/1',
+        },
+    }
+
+Writes go to the shared cache, so other workers see them. A worker may read its local copy
+for at most `LOCAL_TIMEOUT` seconds after another worker changed the key. Keys that start with
+a prefix of `SHARED_ONLY` (e.g. permissions) are never kept locally, so their changes are seen at once.
+"""
+import time
+import uuid
+from logging import getLogger
+from typing import Any, Callable
+
+from django.core.cache import caches, cache as default_cache
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.functional import cached_property
+
+logger = getLogger(__name__)
+
+_MISSING = object()
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+
+        self._shared_alias = location
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.shared_only = tuple(options.get('SHARED_ONLY', ()))
+        # local tier is shared by all threads of the process
+        self._local = LocMemCache(options.get('LOCAL_LOCATION', f'tiered-{location}'), {
+            'TIMEOUT': self.local_timeout,
+            'OPTIONS': {'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000)},
+        })
+
+    @cached_property
+    def shared(self) -> BaseCache:
+        return caches[self._shared_alias]
+
+    def is_local(self, key) -> bool:
+        return not key.startswith(self.shared_only) if self.shared_only else True
+
+    def _local_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.local_timeout
+        return max(0, min(timeout - time.time(), self.local_timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, self._shared_timeout(timeout), version)
+        if added and self.is_local(key):
+            self._local.set(key, value, self._local_timeout(timeout), version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        if not self.is_local(key):
+            return self.shared.get(key, default, version)
+
+        value = self._local.get(key, _MISSING, version)
+        if value is not _MISSING:
+            return value
+
+        value = self.shared.get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+
+        self._local.set(key, value, self.local_timeout, version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, self._shared_timeout(timeout), version)
+        if self.is_local(key):
+            self._local.set(key, value, self._local_timeout(timeout), version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.is_local(key):
+            self._local.touch(key, self._local_timeout(timeout), version)
+        return self.shared.touch(key, self._shared_timeout(timeout), version)
+
+    def delete(self, key, version=None):
+        self._local.delete(key, version)
+        return self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        for key in keys:
+            self._local.delete(key, version)
+        self.shared.delete_many(keys, version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local.delete(key, version)
+        return self.shared.incr(key, delta, version)
+
+    def has_key(self, key, version=None):
+        return self._local.has_key(key, version) or self.shared.has_key(key, version)
+
+    def clear(self):
+        self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def _shared_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+
+def get_or_compute(key: str, compute: Callable[[], Any], timeout: int = 300, stale_timeout: int = 60,
+                   lock_timeout: int = 10, cache: BaseCache = default_cache):
+    """
+    Returns the cached value of key, computing it by only one caller at a time (cache stampede protection).
+
+    A value is fresh for `timeout` seconds and is kept `stale_timeout` seconds more. When it is stale,
+    the caller that takes the lock recomputes it and the others get the stale value.
+    When there is no value, the others wait up to `lock_timeout` seconds for the lock holder.
+
+    `None` results are not cached.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if fresh_until > time.time():
+            return value
+
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+
+    if cache.add(lock_key, token, lock_timeout):
+        try:
+            value = compute()
+            if value is not None:
+                cache.set(key, (value, time.time() + timeout), timeout + stale_timeout)
+            return value
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    if entry is not None:
+        return entry[0]  # someone else is refreshing it
+
+    deadline = time.time() + lock_timeout
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+
+    logger.warning(f'lock of "{key}" was not released in {lock_timeout} seconds.')
+    return compute()
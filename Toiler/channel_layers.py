@@ -0,0 +1,72 @@
+"""
+Channel layers with a capacity of groups, which `CHANNEL_LAYERS` uses.
+
+`RedisChannelLayer` is the layer of `channels_redis`, shared by all workers, channels and groups are
+sharded between its hosts (by consistent hashing). `InMemoryChannelLayer` is its local stand-in for tests.
+Both take the same limits:
+
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'Toiler.channel_layers.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': ['redis://10.0.0.1:6379/3', 'redis://10.0.0.2:6379/3'],
+                'expiry': 10,
+                'capacity': 100,
+                'group_capacity': {'activity_*': 1000},
+            },
+        },
+    }
+
+ - `capacity` (and `channel_capacity`) is the number of messages waiting in a channel (a websocket),
+   messages of a group to a full channel are dropped, so a slow client doesn't slow down others.
+ - `expiry` is seconds that a message waits to be received, then it's dropped.
+ - `group_capacity` is the number of channels of groups that match a pattern (the first one),
+   `group_add()` to a full group raises `ChannelFull`, so the work of sending to a group is bounded.
+"""
+import fnmatch
+import re
+import time
+from typing import Optional
+
+from channels.exceptions import ChannelFull
+from channels.layers import InMemoryChannelLayer as _InMemoryChannelLayer
+from channels_redis.core import RedisChannelLayer as _RedisChannelLayer
+
+
+class GroupCapacityMixin:
+    def __init__(self, *args, group_capacity: dict = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.group_capacity = [(re.compile(fnmatch.translate(pattern)), capacity)
+                               for pattern, capacity in (group_capacity or {}).items()]
+
+    def get_group_capacity(self, group: str) -> Optional[int]:
+        """Returns the capacity of the group, None if it's unlimited."""
+        for pattern, capacity in self.group_capacity:
+            if pattern.match(group):
+                return capacity
+        return None
+
+    async def group_size(self, group: str) -> int:
+        raise NotImplementedError
+
+    async def group_add(self, group, channel):
+        capacity = self.get_group_capacity(group)
+        if capacity is not None and await self.group_size(group) >= capacity:
+            raise ChannelFull(f'group "{group}" has {capacity} channels.')
+
+        await super().group_add(group, channel)
+
+
+class RedisChannelLayer(GroupCapacityMixin, _RedisChannelLayer):
+    async def group_size(self, group: str) -> int:
+        group_key = self._group_key(group)
+        connection = self.connection(self.consistent_hash(group))
+        # channels of the group are removed after `group_expiry`, like `group_send()` does
+        await connection.zremrangebyscore(group_key, min=0, max=int(time.time()) - self.group_expiry)
+        return await connection.zcard(group_key)
+
+
+class InMemoryChannelLayer(GroupCapacityMixin, _InMemoryChannelLayer):
+    async def group_size(self, group: str) -> int:
+        self._clean_expired()
+        return len(self.groups.get(group, {}))
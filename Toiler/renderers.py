@@ -0,0 +1,133 @@
+"""
+A faster drop-in for `djangorestframework_camel_case.render.CamelCaseJSONRenderer`.
+
+The original builds an `OrderedDict` for every dict in the response, converts each key with a regex
+and then encodes with the stdlib encoder. `CamelCaseJSONRenderer` here converts a key only once per process
+(keys are field names, so there are few of them), builds plain dicts, and encodes with `orjson` if it's installed.
+
+Its output is the same bytes as the original renderer. Values that `orjson` formats differently
+(exponent floats, `NaN`, non-string keys other than ints, ...) make it fall back to the stdlib encoder,
+and so does an `indent` or any non-default `UNICODE_JSON`, `COMPACT_JSON` setting.
+"""
+import math
+import re
+from typing import Dict, Tuple
+
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from djangorestframework_camel_case.settings import api_settings as camel_case_settings
+from djangorestframework_camel_case.util import camelize_re, underscore_to_camel
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MAX_CACHED_KEYS = 10000
+
+_camel_keys: Dict[str, str] = {}  # snake_case key -> camelCase key
+
+_SCALARS = frozenset((str, int, bool, type(None)))
+
+
+def camel_key(key: str) -> str:
+    """Same as the key conversion of `djangorestframework_camel_case.util.camelize()`, but cached."""
+    try:
+        return _camel_keys[key]
+    except KeyError:
+        new_key = re.sub(camelize_re, underscore_to_camel, key) if '_' in key else key
+        if len(_camel_keys) < MAX_CACHED_KEYS:
+            _camel_keys[key] = new_key
+        return new_key
+
+
+def is_exact_float(value: float) -> bool:
+    """Returns True if `orjson` formats the float the same as `json`, which uses exponents out of this range."""
+    return value == 0 or (math.isfinite(value) and 1e-4 <= abs(value) < 1e16)
+
+
+def camelize(data, ignore_fields=None, ignore_keys=None, **options) -> Tuple[object, bool]:
+    """
+    Same as `djangorestframework_camel_case.util.camelize()`, but returns plain dicts and lists.
+    The second item is False if the result has a value that `orjson` doesn't encode like `json`.
+    """
+    ignore_fields = ignore_fields or ()
+    ignore_keys = ignore_keys or ()
+    exact = True
+
+    def walk(value):
+        nonlocal exact
+        value_type = type(value)
+        if value_type in _SCALARS:
+            return value
+        if value_type is float:
+            exact = exact and is_exact_float(value)
+            return value
+        if isinstance(value, Promise):
+            return force_str(value)
+
+        if isinstance(value, dict):
+            new_dict = {}
+            for key, item in value.items():
+                if isinstance(key, Promise):
+                    key = force_str(key)
+                if isinstance(key, str):
+                    new_key = camel_key(key)
+                else:
+                    new_key = key
+                    exact = exact and type(key) is int
+
+                if key not in ignore_fields and new_key not in ignore_fields:
+                    item = walk(item)
+                else:
+                    exact = False  # it's not checked
+                new_dict[key if key in ignore_keys or new_key in ignore_keys else new_key] = item
+            return new_dict
+
+        if isinstance(value, (list, tuple)):
+            return [walk(item) for item in value]
+        if isinstance(value, str):
+            return value
+        try:
+            iterator = iter(value)
+        except TypeError:
+            return value  # dates, decimals, ... are encoded by `JSONEncoder`
+        return [walk(item) for item in iterator]
+
+    return walk(data), exact
+
+
+class CamelCaseJSONRenderer(renderers.JSONRenderer):
+    json_underscoreize = camel_case_settings.JSON_UNDERSCOREIZE
+    orjson_options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+                      if orjson else 0)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        data, exact = camelize(data, **self.json_underscoreize)
+        if not exact or not self.can_use_orjson(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encode_default, option=self.orjson_options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # the same escaping as `JSONRenderer`, see the comment there
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def can_use_orjson(self, accepted_media_type, renderer_context) -> bool:
+        """`orjson` only has the default format of `JSONRenderer`."""
+        return (orjson is not None and self.encoder_class is JSONEncoder and self.compact and not self.ensure_ascii
+                and not self.get_indent(accepted_media_type, renderer_context))
+
+    def encode_default(self, obj):
+        """Encodes dates, decimals, ... like `JSONEncoder`, other values are left to `json` by raising TypeError."""
+        ret = self.encoder_class().default(obj)
+        if type(ret) in _SCALARS or (type(ret) is float and is_exact_float(ret)):
+            return ret
+        raise TypeError(f'{type(ret).__name__} is encoded by json.')
@@ -57,6 +57,7 @@ INSTALLED_APPS = [
 
     'user',
     'gantt',
+    'chat',
     'rest_framework',
     'django_filters',
 
@@ -96,19 +97,52 @@ TEMPLATES = [
 WSGI_APPLICATION = 'Toiler.wsgi.application'
 ASGI_APPLICATION = 'Toiler.asgi.application'
 
+NOTIFIER = {
+    'HOST': os.environ['NOTIFIER_HOST'],
+    'PORT': 6379,
+    'TIMEOUT': 0.5,  # seconds, then events are buffered locally
+    'MAX_BUFFER': 10000,  # messages, an event in 'json', up to BATCH_SIZE events in 'compact'
+    'RETRY_AFTER': 5,  # seconds
+    'FORMAT': 'json',  # or 'compact' when consumers decode it, see `gantt.notifier`
+    'BATCH_SIZE': 100,  # events in a message of the compact format
+    'LOG_MAX_LENGTH': 1000,  # events in the change log of a project, see `gantt.changelog`
+    'LOG_TIMEOUT': 60 * 60 * 24 * 7,  # seconds after the last change of a project
+}
+
+# delta sync of projects, see `gantt.changes`
+CHANGES = {
+    'OVERLAP': 30,  # seconds, longer than transactions
+    'TOMBSTONE_TIMEOUT': 60 * 60 * 24 * 30,  # seconds, run `python manage.py prune_tombstones` daily
+}
+
+# websocket messages between workers, see `Toiler.channel_layers`
+CHANNEL_LAYER_LIMITS = {
+    'expiry': 10,  # seconds that a message waits to be received, then it's dropped
+    'group_expiry': 60 * 60 * 24,  # seconds, then a channel is removed from its groups
+    'capacity': 100,  # messages waiting in a channel (a websocket), then new ones are dropped
+    'group_capacity': {'activity_*': 1000},  # channels in a group, then joining it fails
+}
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
-        # 'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        # 'CONFIG': {
-        #     "hosts": [('127.0.0.1', 6379)],
-        # },
+        'BACKEND': 'Toiler.channel_layers.RedisChannelLayer',
+        'CONFIG': {
+            # comma separated "host:port", channels and groups are sharded between them
+            'hosts': [f'redis://{host}/3' for host in
+                      os.environ.get('CHANNEL_LAYER_HOSTS', f"{NOTIFIER['HOST']}:{NOTIFIER['PORT']}").split(',')],
+            'prefix': 'toiler',
+            **CHANNEL_LAYER_LIMITS,
+        },
     },
 }
 
-NOTIFIER = {
-    'HOST': os.environ['NOTIFIER_HOST'],
-    'PORT': 6379
+# background jobs, they are run by `python manage.py worker`
+JOB_QUEUE = {
+    'BACKEND': 'gantt.jobs.RedisQueue',
+    'OPTIONS': {
+        'HOST': NOTIFIER['HOST'],
+        'PORT': NOTIFIER['PORT'],
+        'DB': 2,
+    },
 }
 
 # Database
@@ -163,7 +197,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': (
-        'djangorestframework_camel_case.render.CamelCaseJSONRenderer',
+        'Toiler.renderers.CamelCaseJSONRenderer',
         'djangorestframework_camel_case.render.CamelCaseBrowsableAPIRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
@@ -190,13 +224,26 @@ SIMPLE_JWT = {
     # This can be 'Lax', 'Strict', or None to disable the flag.
 }
 
-CACHE = {
+CACHES = {
+    # an in-process LRU in front of the shared redis cache
     'default': {
-        'BACKEND': 'django.core.cache.backends.db.BaseDatabaseCache',
-        'LOCATION': 'my_cache_table',
-        'KEY_PREFIX': 'hello',
+        'BACKEND': 'Toiler.cache.TieredCache',
+        'LOCATION': 'redis',
         'TIMEOUT': 300,
-    }
+        'OPTIONS': {
+            'LOCAL_TIMEOUT': 5,  # seconds that a worker may serve a value changed by others
+            'LOCAL_MAX_ENTRIES': 1000,
+            # read from redis every time, they are invalidated by other workers: permissions (`gantt.access`),
+            # versions of projects (`gantt.snapshots`) and activity ids of `GetAll` (`gantt.invalidation`)
+            'SHARED_ONLY': ['visible_projects_', 'project_version_', 'activities_in_project_'],
+        },
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f"redis://{NOTIFIER['HOST']}:{NOTIFIER['PORT']}/1",
+        'KEY_PREFIX': 'toiler',
+        'TIMEOUT': 300,
+    },
 }
 
 LOGGING = {
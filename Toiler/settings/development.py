@@ -1,6 +1,6 @@
 import os
 import sys
-from .base import MIDDLEWARE, INSTALLED_APPS
+from .base import MIDDLEWARE, INSTALLED_APPS, CHANNEL_LAYER_LIMITS
 
 DEBUG = True
 
@@ -44,6 +44,24 @@ if 'test' in sys.argv:
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': 'test_database'
     }
+    # test databases are rolled back without sending signals, so nothing may survive in cache between tests.
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+    # a local stand-in of the redis channel layer, with the same limits
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'Toiler.channel_layers.InMemoryChannelLayer',
+            'CONFIG': CHANNEL_LAYER_LIMITS,
+        },
+    }
+    # jobs are run in the request, when its transaction is committed
+    JOB_QUEUE = {
+        'BACKEND': 'gantt.jobs.LocalQueue',
+        'OPTIONS': {'EAGER': True},
+    }
 
 NOSE_ARGS = ['--nocapture',
              '--nologcapture']
@@ -3,26 +3,32 @@ from logging import getLogger
 
 from asgiref.sync import async_to_sync
 from channels.db import database_sync_to_async
+from channels.exceptions import ChannelFull
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.layers import get_channel_layer, InMemoryChannelLayer
-from django.db.models import Q
+from channels.layers import get_channel_layer, BaseChannelLayer
 from django.urls import Resolver404
+from redis import RedisError
 
+from gantt.access import can_access
 from gantt.models import Activity
 
 logger = getLogger(__name__)
-channel_layer: InMemoryChannelLayer = get_channel_layer()
+channel_layer: BaseChannelLayer = get_channel_layer()
 GROUP_PREFIX = "activity_{}"
+OVERLOADED = 1013  # "try again later" close code of websockets
 
 
 def send_comment_to_channel(activity_id: int, data: dict):
     group_name = GROUP_PREFIX.format(activity_id)
     logger.info(f'new comment sent to {group_name}')
 
-    async_to_sync(channel_layer.group_send)(
-        group_name, {"type": "chat_message",
-                     "data": data}
-    )
+    try:
+        async_to_sync(channel_layer.group_send)(
+            group_name, {"type": "chat_message",
+                         "data": data}
+        )
+    except (RedisError, OSError) as e:  # the comment is saved, clients get it when they reload comments
+        logger.warning(f'comment is not sent to {group_name}: {e!r}')
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
@@ -32,7 +38,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         activity_id = self.scope['url_route']['kwargs'].get('activity_id')
 
-        if not self.can_connect(activity_id):
+        if not await self.can_connect(activity_id):
             logger.info(f'Not authorized user "{self.scope["user"]}"')
             raise Resolver404
 
@@ -40,18 +46,24 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         self.room_group_name = GROUP_PREFIX.format(activity_id)
 
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
+        try:
+            await self.channel_layer.group_add(
+                self.room_group_name,
+                self.channel_name
+            )
+        except ChannelFull:  # `group_capacity` of the channel layer
+            logger.warning(f'{self.room_group_name} is full')
+            await self.close(code=OVERLOADED)
 
     @database_sync_to_async
     def can_connect(self, activity_id) -> bool:
         user = self.scope["user"]
 
-        return user.is_authenticated and Activity.objects.filter(
-            Q(task__project__project_manager=user) |
-            Q(task__project__team__teammember__user=user), id=activity_id).exists()
+        if not user.is_authenticated:
+            return False
+
+        project_id = Activity.objects.filter(id=activity_id).values_list('project_id', flat=True).first()
+        return can_access(project_id, user)
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(
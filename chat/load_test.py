@@ -0,0 +1,113 @@
+"""
+A load test of fan-out of comments through the channel layer, used by `manage.py load_test_fanout`.
+
+`run()` starts `workers` processes, like daphne workers, each one has `clients` channels (websockets)
+in the group of each one of `groups` activities. Then it sends `messages` comments to every group,
+as `send_comment_to_channel()` does, and counts the messages that the workers receive.
+Throughput is received messages per second, from the first send to the last receive.
+Messages to full channels (`capacity`) or ones that wait longer than `expiry` are dropped by the layer.
+
+Workers are spawned processes that build the layer from its backend and config, they don't use Django.
+"""
+import asyncio
+import multiprocessing
+import queue
+import time
+import uuid
+from dataclasses import dataclass
+
+from channels.layers import InMemoryChannelLayer
+from django.utils.module_loading import import_string
+
+COMMENT = {'id': 1, 'author': 1, 'activity': 1, 'text': 'load test', 'created_at': '2022-01-01T00:00:00Z',
+           'updated_at': '2022-01-01T00:00:00Z'}
+
+
+@dataclass
+class Result:
+    sent: int  # group messages
+    expected: int  # messages of all channels
+    received: int
+    seconds: float
+
+    @property
+    def dropped(self) -> int:
+        return self.expected - self.received
+
+    @property
+    def throughput(self) -> float:
+        return self.received / self.seconds if self.seconds > 0 else 0.
+
+
+async def _receive(layer, groups, clients: int, messages: int, idle_timeout: float, ready) -> (int, float):
+    channels = []
+    for group in groups:
+        for _ in range(clients):
+            channel = await layer.new_channel()
+            await layer.group_add(group, channel)
+            channels.append((group, channel))
+    ready.put(None)
+
+    received, last = 0, 0.
+
+    async def consume(channel):
+        nonlocal received, last
+        for _ in range(messages):
+            try:
+                await asyncio.wait_for(layer.receive(channel), idle_timeout)
+            except asyncio.TimeoutError:  # the rest are dropped
+                return
+            received += 1
+            last = time.monotonic()
+
+    await asyncio.gather(*(consume(channel) for _, channel in channels))
+
+    for group, channel in channels:
+        await layer.group_discard(group, channel)
+    return received, last
+
+
+def _worker(backend: str, config: dict, groups, clients: int, messages: int, idle_timeout: float, ready, results):
+    layer = import_string(backend)(**config)
+    results.put(asyncio.run(_receive(layer, groups, clients, messages, idle_timeout, ready)))
+
+
+async def _send(layer, groups, messages: int):
+    for _ in range(messages):
+        await asyncio.gather(*(layer.group_send(group, {'type': 'chat_message', 'data': COMMENT})
+                               for group in groups))
+
+
+def run(backend: str, config: dict, workers: int = 4, groups: int = 10, clients: int = 20, messages: int = 50,
+        idle_timeout: float = 5) -> Result:
+    if issubclass(import_string(backend), InMemoryChannelLayer):
+        raise ValueError('an in-memory channel layer is not shared between processes.')
+
+    context = multiprocessing.get_context('spawn')
+    ready, results = context.Queue(), context.Queue()
+    run_id = uuid.uuid4().hex[:8]
+    group_names = [f'activity_load-{run_id}-{i}' for i in range(groups)]
+
+    processes = [context.Process(target=_worker, daemon=True, args=(
+        backend, config, group_names, clients, messages, idle_timeout, ready, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    try:
+        for _ in processes:
+            ready.get(timeout=60)
+
+        start = time.monotonic()
+        asyncio.run(_send(import_string(backend)(**config), group_names, messages))
+        received = [results.get(timeout=60 + idle_timeout) for _ in processes]
+    except queue.Empty:
+        raise RuntimeError('workers of the load test are not responding.')
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    last = max(last for _, last in received)
+    return Result(sent=groups * messages, expected=workers * groups * clients * messages,
+                  received=sum(count for count, _ in received), seconds=max(last - start, 0.))
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.load_test import run
+
+
+class Command(BaseCommand):
+    help = 'Measures throughput of sending comments to websockets of many worker processes through the channel layer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='processes that receive messages.')
+        parser.add_argument('--groups', type=int, default=10, help='activities that comments are sent to.')
+        parser.add_argument('--clients', type=int, default=20, help='websockets of a group in each worker.')
+        parser.add_argument('--messages', type=int, default=50, help='comments sent to each group.')
+        parser.add_argument('--idle-timeout', type=float, default=5,
+                            help='seconds that a websocket waits for the next message, then the rest are dropped.')
+        parser.add_argument('--layer', default='default', help='alias of CHANNEL_LAYERS.')
+
+    def handle(self, *args, **options):
+        layer = settings.CHANNEL_LAYERS[options['layer']]
+        self.stdout.write(f'sending {options["messages"]} comments to {options["groups"]} groups, '
+                          f'{options["clients"]} websockets of each group in {options["workers"]} workers.')
+
+        try:
+            result = run(layer['BACKEND'], layer.get('CONFIG', {}), workers=options['workers'],
+                         groups=options['groups'], clients=options['clients'], messages=options['messages'],
+                         idle_timeout=options['idle_timeout'])
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(e)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.received}/{result.expected} messages are received in {result.seconds:.3f} seconds: '
+            f'{result.throughput:.0f} messages/s, {result.dropped} are dropped.'
+        ))
@@ -1,3 +1,111 @@
-from django.test import TestCase
+import datetime
+import uuid
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.management import call_command, CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import Resolver404
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from Toiler.channel_layers import InMemoryChannelLayer, RedisChannelLayer
+from chat.consumers import channel_layer, GROUP_PREFIX, ChatConsumer
+from gantt.models import Project, Task, Activity
+from gantt.tests.base import GanttMixin
+
+REDIS_LAYER = {
+    'BACKEND': 'Toiler.channel_layers.RedisChannelLayer',
+    'CONFIG': {
+        'hosts': [f"redis://{settings.NOTIFIER['HOST']}:{settings.NOTIFIER['PORT']}/3"],
+        'prefix': f'test-{uuid.uuid4().hex}',
+        **settings.CHANNEL_LAYER_LIMITS,
+    },
+}
+
+
+class TestGroupCapacity(SimpleTestCase):
+    def assertGroupCapacity(self, layer):
+        new_channel = async_to_sync(layer.new_channel)
+        group_add = async_to_sync(layer.group_add)
+        channels = [new_channel() for _ in range(3)]
+
+        for channel in channels[:2]:
+            group_add('activity_1', channel)
+        with self.assertRaises(ChannelFull):
+            group_add('activity_1', channels[2])
+
+        for channel in channels:  # other groups are not limited
+            group_add('project_1', channel)
+        async_to_sync(layer.group_discard)('activity_1', channels[0])
+        group_add('activity_1', channels[2])
+
+    def test_in_memory(self):
+        self.assertGroupCapacity(InMemoryChannelLayer(group_capacity={'activity_*': 2}))
+
+    def test_redis(self):
+        layer = RedisChannelLayer(**{**REDIS_LAYER['CONFIG'], 'group_capacity': {'activity_*': 2}})
+        try:
+            self.assertGroupCapacity(layer)
+        finally:
+            async_to_sync(layer.flush)()
+
+
+class TestSendComment(GanttMixin, APITestCase):
+    def test_sent_to_group_of_activity(self):
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                         project_manager=self.user)
+        task = Task.objects.create(name='task', project=project, planned_start_date=now, planned_end_date=now)
+        Activity.objects.create(name='other', task=task, planned_start_date=now, planned_end_date=now)
+        activity = Activity.objects.create(name='activity', task=task, planned_start_date=now, planned_end_date=now)
+
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(GROUP_PREFIX.format(activity.id), channel)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('gantt:comment-list'), {'activity': activity.id, 'text': 'hi'})
+        self.assertEqual(response.status_code, 201)
+
+        message = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(message['type'], 'chat_message')
+        self.assertEqual((message['data']['id'], message['data']['text']), (response.data['id'], 'hi'))
+
+
+class TestChatConsumer(GanttMixin, TestCase):
+    def setUp(self) -> None:
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                         project_manager=self.user)
+        task = Task.objects.create(name='task', project=project, planned_start_date=now, planned_end_date=now)
+        self.activity = Activity.objects.create(name='activity', task=task, planned_start_date=now,
+                                                planned_end_date=now)
+
+    async def connect(self, user) -> bool:
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f'/ws/activity/{self.activity.id}/')
+        communicator.scope.update(user=user, url_route={'kwargs': {'activity_id': self.activity.id}})
+        connected, _ = await communicator.connect()
+        await communicator.disconnect()
+        return connected
+
+    def test_member(self):
+        self.assertTrue(async_to_sync(self.connect)(self.user))
+
+    def test_not_member(self):
+        with self.assertRaises(Resolver404):  # `HandleRouteNotFoundMiddleware` closes it
+            async_to_sync(self.connect)(self.username1)
+
+
+class TestLoadTestFanout(SimpleTestCase):
+    @override_settings(CHANNEL_LAYERS={'default': REDIS_LAYER})
+    def test_workers(self):
+        out = StringIO()
+        call_command('load_test_fanout', workers=2, groups=2, clients=3, messages=5, stdout=out)
+        self.assertIn('60/60 messages are received', out.getvalue())
+
+    def test_in_memory(self):
+        with self.assertRaises(CommandError):
+            call_command('load_test_fanout', stdout=StringIO())
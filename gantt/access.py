@@ -0,0 +1,94 @@
+from logging import getLogger
+from typing import Iterable, FrozenSet
+
+from django.core.cache import cache
+
+from gantt.models import Project, ProjectAccess
+
+logger = getLogger(__name__)
+
+cache_pre_key = 'visible_projects_{:d}'
+CACHE_TIMEOUT = 60 * 60  # seconds
+
+
+def visible_project_ids(user) -> FrozenSet[int]:
+    """
+    Returns ids of projects that user is project_manager or a team_member of them.
+
+    The result is read from `ProjectAccess` and cached per user.
+    """
+    cache_key = cache_pre_key.format(user.id)
+    result = cache.get(cache_key)
+    if result is not None:
+        return result
+
+    result = frozenset(ProjectAccess.objects.filter(user_id=user.id).values_list('project_id', flat=True))
+    cache.set(cache_key, result, CACHE_TIMEOUT)
+    return result
+
+
+def can_access(project_id, user) -> bool:
+    """:returns True if user is project_manager or a team_member of the project, else False"""
+    try:
+        project_id = int(project_id)
+    except (TypeError, ValueError):
+        return False
+
+    return project_id in visible_project_ids(user)
+
+
+def managed_project_ids(request) -> FrozenSet[int]:
+    """
+    Returns ids of projects that user of the request is project_manager of.
+    It's queried once and kept on the request, so checks of many objects don't run more queries.
+    """
+    result = getattr(request, '_managed_project_ids', None)
+    if result is None:
+        result = frozenset(Project.objects.filter(project_manager_id=request.user.id).values_list('id', flat=True))
+        request._managed_project_ids = result
+    return result
+
+
+def invalidate_users(user_ids: Iterable[int]):
+    keys = [cache_pre_key.format(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def sync_project_access(project_id: int):
+    """
+    Recomputes `ProjectAccess` rows of the project and invalidates cache of users whose access changed.
+    """
+    if project_id is None:
+        return
+
+    members = set(
+        Project.objects.filter(id=project_id).values_list('project_manager_id', flat=True)
+    )
+    members.update(
+        Project.objects.filter(id=project_id, team__teammember__isnull=False)
+        .values_list('team__teammember__user_id', flat=True)
+    )
+
+    current = set(ProjectAccess.objects.filter(project_id=project_id).values_list('user_id', flat=True))
+
+    removed = current - members
+    added = members - current
+
+    if removed:
+        ProjectAccess.objects.filter(project_id=project_id, user_id__in=removed).delete()
+    if added:
+        ProjectAccess.objects.bulk_create(
+            [ProjectAccess(project_id=project_id, user_id=user_id) for user_id in added],
+            ignore_conflicts=True
+        )
+
+    invalidate_users(removed | added)
+    if removed or added:
+        logger.info(f'access of project {project_id} changed: +{len(added)} -{len(removed)}')
+
+
+def forget_project(project_id: int):
+    """Invalidates cache of every user who could see the project. Call it before deleting the project."""
+    invalidate_users(ProjectAccess.objects.filter(project_id=project_id).values_list('user_id', flat=True))
+
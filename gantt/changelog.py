@@ -0,0 +1,113 @@
+"""
+A change log of each project in a capped redis stream, written by `gantt.notifier.Notifier` with events
+of the "changes" channel. A client that missed events (e.g. while it was reconnecting) reads the events
+after the last one it got, and fetches the whole project (`GetAll`) only if some of them are not in the log.
+
+Entries of a project have ids `<seq>-0`, where seq is 1, 2, 3, ... with no gaps, so a missing event is
+detected exactly: the log keeps the last `NOTIFIER['LOG_MAX_LENGTH']` events (about) of a project
+for `NOTIFIER['LOG_TIMEOUT']` seconds after its last change, and events that couldn't be written
+(redis was down) leave a gap in the sequence: the process that lost them increments seq of their projects
+as soon as it reaches redis again, before it appends anything, so the gap is seen by readers of every process.
+Events lost by a process that exits before it reaches redis again are not detected.
+"""
+from logging import getLogger
+from typing import List, Optional, Dict, Iterable, Tuple
+
+from django.conf import settings
+from redis import Redis, WatchError, ResponseError
+
+logger = getLogger(__name__)
+
+Event = Tuple[str, str, int, int]  # event, type, id, parent id
+
+
+class ChangeLog:
+    def __init__(self, r: Redis, prefix: str = 'changes', max_length: int = None, timeout: int = None):
+        self.redis = r
+        self.prefix = prefix
+        self.max_length = max_length or settings.NOTIFIER.get('LOG_MAX_LENGTH', 1000)
+        self.timeout = timeout or settings.NOTIFIER.get('LOG_TIMEOUT', 60 * 60 * 24 * 7)
+        self.lost = set()  # projects that some events of them couldn't be written
+
+    def stream_key(self, project_id: int) -> str:
+        return f'{self.prefix}_of_project_{project_id:d}'
+
+    def seq_key(self, project_id: int) -> str:
+        return f'{self.prefix}_seq_of_project_{project_id:d}'
+
+    def append(self, project_id: int, events: List[Event]) -> int:
+        """Appends events to the log of the project and returns seq of the last one."""
+        self.leave_gaps()
+        stream_key, seq_key = self.stream_key(project_id), self.seq_key(project_id)
+
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(seq_key)
+                    seq = int(pipe.get(seq_key) or 0)
+                    pipe.multi()
+                    for i, (event, obj_type, object_id, parent_id) in enumerate(events, seq + 1):
+                        pipe.xadd(stream_key, {'event': event, 'type': obj_type, 'id': object_id,
+                                               'parent': parent_id or 0},
+                                  id=f'{i}-0', maxlen=self.max_length, approximate=True)
+                    pipe.set(seq_key, seq + len(events), ex=self.timeout)
+                    pipe.expire(stream_key, self.timeout)
+                    pipe.execute()
+                    break
+                except WatchError:
+                    continue  # another process appended to the log
+                except ResponseError:
+                    # the stream is newer than seq (seq key was evicted), it's restarted and clients fetch all
+                    logger.warning(f'change log of project {project_id} is restarted.')
+                    self.redis.delete(stream_key, seq_key)  # seq is set even if XADD fails
+                    pipe.reset()
+
+        return seq + len(events)
+
+    def append_many(self, events_of_projects: Dict[int, List[Event]]):
+        self.leave_gaps()
+        for project_id, events in events_of_projects.items():
+            self.append(project_id, events)
+
+    def mark_lost(self, project_ids: Iterable[int]):
+        """Marks projects that their events couldn't be appended, see `leave_gaps()`."""
+        self.lost.update(project_ids)
+
+    def leave_gaps(self):
+        """Skips a seq of each project that is marked lost, so readers of any process see a gap."""
+        if not self.lost:
+            return
+
+        lost = list(self.lost)
+        with self.redis.pipeline(transaction=False) as pipe:
+            for project_id in lost:
+                pipe.incr(self.seq_key(project_id))
+                pipe.expire(self.seq_key(project_id), self.timeout)
+            pipe.execute()
+        self.lost.difference_update(lost)
+
+    def last_seq(self, project_id: int) -> int:
+        return int(self.redis.get(self.seq_key(project_id)) or 0)
+
+    def read(self, project_id: int, after: int, limit: int = 500) -> Optional[List[dict]]:
+        """
+        Returns at most `limit` events of the project after seq `after`, with their `seq`,
+        or None if some of them are not in the log and the client must fetch the whole project.
+        """
+        last = self.last_seq(project_id)
+        if after == last:
+            return []
+        if after > last:  # the log is restarted
+            return None
+
+        entries = self.redis.xrange(self.stream_key(project_id), min=f'({after}-0', count=limit)
+        events = [
+            {'seq': int(entry_id.split(b'-')[0]), 'event': fields[b'event'].decode(),
+             'type': fields[b'type'].decode(), 'id': int(fields[b'id']), 'parent': int(fields[b'parent'])}
+            for entry_id, fields in entries
+        ]
+
+        # a gap in the middle is lost events too
+        if not events or events[0]['seq'] != after + 1 or events[-1]['seq'] - events[0]['seq'] != len(events) - 1:
+            return None
+        return events
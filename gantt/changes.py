@@ -0,0 +1,60 @@
+"""
+Versions of projects for delta sync (`ProjectChangesView`), a client fetches only objects of a project
+that are changed since the version of its last fetch, instead of the whole project (`GetAll`).
+
+A version is a time in microseconds since the epoch. Changed rows of `UpdatedAtMixin` models have a newer
+`updated_at` and deleted objects have a `Tombstone`, both are read with indexes of (project, time),
+so the work of a fetch depends on the number of changes, not the size of the project.
+
+`updated_at` is the time of `save()`, but a row is visible when its transaction is committed, later.
+So a response has the version of `CHANGES['OVERLAP']` seconds ago (longer than transactions),
+and changes of that period are fetched again by the next request, clients apply them idempotently.
+Tombstones are kept for `CHANGES['TOMBSTONE_TIMEOUT']` seconds (see `manage.py prune_tombstones`),
+a version older than that is expired, and the client fetches the whole project.
+"""
+import datetime
+from typing import Iterable
+
+from django.conf import settings
+from django.utils import timezone
+
+from gantt.models import Activity, Tombstone
+
+OVERLAP = settings.CHANGES.get('OVERLAP', 30)  # seconds
+TOMBSTONE_TIMEOUT = settings.CHANGES.get('TOMBSTONE_TIMEOUT', 60 * 60 * 24 * 30)  # seconds
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def to_version(time: datetime.datetime) -> int:
+    return (time - _EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def from_version(version: int) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(microseconds=version)
+
+
+def current_version(now: datetime.datetime = None) -> int:
+    """Returns the version that a client fetches changes since it the next time."""
+    return to_version((now or timezone.now()) - datetime.timedelta(seconds=OVERLAP))
+
+
+def is_expired(version: int) -> bool:
+    """Returns True if tombstones since the version may be pruned."""
+    return from_version(version) < timezone.now() - datetime.timedelta(seconds=TOMBSTONE_TIMEOUT)
+
+
+def record_deleted(obj_type: str, object_id: int, project_id: int):
+    Tombstone.objects.create(project_id=project_id, type=obj_type, object_id=object_id)
+
+
+def touch_activities(activity_ids: Iterable[int]):
+    """Marks activities as changed, e.g. their predecessors are changed."""
+    Activity.objects.filter(id__in=set(activity_ids)).update(updated_at=timezone.now())
+
+
+def prune_tombstones() -> int:
+    """Deletes expired tombstones, returns their number."""
+    expired_at = timezone.now() - datetime.timedelta(seconds=TOMBSTONE_TIMEOUT)
+    count, _ = Tombstone.objects.filter(deleted_at__lt=expired_at).delete()
+    return count
@@ -0,0 +1,125 @@
+"""
+Links of activities and validation of the dependency graph of a project.
+
+A project's links are the `Dependency` rows plus `Activity.dependency` (a finish-to-start link
+without lag), both are loaded with one query by `project_links()`.
+
+Every project has a cached ancestor index `activity id -> ids of its predecessors`, loaded with one query.
+It's keyed by the version of project snapshots (see `gantt.snapshots`), so any change to activities
+makes a new index and the old one expires by itself.
+
+A new edge `dependency -> activity` makes a cycle only if `activity` is already an ancestor of `dependency`,
+so checking it walks up from `dependency` and visits only its ancestors, not the whole project.
+"""
+import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from django.db.models import Value, CharField, DurationField
+
+from gantt.models import Activity, Dependency
+from gantt.snapshots import get_version
+from Toiler.cache import get_or_compute
+
+ancestors_pre_key = 'dependency_ancestors_{:d}_{:d}'
+ANCESTORS_TIMEOUT = 60 * 60  # seconds
+
+NO_LAG = datetime.timedelta()
+
+
+def _links(dependencies, legacy) -> List[Tuple[int, int, str, datetime.timedelta]]:
+    """Returns links of `Dependency` rows and of activities with `Activity.dependency`, with one query."""
+    legacy = legacy.filter(dependency__isnull=False).values_list(
+        'dependency_id', 'id',
+        Value(Dependency.FINISH_TO_START, output_field=CharField()), Value(NO_LAG, output_field=DurationField())
+    )
+    rows = dependencies.values_list('predecessor_id', 'successor_id', 'type', 'lag').union(legacy, all=True)
+
+    links = {}
+    for predecessor_id, successor_id, link_type, lag in rows:
+        key = (predecessor_id, successor_id)
+        # the legacy link is a default one, so a duplicate that isn't default is the `Dependency` row
+        if key not in links or (link_type, lag) != (Dependency.FINISH_TO_START, NO_LAG):
+            links[key] = (predecessor_id, successor_id, link_type, lag)
+
+    return list(links.values())
+
+
+def project_links(project_id: int) -> List[Tuple[int, int, str, datetime.timedelta]]:
+    """
+    Returns `(predecessor id, successor id, type, lag)` of every link in the project with one query.
+    If `Activity.dependency` is also a `Dependency` row, only the row is returned.
+    """
+    return _links(Dependency.objects.filter(successor__project_id=project_id),
+                  Activity.objects.filter(project_id=project_id))
+
+
+def links_from(project_id: int, activity_ids: Iterable[int]) -> List[Tuple[int, int, str, datetime.timedelta]]:
+    """Returns links of the project from the activities to their successors (like `project_links()`)."""
+    activity_ids = list(activity_ids)
+    return _links(Dependency.objects.filter(successor__project_id=project_id, predecessor_id__in=activity_ids),
+                  Activity.objects.filter(project_id=project_id, dependency_id__in=activity_ids))
+
+
+def links_to(activity_ids: Iterable[int]) -> List[Tuple[int, int, str, datetime.timedelta]]:
+    """Returns links to the activities from their predecessors (like `project_links()`)."""
+    activity_ids = list(activity_ids)
+    return _links(Dependency.objects.filter(successor_id__in=activity_ids), Activity.objects.filter(id__in=activity_ids))
+
+
+def _load_ancestors(project_id: int) -> Dict[int, Tuple[int, ...]]:
+    ancestors = {}
+    for predecessor_id, successor_id, _, _ in project_links(project_id):
+        ancestors.setdefault(successor_id, []).append(predecessor_id)
+
+    return {successor_id: tuple(predecessor_ids) for successor_id, predecessor_ids in ancestors.items()}
+
+
+def ancestor_index(project_id: int) -> Dict[int, Tuple[int, ...]]:
+    """Returns `activity id -> ids of its predecessors` of the project, activities without one are omitted."""
+    project_id = int(project_id)
+    cache_key = ancestors_pre_key.format(project_id, get_version(project_id))
+    return get_or_compute(cache_key, lambda: _load_ancestors(project_id), ANCESTORS_TIMEOUT)
+
+
+def find_path(index: Dict[int, Tuple[int, ...]], start: int, target: int) -> List[int]:
+    """
+    Returns ids from `start` up to `target` through predecessors, or an empty list if `target` is not an ancestor.
+    It's iterative and visits every ancestor at most once, so it stops even if the index already has a cycle.
+    """
+    parents = {start: None}
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        if node == target:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = parents[node]
+            return path[::-1]
+
+        for predecessor in index.get(node, ()):
+            if predecessor not in parents:
+                parents[predecessor] = node
+                stack.append(predecessor)
+
+    return []
+
+
+def find_cycle(project_id: int, activity_id: int, dependency_ids: Iterable[int]) -> List[int]:
+    """
+    Returns the cycle that is made if the activity depends on `dependency_ids` (ids of activities in the cycle,
+    starting with the activity), or an empty list if there is none.
+    """
+    if activity_id is None:  # a new activity has no successor yet
+        return []
+
+    index = ancestor_index(project_id)
+    for dependency_id in dependency_ids:
+        if dependency_id == activity_id:
+            return [activity_id]
+
+        path = find_path(index, dependency_id, activity_id)
+        if path:
+            return path[::-1]
+
+    return []
@@ -0,0 +1,148 @@
+"""
+Invalidation of project level caches: the activity ids of `GetAll` and the version of project snapshots.
+
+The project of a changed object is resolved from foreign keys that are already loaded on it,
+or from a bounded in-process map of `task/activity id -> project id`, which is filled whenever
+those objects are saved or resolved. Only ids that can't be resolved so are fetched, in one query per model.
+Tasks can't be moved to another project through API. An activity can be moved to a task of another project,
+then `Activity.save` invalidates both projects, and its `post_save` remembers the new project.
+"""
+from collections import OrderedDict
+from logging import getLogger
+from typing import Iterable, Optional, Set, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from gantt.models import Project, Task, Activity, Assigned, State, Comment, Dependency
+from gantt.snapshots import bump_version
+
+logger = getLogger(__name__)
+
+activities_pre_key = 'activities_in_project_{:d}'
+ACTIVITIES_TIMEOUT = 60 * 60 * 24  # seconds
+
+KNOWN_MAX_SIZE = 100_000
+_known_projects: 'OrderedDict[Tuple[str, int], int]' = OrderedDict()
+
+
+def remember(kind: str, pk: int, project_id: Optional[int]):
+    """Remembers project of a task (`kind="task"`) or an activity (`kind="activity"`)."""
+    if pk is None or project_id is None:
+        return
+
+    key = (kind, pk)
+    _known_projects[key] = project_id
+    _known_projects.move_to_end(key)
+    if len(_known_projects) > KNOWN_MAX_SIZE:
+        _known_projects.popitem(last=False)
+
+
+def _recall(kind: str, pk: int) -> Optional[int]:
+    return _known_projects.get((kind, pk))
+
+
+def _resolve_loaded(instance) -> Tuple[Optional[int], Optional[Tuple[str, int]]]:
+    """
+    Returns (project_id, None) if project could be resolved without query,
+    else (None, (kind, pk)) of the object that must be fetched.
+    """
+    if isinstance(instance, Project):
+        return instance.id, None
+
+    if isinstance(instance, Task):
+        remember('task', instance.id, instance.project_id)
+        return instance.project_id, None
+
+    if isinstance(instance, State):
+        return instance.project_id, None
+
+    if isinstance(instance, Activity):
+        if instance.project_id is not None:
+            project_id = instance.project_id
+        elif Activity.task.is_cached(instance):
+            project_id = instance.task.project_id
+        else:
+            project_id = _recall('activity', instance.id) or _recall('task', instance.task_id)
+
+        if project_id is None:
+            return None, ('task', instance.task_id)
+
+        remember('activity', instance.id, project_id)
+        return project_id, None
+
+    if isinstance(instance, (Assigned, Comment)):
+        if instance.project_id is not None:
+            return instance.project_id, None
+        if type(instance).activity.is_cached(instance):
+            return _resolve_loaded(instance.activity)
+
+        project_id = _recall('activity', instance.activity_id)
+        if project_id is None:
+            return None, ('activity', instance.activity_id)
+
+        return project_id, None
+
+    if isinstance(instance, Dependency):
+        if Dependency.successor.is_cached(instance):
+            return _resolve_loaded(instance.successor)
+
+        project_id = _recall('activity', instance.successor_id)
+        if project_id is None:
+            return None, ('activity', instance.successor_id)
+
+        return project_id, None
+
+    raise TypeError(f'can not resolve project of {type(instance).__name__}')
+
+
+def project_ids_of(instances: Iterable) -> Set[int]:
+    """Returns ids of projects that instances belong to, with at most one query per unresolved model."""
+    project_ids = set()
+    unresolved = {'task': set(), 'activity': set()}
+
+    for instance in instances:
+        project_id, missing = _resolve_loaded(instance)
+        if missing:
+            unresolved[missing[0]].add(missing[1])
+        elif project_id is not None:
+            project_ids.add(project_id)
+
+    if unresolved['task']:
+        for task_id, project_id in Task.objects.filter(id__in=unresolved['task']).values_list('id', 'project_id'):
+            remember('task', task_id, project_id)
+            project_ids.add(project_id)
+
+    if unresolved['activity']:
+        rows = Activity.objects.filter(id__in=unresolved['activity']).values_list('id', 'project_id')
+        for activity_id, project_id in rows:
+            remember('activity', activity_id, project_id)
+            project_ids.add(project_id)
+
+    return project_ids
+
+
+def _invalidate(project_ids: Set[int]):
+    cache.delete_many([activities_pre_key.format(project_id) for project_id in project_ids])
+    bump_version(*project_ids)
+    logger.debug(f'caches of projects {project_ids} invalidated.')
+
+
+def invalidate_projects(project_ids: Iterable[Optional[int]]):
+    """
+    Invalidates caches of projects now, and again when the current transaction is committed,
+    because other requests may have cached the old rows in between.
+    """
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    if not project_ids:
+        return
+
+    _invalidate(project_ids)
+
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _invalidate(project_ids))
+
+
+def invalidate_instances(instances: Iterable):
+    """Invalidates caches of projects that instances belong to."""
+    invalidate_projects(project_ids_of(instances))
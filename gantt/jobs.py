@@ -0,0 +1,295 @@
+"""
+Background jobs for long-running project operations.
+
+A job is a function registered with `@register(name)`. A worker calls it with the `Job` and
+JSON-able keyword arguments, it may call `job.report(progress)` and its return value is kept as `job.result`.
+Status and progress of jobs are published to the "changes" channel (see `JobNotifier`).
+
+The queue is configured by `JOB_QUEUE`:
+
+    JOB_QUEUE = {
+        'BACKEND': 'gantt.jobs.RedisQueue',
+        'OPTIONS': {'HOST': '127.0.0.1', 'PORT': 6379, 'DB': 2},
+    }
+
+Workers are started with `python manage.py worker`. `LocalQueue` keeps jobs in the process
+and runs them as soon as they are enqueued if `EAGER` is true, which is used in tests.
+
+A worker of `RedisQueue` moves a job to its own processing list while it runs it, and keeps a heartbeat
+(refreshed when it polls and when the job reports progress). Jobs of a worker that stopped without finishing
+them (it crashed, or was killed in a deploy) are queued again by `recover()` when the worker's heartbeat
+expires, after `WORKER_TIMEOUT` seconds.
+"""
+import json
+import os
+import socket
+import uuid
+from collections import deque
+from logging import getLogger
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from redis import StrictRedis
+
+from gantt.models import Project
+from gantt.notifier import JobNotifier
+from gantt.scheduling import auto_schedule, CycleError
+
+logger = getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+JOB_TIMEOUT = 60 * 60 * 24  # seconds that status of a job is kept
+WORKER_TIMEOUT = 60 * 10  # seconds without a heartbeat, then jobs of the worker are queued again
+
+_registry: Dict[str, Callable] = {}
+
+
+def register(name: str):
+    """Registers the decorated function as job `name`."""
+
+    def wrapper(func):
+        _registry[name] = func
+        return func
+
+    return wrapper
+
+
+class JobFailed(Exception):
+    """Raised by a job to fail with `result`, e.g. validation errors."""
+
+    def __init__(self, result):
+        self.result = result
+        super().__init__(result)
+
+
+class Job:
+    def __init__(self, name: str, kwargs: dict, user_id: Optional[int] = None, id: str = None,
+                 status: str = QUEUED, progress: int = 0, result=None):
+        self.id = id or uuid.uuid4().hex
+        self.name = name
+        self.kwargs = kwargs
+        self.user_id = user_id
+        self.status = status
+        self.progress = progress
+        self.result = result
+        self.queue: Optional['BaseQueue'] = None
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id, 'name': self.name, 'kwargs': self.kwargs, 'user_id': self.user_id,
+            'status': self.status, 'progress': self.progress, 'result': self.result
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Job':
+        return cls(**data)
+
+    def report(self, progress: int):
+        """Saves and publishes progress (percent) of the running job."""
+        self.progress = progress
+        self.queue.update(self)
+
+
+class BaseQueue:
+    def enqueue(self, name: str, user_id: Optional[int] = None, **kwargs) -> Job:
+        """
+        Saves a new job, and publishes it as queued and pushes it to the queue when the current transaction
+        is committed, so the worker sees rows that are written before.
+        """
+        if name not in _registry:
+            raise KeyError(f'job "{name}" is not registered.')
+
+        job = Job(name, kwargs, user_id)
+        self.save(job)
+        transaction.on_commit(lambda: self._push_queued(job))
+        return job
+
+    def _push_queued(self, job: Job):
+        self.publish(job)
+        self.push(job)
+
+    def run(self, job: Job):
+        job.queue = self
+        job.status = RUNNING
+        self.update(job)
+
+        try:
+            job.result = _registry[job.name](job, **job.kwargs)
+            job.status = DONE
+            job.progress = 100
+        except JobFailed as e:
+            job.result = e.result
+            job.status = FAILED
+        except Exception as e:
+            logger.exception(f'job {job.id} ({job.name}) failed: {e}')
+            job.result = {'detail': 'job failed.'}
+            job.status = FAILED
+
+        self.update(job)
+        self.ack(job)
+
+    def update(self, job: Job):
+        self.save(job)
+        self.publish(job)
+
+    @staticmethod
+    def publish(job: Job):
+        """Publishes status of the job, a failure of redis is only logged (see `JobNotifier`)."""
+        JobNotifier().job_changed(job.id, job.user_id, job.status, job.progress)
+
+    def save(self, job: Job):
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    def push(self, job: Job):
+        raise NotImplementedError
+
+    def pop(self, timeout: int) -> Optional[Job]:
+        """Waits up to `timeout` seconds for a job, and returns None if there isn't."""
+        raise NotImplementedError
+
+    def ack(self, job: Job):
+        """Marks the popped job as finished, so it isn't queued again by `recover()`."""
+
+    def recover(self) -> int:
+        """Queues jobs of workers that stopped while running them again, and returns their number."""
+        return 0
+
+
+class RedisQueue(BaseQueue):
+    def __init__(self, HOST='127.0.0.1', PORT=6379, DB=0, NAME='jobs', client: StrictRedis = None,
+                 worker_id: str = None):
+        self.redis = client or StrictRedis(host=HOST, port=PORT, db=DB)
+        self.queue_key = f'{NAME}:queue'
+        self.job_pre_key = f'{NAME}:job:{{}}'
+        self.workers_key = f'{NAME}:workers'
+        self.processing_pre_key = f'{NAME}:processing:{{}}'
+        self.heartbeat_pre_key = f'{NAME}:heartbeat:{{}}'
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+
+    def save(self, job: Job):
+        self.redis.set(self.job_pre_key.format(job.id), json.dumps(job.to_dict()), ex=JOB_TIMEOUT)
+
+    def update(self, job: Job):
+        super().update(job)
+        if job.queue is self:
+            self.heartbeat()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        data = self.redis.get(self.job_pre_key.format(job_id))
+        return Job.from_dict(json.loads(data)) if data else None
+
+    def push(self, job: Job):
+        self.redis.lpush(self.queue_key, job.id)
+
+    def heartbeat(self):
+        with self.redis.pipeline(transaction=False) as pipe:
+            pipe.sadd(self.workers_key, self.worker_id)
+            pipe.set(self.heartbeat_pre_key.format(self.worker_id), 1, ex=WORKER_TIMEOUT)
+            pipe.execute()
+
+    def pop(self, timeout: int) -> Optional[Job]:
+        self.heartbeat()
+        processing_key = self.processing_pre_key.format(self.worker_id)
+        job_id = self.redis.brpoplpush(self.queue_key, processing_key, timeout)
+        if job_id is None:
+            return None
+
+        job = self.get(job_id.decode())
+        if job is None:
+            self.redis.lrem(processing_key, 0, job_id)
+            logger.warning(f'job {job_id} is expired before running.')
+        return job
+
+    def ack(self, job: Job):
+        self.redis.lrem(self.processing_pre_key.format(self.worker_id), 0, job.id)
+
+    def recover(self) -> int:
+        count = 0
+        for worker_id in self.redis.smembers(self.workers_key):
+            worker_id = worker_id.decode()
+            if worker_id != self.worker_id and self.redis.exists(self.heartbeat_pre_key.format(worker_id)):
+                continue
+
+            processing_key = self.processing_pre_key.format(worker_id)
+            while (job_id := self.redis.rpoplpush(processing_key, self.queue_key)) is not None:
+                job = self.get(job_id.decode())
+                if job is not None:
+                    job.status, job.progress = QUEUED, 0
+                    self.update(job)
+                    logger.warning(f'job {job.id} ({job.name}) of stopped worker {worker_id} is queued again.')
+                    count += 1
+
+            if worker_id != self.worker_id:
+                self.redis.srem(self.workers_key, worker_id)
+
+        return count
+
+
+class LocalQueue(BaseQueue):
+    """Keeps jobs in the process, for tests and development without a worker."""
+
+    def __init__(self, EAGER=False):
+        self.eager = EAGER
+        self._jobs: Dict[str, dict] = {}
+        self._pending = deque()
+
+    def save(self, job: Job):
+        self._jobs[job.id] = job.to_dict()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        data = self._jobs.get(job_id)
+        return Job.from_dict(data) if data else None
+
+    def push(self, job: Job):
+        if self.eager:
+            self.run(job)
+        else:
+            self._pending.append(job.id)
+
+    def pop(self, timeout: int) -> Optional[Job]:
+        return self.get(self._pending.popleft()) if self._pending else None
+
+
+_queue: Optional[BaseQueue] = None
+
+
+def get_queue() -> BaseQueue:
+    global _queue
+    if _queue is None:
+        config = settings.JOB_QUEUE
+        _queue = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    return _queue
+
+
+@receiver(setting_changed)
+def _reset_queue(setting, **kwargs):
+    global _queue
+    if setting == 'JOB_QUEUE':
+        _queue = None
+
+
+# - - - - - - - - - - - - - - jobs - - - - - - - - - - - - - -
+
+@register('auto_schedule')
+def auto_schedule_job(job: Job, project_id: int):
+    project = Project.objects.filter(id=project_id).first()
+    if project is None:
+        raise JobFailed({'detail': 'Not found.'})
+
+    try:
+        task_ids, activity_ids = auto_schedule(project, report=job.report)
+    except CycleError as e:
+        raise JobFailed(e.detail)
+
+    return {'tasks': task_ids, 'activities': activity_ids}
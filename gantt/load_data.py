@@ -0,0 +1,168 @@
+"""
+A generator of synthetic data for benchmarks and load tests, used by `manage.py generate_load_data`.
+
+`generate()` bulk-creates `Scale.users` users and `Scale.projects` projects. Each project has teams, roles,
+members (picked from the users), tasks and activities, and every activity has assigned members, comments
+and, sometimes, a finish-to-start link to the previous activity of its task (chains of dependencies).
+Counts of a scale are means of a `DISTRIBUTIONS` item, e.g. 'pareto' makes a few large projects.
+
+It's deterministic for a seed, so results of runs are comparable.
+Ids are allocated before inserting, because `bulk_create` doesn't set them on every database (e.g. MySQL),
+and rows are inserted in chunks as they are made, so memory doesn't grow with size of the data.
+Users, then each project with its rows, are inserted in a transaction, so a run that fails or is interrupted
+leaves only whole projects, and ids of the next run start after them.
+"""
+import datetime
+import random
+from dataclasses import dataclass, replace
+from typing import List, Dict, Callable
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+
+from gantt.access import sync_project_access
+from gantt.models import Project, Task, Activity, Assigned, Comment, State, Team, Role, TeamMember, Dependency
+from user.models import User
+
+START = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+PASSWORD = 'load-data-password'
+CHUNK_SIZE = 5000
+
+DISTRIBUTIONS: Dict[str, Callable[[random.Random, int], int]] = {
+    'fixed': lambda rng, mean: mean,
+    'uniform': lambda rng, mean: rng.randint(1, 2 * mean - 1) if mean > 0 else 0,
+    'pareto': lambda rng, mean: min(int(mean / 3 * rng.paretovariate(1.5)) + 1, 20 * mean) if mean > 0 else 0,
+}
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int = 10
+    projects: int = 1
+    teams: int = 1  # of a project
+    roles: int = 1  # of a project
+    members: int = 5  # of a project, the project manager is a member too
+    tasks: int = 5  # of a project
+    activities: int = 4  # of a task
+    assignees: int = 2  # of an activity, from members of the project
+    comments: int = 1  # of an activity
+    dependencies: float = 0.0  # probability of a link to the previous activity of the task
+    distribution: str = 'fixed'  # of tasks of a project and activities of a task
+
+    def times(self, factor: int) -> 'Scale':
+        """Returns the scale with `factor` times more tasks in every project."""
+        return replace(self, tasks=self.tasks * factor)
+
+
+class _Writer:
+    """
+    Buffers new objects of models and bulk-creates them in chunks.
+    Buffers of models before a model (in `models` order) are flushed first, so foreign keys are valid.
+    """
+
+    def __init__(self, models: list, chunk_size: int):
+        self.models = models
+        self.chunk_size = chunk_size
+        self.buffers = {model: [] for model in models}
+        self.counts = {model: 0 for model in models}
+        self.ids = {model: _next_id(model) for model in models}
+
+    def next_id(self, model) -> int:
+        self.ids[model] += 1
+        return self.ids[model] - 1
+
+    def add(self, obj):
+        model = type(obj)
+        if obj.id is None:
+            obj.id = self.next_id(model)
+        self.buffers[model].append(obj)
+        if len(self.buffers[model]) >= self.chunk_size:
+            self.flush(model)
+        return obj
+
+    def flush(self, last_model=None):
+        for model in self.models:
+            if self.buffers[model]:
+                model.objects.bulk_create(self.buffers[model], batch_size=self.chunk_size)
+                self.counts[model] += len(self.buffers[model])
+                self.buffers[model] = []
+            if model is last_model:
+                break
+
+
+def _next_id(model) -> int:
+    return (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+
+
+def generate(scale: Scale, seed: int = 0, chunk_size: int = CHUNK_SIZE,
+             progress: Callable[[str], None] = None) -> List[int]:
+    """Creates the data of the scale and returns ids of the projects, the first one is managed by the first user."""
+    rng = random.Random(seed)
+    count = DISTRIBUTIONS[scale.distribution]
+    day = datetime.timedelta(days=1)
+    writer = _Writer([User, Project, Team, Role, TeamMember, State, Task, Activity, Dependency, Assigned, Comment],
+                     chunk_size)
+
+    password = make_password(PASSWORD)
+    user_ids = []
+    with transaction.atomic():
+        for i in range(scale.users):
+            user_id = writer.next_id(User)
+            writer.add(User(id=user_id, username=f'load{user_id}', email=f'load{user_id}@test.com',
+                            first_name=f'first{i}', last_name=f'last{i}', password=password))
+            user_ids.append(user_id)
+        writer.flush()
+
+    project_ids = []
+    for i in range(scale.projects):
+        with transaction.atomic():  # rows of the project are flushed before the next one
+            manager_id = user_ids[i % len(user_ids)]
+            project = writer.add(Project(name=f'project{i}', planned_start_date=START.date(),
+                                         planned_end_date=START.date() + 365 * day, project_manager_id=manager_id))
+            project_ids.append(project.id)
+
+            teams = [writer.add(Team(name=f'team{j}', project_id=project.id)).id for j in range(scale.teams)]
+            roles = [writer.add(Role(name=f'role{j}', project_id=project.id)).id for j in range(scale.roles)]
+            others = [user_id for user_id in user_ids if user_id != manager_id]
+            members = [manager_id] + rng.sample(others, min(max(scale.members - 1, 0), len(others)))
+            if teams and roles:
+                for user_id in members[1:]:
+                    writer.add(TeamMember(team_id=rng.choice(teams), role_id=rng.choice(roles), user_id=user_id))
+            state_id = writer.add(State(name='done', project_id=project.id)).id
+
+            for _ in range(count(rng, scale.tasks)):
+                start = START + rng.randrange(300) * day
+                task = writer.add(Task(name='task', project_id=project.id, planned_start_date=start,
+                                       planned_end_date=start + 30 * day))
+
+                previous = None
+                for _ in range(count(rng, scale.activities)):
+                    linked = previous is not None and rng.random() < scale.dependencies
+                    activity_start = previous.planned_end_date if linked else start + rng.randrange(25) * day
+                    activity = writer.add(Activity(
+                        name='activity', task_id=task.id, project_id=project.id, planned_start_date=activity_start,
+                        planned_end_date=activity_start + rng.randint(1, 5) * day,
+                        state_id=state_id if rng.random() < 0.5 else None,
+                        dependency_id=previous.id if linked else None,  # the same as the finish-to-start link
+                    ))
+                    if linked:
+                        writer.add(Dependency(predecessor_id=previous.id, successor_id=activity.id))
+
+                    for user_id in rng.sample(members, min(scale.assignees, len(members))):
+                        writer.add(Assigned(activity_id=activity.id, user_id=user_id, project_id=project.id))
+                    for _ in range(scale.comments):
+                        writer.add(Comment(activity_id=activity.id, author_id=rng.choice(members),
+                                           project_id=project.id, text=f'comment of {activity.id}'))
+                    previous = activity
+
+            writer.flush()
+            sync_project_access(project.id)
+
+        if progress and ((i + 1) % 100 == 0 or i + 1 == scale.projects):
+            progress(f'{i + 1}/{scale.projects} projects are generated.')
+
+    if progress:
+        progress(', '.join(f'{model.__name__}: {writer.counts[model]}' for model in writer.models))
+
+    return project_ids
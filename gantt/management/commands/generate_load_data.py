@@ -0,0 +1,35 @@
+import time
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand
+
+from gantt.load_data import Scale, generate, DISTRIBUTIONS, CHUNK_SIZE, PASSWORD
+
+
+class Command(BaseCommand):
+    help = 'Generates synthetic users, projects, tasks, activities, assignees and comments for load tests.'
+
+    def add_arguments(self, parser):
+        for field in fields(Scale):
+            if field.name == 'distribution':
+                continue
+            parser.add_argument(f'--{field.name}', type=field.type, default=field.default,
+                                help=f'default: {field.default}')
+
+        parser.add_argument('--distribution', choices=sorted(DISTRIBUTIONS), default=Scale.distribution,
+                            help='distribution of tasks of a project and activities of a task around their means.')
+        parser.add_argument('--seed', type=int, default=0, help='the same seed generates the same data.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='rows of each bulk insert.')
+
+    def handle(self, *args, **options):
+        scale = Scale(**{field.name: options[field.name] for field in fields(Scale)})
+        self.stdout.write(f'generating {scale}')
+
+        start = time.perf_counter()
+        project_ids = generate(scale, seed=options['seed'], chunk_size=options['chunk_size'],
+                               progress=self.stdout.write if options['verbosity'] > 0 else None)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'projects {project_ids[0]}..{project_ids[-1]} are generated in {time.perf_counter() - start:.1f} '
+            f'seconds, password of users is "{PASSWORD}".' if project_ids else 'no project is generated.'
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from gantt.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Deletes tombstones of deleted objects that are older than CHANGES["TOMBSTONE_TIMEOUT"].'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{prune_tombstones()} tombstones are deleted.')
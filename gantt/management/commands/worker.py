@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from redis import RedisError
+
+from gantt.jobs import get_queue
+
+
+class Command(BaseCommand):
+    help = 'Runs background jobs of the queue that is configured by JOB_QUEUE.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Exits when the queue is empty.')
+        parser.add_argument('--timeout', type=int, default=5, help='Seconds to wait for a job in each poll.')
+
+    def handle(self, *args, **options):
+        queue = get_queue()
+        self.stdout.write(f'worker is waiting for jobs of {type(queue).__name__}.')
+        self.recover(queue)
+
+        try:
+            while True:
+                try:
+                    if not self.poll(queue, options['timeout'], options['burst']):
+                        break
+                except RedisError as e:  # a job that was running is queued again by `recover()`
+                    if options['burst']:
+                        raise
+                    self.stderr.write(f'redis is unavailable, retrying in {options["timeout"]} seconds: {e!r}')
+                    time.sleep(options['timeout'])
+        except KeyboardInterrupt:
+            pass
+
+    def poll(self, queue, timeout: int, burst: bool) -> bool:
+        """Runs the next job, and returns False if the worker must stop."""
+        job = queue.pop(timeout)
+        if job is None:
+            if burst:
+                return False
+            self.recover(queue)  # of workers that stopped while this one was running
+            return True
+
+        close_old_connections()
+        queue.run(job)
+        close_old_connections()
+        self.stdout.write(f'job {job.id} ({job.name}) is {job.status}.')
+        return True
+
+    def recover(self, queue):
+        count = queue.recover()
+        if count:
+            self.stdout.write(f'{count} jobs of stopped workers are queued again.')
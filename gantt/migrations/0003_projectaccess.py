@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_project_access(apps, schema_editor):
+    Project = apps.get_model('gantt', 'Project')
+    TeamMember = apps.get_model('gantt', 'TeamMember')
+    ProjectAccess = apps.get_model('gantt', 'ProjectAccess')
+
+    pairs = set(Project.objects.values_list('id', 'project_manager_id'))
+    pairs.update(TeamMember.objects.values_list('team__project_id', 'user_id'))
+
+    ProjectAccess.objects.bulk_create(
+        [ProjectAccess(project_id=project_id, user_id=user_id) for project_id, user_id in pairs],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gantt', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='actual_budget',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='planned_budget',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.CreateModel(
+            name='ProjectAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gantt.project')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='projectaccess',
+            constraint=models.UniqueConstraint(fields=('user', 'project'), name='unique_user_project_access'),
+        ),
+        migrations.RunPython(fill_project_access, migrations.RunPython.noop),
+    ]
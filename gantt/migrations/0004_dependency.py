@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:35
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gantt', '0003_projectaccess'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('FS', 'Finish to start'), ('SS', 'Start to start'), ('FF', 'Finish to finish'), ('SF', 'Start to finish')], default='FS', max_length=2)),
+                ('lag', models.DurationField(default=datetime.timedelta)),
+                ('predecessor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='successor_links', to='gantt.activity')),
+                ('successor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='predecessor_links', to='gantt.activity')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dependency',
+            constraint=models.UniqueConstraint(fields=('successor', 'predecessor'), name='unique_successor_predecessor'),
+        ),
+        migrations.AddConstraint(
+            model_name='dependency',
+            constraint=models.CheckConstraint(check=models.Q(('successor', models.F('predecessor')), _negated=True), name='dependency_not_self'),
+        ),
+    ]
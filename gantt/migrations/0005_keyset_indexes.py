@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gantt', '0004_dependency'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['task', 'planned_start_date', 'id'], name='activity_task_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['activity', 'created_at', 'id'], name='comment_activity_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'planned_start_date', 'id'], name='task_project_start_idx'),
+        ),
+    ]
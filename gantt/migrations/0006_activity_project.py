@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_activity_project(apps, schema_editor):
+    Activity = apps.get_model('gantt', 'Activity')
+    Task = apps.get_model('gantt', 'Task')
+
+    Activity.objects.update(
+        project_id=models.Subquery(Task.objects.filter(id=models.OuterRef('task_id')).values('project_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gantt', '0005_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='project',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE,
+                                    to='gantt.project'),
+        ),
+        migrations.RunPython(fill_activity_project, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='activity',
+            name='project',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to='gantt.project'),
+        ),
+        migrations.RemoveIndex(
+            model_name='activity',
+            name='activity_task_start_idx',
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['project', 'planned_start_date', 'id'], name='activity_project_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['project', 'task'], name='activity_project_task_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assigned',
+            index=models.Index(fields=['user', 'activity'], name='assigned_user_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(fields=['user', 'team'], name='teammember_user_team_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_project(apps, schema_editor):
+    Activity = apps.get_model('gantt', 'Activity')
+    project_of_activity = models.Subquery(
+        Activity.objects.filter(id=models.OuterRef('activity_id')).values('project_id')[:1]
+    )
+
+    for model_name in ('Assigned', 'Comment'):
+        apps.get_model('gantt', model_name).objects.update(project_id=project_of_activity)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gantt', '0006_activity_project'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assigned',
+            name='project',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE,
+                                    to='gantt.project'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='project',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE,
+                                    to='gantt.project'),
+        ),
+        migrations.RunPython(fill_project, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='assigned',
+            name='project',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to='gantt.project'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='project',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to='gantt.project'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gantt', '0007_assigned_comment_project'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='assigned',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='state',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_id', models.IntegerField()),
+                ('type', models.CharField(choices=[('task', 'Task'), ('activity', 'Activity'),
+                                                   ('assigned', 'Assigned'), ('state', 'State')], max_length=10)),
+                ('object_id', models.IntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project_id', 'deleted_at'], name='tombstone_project_deleted_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['project', 'updated_at'], name='activity_project_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assigned',
+            index=models.Index(fields=['project', 'updated_at'], name='assigned_project_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='state',
+            index=models.Index(fields=['project', 'updated_at'], name='state_project_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'updated_at'], name='task_project_updated_idx'),
+        ),
+    ]
@@ -1,8 +1,38 @@
+import datetime
+
 from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
 from django_cte import CTEManager
 
 from user.models import User
 
+# Sent after `bulk_create` and `bulk_update` of models that use `BulkSignalQuerySet`,
+# with arguments `instances` and `created`.
+post_bulk_save = Signal()
+
+
+class BulkSignalQuerySet(models.QuerySet):
+    """A QuerySet that sends `post_bulk_save`, because `bulk_create` and `bulk_update` don't send `post_save`."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            post_bulk_save.send(sender=self.model, instances=objs, created=True)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = tuple(objs)
+        if issubclass(self.model, UpdatedAtMixin) and 'updated_at' not in fields:  # `auto_now` isn't set by it
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields = [*fields, 'updated_at']
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if objs:
+            post_bulk_save.send(sender=self.model, instances=objs, created=False)
+        return rows
+
 
 class TimeStampMixin(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -12,6 +42,14 @@ class TimeStampMixin(models.Model):
         abstract = True
 
 
+class UpdatedAtMixin(models.Model):
+    """A model that its changed rows are returned by `gantt.changes`, it needs an index of (project, updated_at)."""
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
 class Project(models.Model):
     name = models.CharField(max_length=90)
     planned_start_date = models.DateField()
@@ -48,19 +86,37 @@ class TeamMember(models.Model):
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=['team', 'user'], name='unique_team_employee')]
+        indexes = [models.Index(fields=['user', 'team'], name='teammember_user_team_idx')]
 
 
-class State(models.Model):
+class ProjectAccess(models.Model):
+    """
+    Denormalized index of users who can see a project (its project manager and every team member).
+    It is maintained by `gantt.access` from signals, don't write it directly.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=False)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'project'], name='unique_user_project_access')]
+
+
+class State(UpdatedAtMixin, models.Model):
     name = models.CharField(max_length=50)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
 
+    objects = BulkSignalQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['project', 'updated_at'], name='state_project_updated_idx')]
+
     def __str__(self):
         return f"{self.project.id if self.project else ':::'}: {self.name}"
 
 
 # -  - - -- -  - - - - - - -- - - - - - -- - - -- - --
 
-class Task(models.Model):
+class Task(UpdatedAtMixin, models.Model):
     name = models.CharField(max_length=90)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     planned_start_date = models.DateTimeField()
@@ -71,13 +127,54 @@ class Task(models.Model):
     actual_budget = models.DecimalField(decimal_places=2, max_digits=8, default=0)
     description = models.TextField(blank=True)
 
+    objects = BulkSignalQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'planned_start_date', 'id'], name='task_project_start_idx'),
+            models.Index(fields=['project', 'updated_at'], name='task_project_updated_idx'),
+        ]
+
     def __str__(self):
         return f'{self.name} on {self.project}'
 
 
-class Activity(models.Model):
+class ProjectQuerySet(BulkSignalQuerySet):
+    """A QuerySet of `ProjectCopyMixin` models, `bulk_create` sets missing `project_id` with one query."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        parent_id = f'{self.model.project_parent}_id'
+        missing = {getattr(obj, parent_id) for obj in objs if obj.project_id is None}
+        if missing:
+            parent_model = self.model._meta.get_field(self.model.project_parent).related_model
+            projects = dict(parent_model.objects.filter(id__in=missing).values_list('id', 'project_id'))
+            for obj in objs:
+                if obj.project_id is None:
+                    obj.project_id = projects.get(getattr(obj, parent_id))
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class ProjectCopyMixin(models.Model):
+    """
+    A model with a copy of `project` of its parent (the foreign key named `project_parent`),
+    so rows of a project are filtered and checked without joining their parents. It's set on save.
+    """
+    project_parent: str
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if getattr(self, f'{self.project_parent}_id') is not None:
+            self.project_id = getattr(self, self.project_parent).project_id
+        super().save(*args, **kwargs)
+
+
+class Activity(ProjectCopyMixin, UpdatedAtMixin, models.Model):
     name = models.CharField(max_length=90)
     task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, editable=False)  # the same as `task.project`
     description = models.TextField(blank=True)
     planned_start_date = models.DateTimeField()
     planned_end_date = models.DateTimeField()
@@ -88,10 +185,65 @@ class Activity(models.Model):
     dependency = models.ForeignKey('self', default=None, null=True, on_delete=models.CASCADE)
     state = models.ForeignKey(State, null=True, on_delete=models.SET_NULL)
 
+    objects = ProjectQuerySet.as_manager()
+    project_parent = 'task'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'planned_start_date', 'id'], name='activity_project_start_idx'),
+            models.Index(fields=['project', 'task'], name='activity_project_task_idx'),  # for partitions of `GetAll`
+            models.Index(fields=['project', 'updated_at'], name='activity_project_updated_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        old_project_id = None if self._state.adding else self.project_id
+        super().save(*args, **kwargs)
+
+        if old_project_id is not None and old_project_id != self.project_id:  # moved to a task of another project
+            Assigned.objects.filter(activity_id=self.id).update(project_id=self.project_id, updated_at=timezone.now())
+            Comment.objects.filter(activity_id=self.id).update(project_id=self.project_id)
+            Tombstone.objects.create(project_id=old_project_id, type=Tombstone.ACTIVITY, object_id=self.id)
+
+            from gantt.invalidation import invalidate_projects  # it imports models
+            invalidate_projects({old_project_id, self.project_id})
+
     def __str__(self):
         return f'{self.name} in {self.task}'
 
 
+class Dependency(models.Model):
+    """
+    A link between activities, `successor` is scheduled relative to `predecessor` by `type` and `lag`.
+    `Activity.dependency` is kept as a finish-to-start link without lag.
+    """
+    FINISH_TO_START = 'FS'
+    START_TO_START = 'SS'
+    FINISH_TO_FINISH = 'FF'
+    START_TO_FINISH = 'SF'
+    TYPES = [
+        (FINISH_TO_START, 'Finish to start'),
+        (START_TO_START, 'Start to start'),
+        (FINISH_TO_FINISH, 'Finish to finish'),
+        (START_TO_FINISH, 'Start to finish'),
+    ]
+
+    predecessor = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='successor_links')
+    successor = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='predecessor_links')
+    type = models.CharField(max_length=2, choices=TYPES, default=FINISH_TO_START)
+    lag = models.DurationField(default=datetime.timedelta)
+
+    objects = BulkSignalQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['successor', 'predecessor'], name='unique_successor_predecessor'),
+            models.CheckConstraint(check=~models.Q(successor=models.F('predecessor')), name='dependency_not_self'),
+        ]
+
+    def __str__(self):
+        return f'{self.type} {self.predecessor_id} -> {self.successor_id}'
+
+
 class ChertActivity(Activity):
     class Meta:
         proxy = True
@@ -99,18 +251,53 @@ class ChertActivity(Activity):
     objects = CTEManager()
 
 
-class Assigned(models.Model):
+class Assigned(ProjectCopyMixin, UpdatedAtMixin, models.Model):
     activity = models.ForeignKey(Activity, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, editable=False)  # the same as `activity.project`
+
+    objects = ProjectQuerySet.as_manager()
+    project_parent = 'activity'
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=['activity', 'user'], name='unique_activity_user')]
+        indexes = [
+            models.Index(fields=['user', 'activity'], name='assigned_user_activity_idx'),
+            models.Index(fields=['project', 'updated_at'], name='assigned_project_updated_idx'),
+        ]
 
     def __str__(self):
         return f'"{self.user}"'  # on activity "{self.activity}"'
 
 
-class Comment(TimeStampMixin, models.Model):
+class Comment(ProjectCopyMixin, TimeStampMixin, models.Model):
     text = models.TextField(max_length=200)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     activity = models.ForeignKey(Activity, on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, editable=False)  # the same as `activity.project`
+
+    objects = ProjectQuerySet.as_manager()
+    project_parent = 'activity'
+
+    class Meta:
+        indexes = [models.Index(fields=['activity', 'created_at', 'id'], name='comment_activity_created_idx')]
+
+
+class Tombstone(models.Model):
+    """
+    A deleted object of a project, for `gantt.changes`. Objects that are deleted with their parent
+    (e.g. activities of a deleted task) don't have tombstones. It's written by `gantt.signals`.
+    """
+    TASK = 'task'
+    ACTIVITY = 'activity'
+    ASSIGNED = 'assigned'
+    STATE = 'state'
+    TYPES = [(TASK, 'Task'), (ACTIVITY, 'Activity'), (ASSIGNED, 'Assigned'), (STATE, 'State')]
+
+    project_id = models.IntegerField()  # not a foreign key, projects may be deleted in the same transaction
+    type = models.CharField(max_length=10, choices=TYPES)
+    object_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['project_id', 'deleted_at'], name='tombstone_project_deleted_idx')]
@@ -1,12 +1,77 @@
-from json import dumps as json_dumps
-from typing import Type, Union
+"""
+Publishers of events to the **"changes"** redis channel.
 
+`notify()` doesn't publish at once in a transaction: events are buffered in a batch of the transaction
+(or of its savepoint) and the batch is published with one pipeline when it's committed,
+so nothing is published for changes that are rolled back.
+
+Events of `Notifier` are encoded by `NOTIFIER['FORMAT']`:
+ - "json": a message is `{"event", "type", "id", "parent"}` of one event, the format of older consumers.
+ - "compact": a message is up to `NOTIFIER['BATCH_SIZE']` events packed by `encode_events()`,
+   a header of `WIRE_VERSION` and number of events, then (event code, type code, id, parent id) of each one,
+   the codes are `EVENT_CODES` and `TYPE_CODES`. It's 18 bytes per event.
+`decode()` returns events of a message in either format (and of the other JSON messages of the channel).
+
+Events of a project (`notify()` with `project_id`) are appended to the change log of the project too,
+see `gantt.changelog`.
+"""
+import struct
+import threading
+import time
+from collections import deque
+from functools import partial
+from json import dumps as json_dumps, loads as json_loads
+from logging import getLogger
+from typing import Type, Union, List, Tuple, Sequence, Dict
+
+from asgiref.local import Local
 from django.conf import settings
-from redis import StrictRedis, Redis
+from django.db import transaction
+from redis import StrictRedis, Redis, RedisError
 
-_redis_cli = StrictRedis(host=settings.NOTIFIER['HOST'], port=settings.NOTIFIER['PORT'])
+from gantt.changelog import ChangeLog, Event
+
+logger = getLogger(__name__)
+
+# publishing mustn't block requests for long, see `Notifier`
+_redis_cli = StrictRedis(host=settings.NOTIFIER['HOST'], port=settings.NOTIFIER['PORT'],
+                         socket_timeout=settings.NOTIFIER.get('TIMEOUT', 0.5),
+                         socket_connect_timeout=settings.NOTIFIER.get('TIMEOUT', 0.5))
 _EVENTS = {"added", "updated", "deleted"}
-_TYPES = {"project", "task", "activity", "state", "assigned", "user"}
+_TYPES = {"project", "task", "activity", "state", "assigned", "dependency", "user"}
+
+# codes are part of the wire format, only add new ones.
+WIRE_VERSION = 1
+EVENT_CODES = {"added": 1, "updated": 2, "deleted": 3}
+TYPE_CODES = {"project": 1, "task": 2, "activity": 3, "state": 4, "assigned": 5, "dependency": 6, "user": 7}
+_EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+_TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+_HEADER = struct.Struct('>BH')  # version, number of events
+_EVENT = struct.Struct('>BBqq')  # event, type, id, parent id
+
+
+def encode_events(events: Sequence[Event]) -> bytes:
+    """Packs events into a message of the compact format, a missing parent is 0."""
+    message = bytearray(_HEADER.pack(WIRE_VERSION, len(events)))
+    for event, obj_type, object_id, parent_id in events:
+        message += _EVENT.pack(EVENT_CODES[event], TYPE_CODES[obj_type], object_id, parent_id or 0)
+    return bytes(message)
+
+
+def decode(message: Union[bytes, str]) -> List[dict]:
+    """Returns events of a message of the "changes" channel as dicts of the JSON format."""
+    if isinstance(message, str) or message[:1] == b'{':
+        return [json_loads(message)]
+
+    version, count = _HEADER.unpack_from(message)
+    if version != WIRE_VERSION:
+        raise ValueError(f'version {version} of message is not supported.')
+
+    return [
+        {"event": _EVENT_NAMES[event], "type": _TYPE_NAMES[obj_type], "id": object_id, "parent": parent_id}
+        for event, obj_type, object_id, parent_id in _EVENT.iter_unpack(message[_HEADER.size:])
+    ]
 
 
 class RedisNotifier:
@@ -20,7 +85,8 @@ class RedisNotifier:
         self.redis = r
         self.channel = channel
 
-    def _publish(self, event, obj_type, object_id, parent_id):
+    @staticmethod
+    def _message(event, obj_type, object_id, parent_id) -> str:
         data_capsule = {
             "event": event,
             "type": obj_type,
@@ -28,15 +94,83 @@ class RedisNotifier:
             "parent": parent_id
         }
 
-        str_json = json_dumps(data_capsule)
-        self.redis.publish(self.channel, str_json)
+        return json_dumps(data_capsule)
+
+    def _publish_or_log(self, data_capsule: dict):
+        """Publishes a message at once, a failure of redis is logged, so a committed change doesn't fail."""
+        try:
+            self.redis.publish(self.channel, json_dumps(data_capsule))
+        except RedisError as e:
+            logger.warning(f'"{data_capsule["event"]}" event of {data_capsule["id"]} is not published: {e!r}')
+
+
+class _Batch:
+    """
+    Events of a transaction (or a savepoint). An "updated" event of an object that has an event is dropped,
+    but its parent replaces the parent of the earlier event (e.g. an activity is moved to another task).
+    """
+
+    def __init__(self, savepoint_ids: Tuple[str, ...]):
+        self.savepoint_ids = savepoint_ids
+        self.events: List[Event] = []
+        self.changes: Dict[int, List[Event]] = {}  # events of each project
+        self.objects = {}  # (type, id) -> project id and indices of its event in `events` and `changes`
+        self.flush = None  # the on_commit callback
+        self.flushed = False
+
+    def add(self, event, obj_type, object_id, parent_id, project_id=None):
+        key = (obj_type, object_id)
+        if event == 'updated' and key in self.objects and self.objects[key][0] == project_id:
+            _, index, change_index = self.objects[key]
+            self.events[index] = self.events[index][:3] + (parent_id,)
+            if project_id is not None:
+                changes = self.changes[project_id]
+                changes[change_index] = changes[change_index][:3] + (parent_id,)
+            return
+
+        self.events.append((event, obj_type, object_id, parent_id))
+        change_index = None
+        if project_id is not None:
+            changes = self.changes.setdefault(project_id, [])
+            change_index = len(changes)
+            changes.append((event, obj_type, object_id, parent_id))
+        self.objects[key] = (project_id, len(self.events) - 1, change_index)
 
 
 class Notifier(RedisNotifier):
-    def notify(self, event: str, obj_type: str, object_id: int, parent_id: Union[int, Type[int]]):
+    """
+    Events of a transaction are published when it's committed, in one pipeline (see the module docstring),
+    and events outside of transactions are published at once.
+
+    If publishing fails (redis is down, or slower than `NOTIFIER['TIMEOUT']` seconds), messages are kept in a local
+    buffer of at most `NOTIFIER['MAX_BUFFER']` messages, the oldest ones are dropped, and they are published
+    before the next messages. Redis isn't tried again for `NOTIFIER['RETRY_AFTER']` seconds, so requests
+    are not blocked by it in the meantime. Events that aren't appended to the change log are not buffered,
+    the log has a gap instead, so clients fetch the whole project.
+    """
+
+    def __init__(self, r: Redis = None, channel='changes', max_buffer: int = None, retry_after: float = None,
+                 wire_format: str = None, batch_size: int = None, log: ChangeLog = None):
+        super().__init__(r, channel)
+        self.log = log or ChangeLog(self.redis)
+        self.wire_format = wire_format or settings.NOTIFIER.get('FORMAT', 'json')
+        if self.wire_format not in ('json', 'compact'):
+            raise ValueError(f'format "{self.wire_format}" is not "json" or "compact".')
+        self.batch_size = batch_size or settings.NOTIFIER.get('BATCH_SIZE', 100)
+        self.max_buffer = max_buffer or settings.NOTIFIER.get('MAX_BUFFER', 10000)
+        self.retry_after = settings.NOTIFIER.get('RETRY_AFTER', 5) if retry_after is None else retry_after
+
+        self.backlog = deque(maxlen=self.max_buffer)
+        self.retry_at = 0.
+        self.lock = threading.Lock()
+        self.local = Local()  # the current batch of each thread
+
+    def notify(self, event: str, obj_type: str, object_id: int, parent_id: Union[int, Type[int]],
+               project_id: int = None):
         """
-            publish event to **"changes"** redis channel.
+            publish event to **"changes"** redis channel, when the current transaction is committed.
 
+            :param project_id: the project that the object belongs to, the event is appended to its change log
             :param parent_id:
             :param object_id:
             :param event: "added" or "updated" or "deleted"
@@ -49,38 +183,124 @@ class Notifier(RedisNotifier):
         if obj_type not in self._TYPES:
             raise Exception(f'obj_type is not in {self._TYPES}')
 
-        self._publish(event, obj_type, object_id, parent_id)
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            batch = _Batch(())
+            batch.add(event, obj_type, object_id, parent_id, project_id)
+            self._flush(batch)
+            return
 
+        self._get_batch(connection).add(event, obj_type, object_id, parent_id, project_id)
 
-class BulkNotify(RedisNotifier):
-    def __init__(self, event: str, obj_type: str, redis_client: Redis = None, channel='changes'):
-        """
-        publish event to **"changes"** redis channel via Pipeline.
+    def _get_batch(self, connection) -> _Batch:
+        """Returns the batch of the current savepoint, a new one if it's committed or rolled back."""
+        batch = getattr(self.local, 'batch', None)
+        savepoint_ids = tuple(connection.savepoint_ids)
 
-        :param event: "added" or "updated" or "deleted"
-        :param obj_type:
+        if batch is None or batch.flushed or batch.savepoint_ids != savepoint_ids or \
+                not any(entry[1] is batch.flush for entry in connection.run_on_commit):  # (sids, func[, robust])
+            batch = _Batch(savepoint_ids)
+            batch.flush = partial(self._flush, batch)
+            transaction.on_commit(batch.flush)
+            self.local.batch = batch
+
+        return batch
+
+    def _flush(self, batch: _Batch):
+        batch.flushed = True
+        self.send(self.encode(batch.events))
+        self.append_to_log(batch.changes)
+
+    def encode(self, events: List[Event]) -> List[Union[str, bytes]]:
+        """Returns messages of events in `wire_format`."""
+        if self.wire_format == 'json':
+            return [self._message(*event) for event in events]
+
+        return [encode_events(events[i:i + self.batch_size]) for i in range(0, len(events), self.batch_size)]
+
+    def send(self, messages: List[Union[str, bytes]]):
+        """Publishes messages after messages of the buffer, or adds them to the buffer if redis is unavailable."""
+        with self.lock:
+            self.backlog.extend(messages)
+            if not self.backlog or time.monotonic() < self.retry_at:
+                return
+
+            messages = list(self.backlog)
+            self.backlog.clear()
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for message in messages:
+                pipe.publish(self.channel, message)
+            pipe.execute()
+        except RedisError as e:
+            with self.lock:
+                self.retry_at = time.monotonic() + self.retry_after
+                # the oldest messages are dropped if it's full
+                self.backlog = deque(messages + list(self.backlog), maxlen=self.max_buffer)
+            logger.warning(f'{len(messages)} events are not published, {len(self.backlog)} are buffered: {e!r}')
+
+    def append_to_log(self, changes: Dict[int, List[Event]]):
+        """Appends events of projects to their change logs, or leaves gaps in the logs if redis is unavailable."""
+        if not changes and not self.log.lost:
+            return
+
+        if time.monotonic() < self.retry_at:
+            self.log.mark_lost(changes)
+            return
+
+        try:
+            self.log.append_many(changes)
+        except RedisError as e:
+            self.log.mark_lost(changes)
+            with self.lock:
+                self.retry_at = time.monotonic() + self.retry_after
+            logger.warning(f'events of projects {sorted(changes)} are not appended to their change logs: {e!r}')
+
+
+class ScheduleNotifier(RedisNotifier):
+    def schedule_changed(self, project_id: int, manager_id: int, task_ids: List[int], activity_ids: List[int]):
         """
-        if event not in self._EVENTS:
-            raise Exception(f"event not in {self._EVENTS}")
+        publish one **"schedule_changed"** event for a project, instead of an event per changed row.
 
-        if obj_type not in self._TYPES:
-            raise Exception(f'obj_type is not in {self._TYPES}')
+        :param task_ids: ids of tasks that their dates are changed
+        :param activity_ids: ids of activities that their dates are changed
+        """
+        data_capsule = {
+            "event": "schedule_changed",
+            "type": "project",
+            "id": project_id,
+            "parent": manager_id,
+            "tasks": task_ids,
+            "activities": activity_ids
+        }
 
-        super(BulkNotify, self).__init__(redis_client, channel)
+        self._publish_or_log(data_capsule)
 
-        self.event = event
-        self.obj_type = obj_type
 
-    def __enter__(self):
-        self.pipe = self.redis.pipeline(transaction=False)
-        return self
+class JobNotifier(RedisNotifier):
+    def job_changed(self, job_id: str, user_id: int, status: str, progress: int):
+        """
+        publish **"job_changed"** event when a background job is queued, makes progress or finishes.
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.pipe.execute()
+        :param status: "queued", "running", "done" or "failed"
+        :param progress: percent
+        """
+        data_capsule = {
+            "event": "job_changed",
+            "type": "job",
+            "id": job_id,
+            "parent": user_id,
+            "status": status,
+            "progress": progress
+        }
 
-    def notify(self, object_id: int, parent_id: Union[int, Type[int]]):
-        self._publish(self.event, self.obj_type, object_id, parent_id)
+        self._publish_or_log(data_capsule)
 
 
 _notifier = Notifier()
 notify = _notifier.notify
+
+
+def get_change_log() -> ChangeLog:
+    return _notifier.log
@@ -0,0 +1,136 @@
+"""
+Opt-in keyset (cursor) pagination of list views.
+
+A list is paginated only if query_params contains `page_size` or `cursor`, so clients that expect
+the whole list are not changed. Rows are ordered by one of `view.keyset_orderings`, e.g.
+
+    keyset_orderings = {'id': ('id',), 'planned_start_date': ('planned_start_date', 'id')}
+
+chosen with `?ordering=`, the first one is the default. The last field must be unique.
+The cursor keeps values of the last row of the page, and the next page is filtered by
+`(a, id) > (last a, last id)`, which is a range on a composite index, so every page costs the same
+as the first one (no OFFSET).
+"""
+import base64
+import binascii
+import json
+from typing import Dict, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def after(fields: Sequence[str], values: Sequence) -> Q:
+    """
+    Returns `(fields) > (values)` in lexicographic order. The first field is also compared with `>=`,
+    so databases that don't optimize the OR use it as a range of the index.
+    """
+    condition = Q()
+    for i, field in enumerate(fields):
+        condition |= Q(**dict(zip(fields[:i], values[:i])), **{f'{field}__gt': values[i]})
+
+    return Q(**{f'{fields[0]}__gte': values[0]}) & condition
+
+
+class KeysetPagination(BasePagination):
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def __init__(self):
+        self.request = None
+        self.ordering: Optional[str] = None
+        self.next_values: Optional[list] = None
+
+    def is_requested(self, request) -> bool:
+        return self.page_size_query_param in request.query_params or self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset: Optional[QuerySet], request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        orderings: Dict[str, Tuple[str, ...]] = view.keyset_orderings
+        page_size = self.get_page_size(request)
+        ordering, values = self.decode_cursor(request, orderings)
+        self.ordering = ordering
+
+        if queryset is None:
+            return []
+
+        fields = orderings[ordering]
+        queryset = queryset.order_by(*fields)
+        if values is not None:
+            model = queryset.model
+            try:
+                values = [model._meta.get_field(field).to_python(value) for field, value in zip(fields, values)]
+            except DjangoValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(after(fields, values))
+
+        page = list(queryset[:page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_values = [self.encode_value(getattr(page[-1], field)) for field in fields]
+
+        return page
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: ['A valid integer is required.']})
+
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: ['Ensure this value is greater than or equal to 1.']})
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request, orderings: Dict[str, Tuple[str, ...]]) -> Tuple[str, Optional[list]]:
+        """Returns the ordering and values of the last row of the previous page, which are None on the first page."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                ordering, values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            except (TypeError, ValueError, binascii.Error):
+                raise NotFound(self.invalid_cursor_message)
+            if ordering not in orderings or not isinstance(values, list) or len(values) != len(orderings[ordering]):
+                raise NotFound(self.invalid_cursor_message)
+            return ordering, values
+
+        ordering = request.query_params.get(self.ordering_query_param, next(iter(orderings)))
+        if ordering not in orderings:
+            raise ValidationError({self.ordering_query_param: [f'Select one of {", ".join(orderings)}.']})
+        return ordering, None
+
+    @staticmethod
+    def encode_value(value):
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    def encode_cursor(self, values: list) -> str:
+        return base64.urlsafe_b64encode(json.dumps([self.ordering, values]).encode()).decode()
+
+    def get_next_link(self) -> Optional[str]:
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -1,11 +1,12 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
-from gantt.models import Project
+from gantt.access import managed_project_ids
 
 
 class IsProjectManagerOrReadOnly(BasePermission):
     """
     Object-level permission to only allow ProjectManager of a Task to edit it.
+    It checks `project_id` of objects against `managed_project_ids()`, so it runs at most one query per request.
     """
 
     def has_object_permission(self, request, view, instance):
@@ -14,18 +15,11 @@ class IsProjectManagerOrReadOnly(BasePermission):
         if request.method in SAFE_METHODS:
             return True
 
-        return Project.objects.filter(id=instance.project.id, project_manager=request.user).exists()
+        return instance.project_id in managed_project_ids(request)
 
 
-class IsProjectManagerOrReadOnlyComment(BasePermission):
+class IsProjectManagerOrReadOnlyComment(IsProjectManagerOrReadOnly):
     """
     Object-level permission to only allow ProjectManager to edit it.
+    `Comment.project` is the project of its activity.
     """
-
-    def has_object_permission(self, request, view, comment):
-        # Read permissions are allowed to any request,
-        # so we'll always allow GET, HEAD or OPTIONS requests.
-        if request.method in SAFE_METHODS:
-            return True
-
-        return Project.objects.filter(id=comment.activity.task.project.id, project_manager=request.user).exists()
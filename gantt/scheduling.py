@@ -0,0 +1,463 @@
+"""
+Critical path method (CPM) scheduling engine.
+
+Activities are addressed by their index in flat lists, and dependencies are edges
+`edge_src[k] -> edge_dst[k]` with a link type (`FS`, `SS`, `FF` or `SF`) and a lag.
+E.g. an `SS` edge with lag 2 means the successor starts at least 2 after the predecessor starts.
+Times are integers (microseconds from the project start), so the passes do no datetime arithmetic.
+
+All the passes are iterative and O(V + E):
+ - successors are stored as CSR arrays (`offsets`, `targets`),
+ - the order is found with Kahn's algorithm,
+ - the forward pass computes early start/finish and the backward pass late start/finish.
+
+`reschedule_successors()` is the incremental forward pass, it only loads and moves activities
+that are after a changed one.
+"""
+import datetime
+from collections import defaultdict
+from typing import List, Sequence, Tuple, Dict, Iterable, Callable
+
+from django.db import transaction
+from django.db.models import Min, Max
+from django.utils.timezone import make_aware
+
+from gantt.dependencies import project_links, links_from, links_to
+from gantt.models import Activity, Project, Dependency, Task
+from gantt.notifier import ScheduleNotifier
+
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+# link type -> (it's from finish of predecessor, it's to finish of successor)
+LINK_ENDS = {
+    Dependency.FINISH_TO_START: (True, False),
+    Dependency.START_TO_START: (False, False),
+    Dependency.FINISH_TO_FINISH: (True, True),
+    Dependency.START_TO_FINISH: (False, True),
+}
+
+
+class CycleError(ValueError):
+    """
+    Raised when dependencies of activities have a cycle.
+    `nodes` are indices of activities that are in or after a cycle, and `cycles` are the cycles found in them.
+    """
+
+    def __init__(self, nodes: List[int], cycles: List[List[int]]):
+        self.nodes = nodes
+        self.cycles = cycles
+        super().__init__(f'dependencies of activities have {len(cycles)} cycles.')
+
+    @property
+    def detail(self) -> dict:
+        """Error of API, with every cycle, so all of them can be fixed at once."""
+        return {'dependency': ['dependencies of activities have a cycle.'], 'cycles': self.cycles}
+
+
+def build_successors(n: int, edge_src: Sequence[int], edge_dst: Sequence[int], *columns: Sequence) -> Tuple[List, ...]:
+    """
+    Returns CSR arrays; successors of node `i` are `targets[offsets[i]:offsets[i + 1]]`.
+    Every extra column of edge data (e.g. lags) is returned in the same order as `targets`.
+    """
+    offsets = [0] * (n + 1)
+    for src in edge_src:
+        offsets[src + 1] += 1
+
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    position = offsets[:-1]
+    targets = [0] * len(edge_src)
+    sorted_columns = [[None] * len(edge_src) for _ in columns]
+    for k, (src, dst) in enumerate(zip(edge_src, edge_dst)):
+        p = position[src]
+        targets[p] = dst
+        for column, sorted_column in zip(columns, sorted_columns):
+            sorted_column[p] = column[k]
+        position[src] += 1
+
+    return (offsets, targets, *sorted_columns)
+
+
+def topological_order(n: int, offsets: Sequence[int], targets: Sequence[int]) -> List[int]:
+    """Kahn's algorithm. It raises `CycleError` if the graph has a cycle."""
+    in_degree = [0] * n
+    for dst in targets:
+        in_degree[dst] += 1
+
+    order = [i for i in range(n) if in_degree[i] == 0]
+    head = 0
+    while head < len(order):
+        node = order[head]
+        head += 1
+        for k in range(offsets[node], offsets[node + 1]):
+            dst = targets[k]
+            in_degree[dst] -= 1
+            if in_degree[dst] == 0:
+                order.append(dst)
+
+    if len(order) != n:
+        nodes = [i for i in range(n) if in_degree[i] > 0]
+        raise CycleError(nodes, find_cycles(nodes, offsets, targets))
+
+    return order
+
+
+def find_cycles(nodes: Sequence[int], offsets: Sequence[int], targets: Sequence[int]) -> List[List[int]]:
+    """
+    Returns disjoint cycles among nodes that are left by Kahn's algorithm, in O(V + E).
+
+    First nodes that are only after a cycle are peeled off, so every remaining node has a successor
+    that remains. Then walking from any node through remaining successors always closes a cycle.
+    """
+    remaining = set(nodes)
+
+    out_degree = {}
+    predecessors = {node: [] for node in remaining}
+    for node in remaining:
+        degree = 0
+        for k in range(offsets[node], offsets[node + 1]):
+            dst = targets[k]
+            if dst in remaining:
+                degree += 1
+                predecessors[dst].append(node)
+        out_degree[node] = degree
+
+    stack = [node for node, degree in out_degree.items() if degree == 0]
+    while stack:
+        node = stack.pop()
+        remaining.discard(node)
+        for predecessor in predecessors[node]:
+            out_degree[predecessor] -= 1
+            if out_degree[predecessor] == 0:
+                stack.append(predecessor)
+
+    cycles = []
+    visited = set()
+    for node in sorted(remaining):
+        walk = {}
+        path = []
+        while node not in visited and node not in walk:
+            walk[node] = len(path)
+            path.append(node)
+            node = next(targets[k] for k in range(offsets[node], offsets[node + 1]) if targets[k] in remaining)
+
+        if node in walk:
+            cycles.append(path[walk[node]:])
+        visited.update(path)
+
+    return cycles
+
+
+class Schedule:
+    """Result of `schedule()`. Every list is indexed like the input durations."""
+
+    def __init__(self, order, early_start, early_finish, late_start, late_finish, finish):
+        self.order = order
+        self.early_start = early_start
+        self.early_finish = early_finish
+        self.late_start = late_start
+        self.late_finish = late_finish
+        self.finish = finish
+
+    @property
+    def total_float(self) -> List[int]:
+        return [ls - es for ls, es in zip(self.late_start, self.early_start)]
+
+    def is_critical(self, i: int) -> bool:
+        return self.late_start[i] == self.early_start[i]
+
+    def critical_path(self) -> List[int]:
+        """Indices of activities without float, in topological order."""
+        return [i for i in self.order if self.late_start[i] == self.early_start[i]]
+
+
+def schedule(durations: Sequence[int], edge_src: Sequence[int], edge_dst: Sequence[int], start: int = 0,
+             edge_types: Sequence[str] = None, edge_lags: Sequence[int] = None) -> Schedule:
+    """
+    Computes early and late dates of activities that all begin at `start` or as their predecessors allow.
+    Edges are finish-to-start without lag, unless `edge_types` and `edge_lags` are given.
+    """
+    n = len(durations)
+    if edge_types is None:
+        edge_types = [Dependency.FINISH_TO_START] * len(edge_src)
+    if edge_lags is None:
+        edge_lags = [0] * len(edge_src)
+
+    ends = [LINK_ENDS[edge_type] for edge_type in edge_types]
+    offsets, targets, ends, lags = build_successors(n, edge_src, edge_dst, ends, edge_lags)
+    order = topological_order(n, offsets, targets)
+
+    early_start = [start] * n
+    early_finish = [0] * n
+    for node in order:
+        node_start = early_start[node]
+        node_finish = node_start + durations[node]
+        early_finish[node] = node_finish
+        for k in range(offsets[node], offsets[node + 1]):
+            dst = targets[k]
+            from_finish, to_finish = ends[k]
+            bound = (node_finish if from_finish else node_start) + lags[k]
+            if to_finish:
+                bound -= durations[dst]
+            if early_start[dst] < bound:
+                early_start[dst] = bound
+
+    project_finish = max(early_finish, default=start)
+
+    late_finish = [project_finish] * n
+    late_start = [0] * n
+    for node in reversed(order):
+        finish = late_finish[node]
+        duration = durations[node]
+        for k in range(offsets[node], offsets[node + 1]):
+            dst = targets[k]
+            from_finish, to_finish = ends[k]
+            bound = (late_finish[dst] if to_finish else late_start[dst]) - lags[k]
+            if not from_finish:
+                bound += duration
+            if bound < finish:
+                finish = bound
+        late_finish[node] = finish
+        late_start[node] = finish - duration
+
+    return Schedule(order, early_start, early_finish, late_start, late_finish, project_finish)
+
+
+def day_start(date: datetime.date) -> datetime.datetime:
+    return make_aware(datetime.datetime.fromordinal(date.toordinal()))
+
+
+class ProjectGraph:
+    """Activities of a project and their links, each loaded with one query into flat lists."""
+
+    def __init__(self, project: Project):
+        self.project = project
+        self.start = day_start(project.planned_start_date)
+
+        rows = Activity.objects.filter(project_id=project.id).values_list(
+            'id', 'task_id', 'planned_start_date', 'planned_end_date'
+        )
+
+        self.ids: List[int] = []
+        self.task_ids: List[int] = []
+        self.start_dates: List[datetime.datetime] = []
+        self.end_dates: List[datetime.datetime] = []
+        self.durations: List[int] = []
+        for activity_id, task_id, start_date, end_date in rows:
+            self.ids.append(activity_id)
+            self.task_ids.append(task_id)
+            self.start_dates.append(start_date)
+            self.end_dates.append(end_date)
+            self.durations.append((end_date - start_date) // MICROSECOND)
+
+        self.index = {activity_id: i for i, activity_id in enumerate(self.ids)}
+
+        self.edge_src: List[int] = []
+        self.edge_dst: List[int] = []
+        self.edge_types: List[str] = []
+        self.edge_lags: List[int] = []
+        index = self.index
+        for predecessor_id, successor_id, link_type, lag in project_links(project.id):
+            if predecessor_id in index and successor_id in index:
+                self.edge_src.append(index[predecessor_id])
+                self.edge_dst.append(index[successor_id])
+                self.edge_types.append(link_type)
+                self.edge_lags.append(lag // MICROSECOND)
+
+    def successors(self) -> Tuple[List[int], List[int]]:
+        """CSR arrays of successors, see `build_successors()`."""
+        return build_successors(len(self.ids), self.edge_src, self.edge_dst)
+
+    def schedule(self) -> Schedule:
+        """Schedules activities, `nodes` and `cycles` of a raised `CycleError` are ids of activities."""
+        try:
+            return schedule(self.durations, self.edge_src, self.edge_dst,
+                            edge_types=self.edge_types, edge_lags=self.edge_lags)
+        except CycleError as e:
+            ids = self.ids
+            raise CycleError([ids[i] for i in e.nodes], [[ids[i] for i in cycle] for cycle in e.cycles]) from None
+
+    def to_datetime(self, value: int) -> datetime.datetime:
+        return self.start + value * MICROSECOND
+
+
+def save_dates(project: Project, tasks: List[Task], activities: List[Activity],
+               batch_size: int = 500) -> Tuple[List[int], List[int]]:
+    """
+    Writes planned dates of tasks and activities in one transaction, then publishes
+    one "schedule_changed" event. It returns ids of tasks and activities.
+    """
+    task_ids = [task.id for task in tasks]
+    activity_ids = [activity.id for activity in activities]
+
+    with transaction.atomic():
+        Activity.objects.bulk_update(activities, fields=['planned_start_date', 'planned_end_date'],
+                                     batch_size=batch_size)
+        Task.objects.bulk_update(tasks, fields=['planned_start_date', 'planned_end_date'], batch_size=batch_size)
+
+        if task_ids or activity_ids:
+            transaction.on_commit(lambda: ScheduleNotifier().schedule_changed(
+                project.id, project.project_manager_id, task_ids, activity_ids
+            ))
+
+    return task_ids, activity_ids
+
+
+def auto_schedule(project: Project, batch_size: int = 500,
+                  report: Callable[[int], None] = None) -> Tuple[List[int], List[int]]:
+    """
+    Schedules tasks and activities of the project to the earliest possible plan,
+    only rows that their dates are changed are written (see `save_dates()`).
+
+    It raises `CycleError` if dependencies have a cycle, and calls `report` with the progress percent.
+    It returns ids of changed tasks and activities.
+    """
+    report = report or (lambda progress: None)
+
+    graph = ProjectGraph(project)
+    report(30)
+    result = graph.schedule()
+    report(60)
+
+    project_end_date = day_start(project.planned_end_date)
+
+    activities = []
+    task_dates = {}
+    for i, activity_id in enumerate(graph.ids):
+        start = graph.to_datetime(result.early_start[i])
+        end = graph.to_datetime(result.early_finish[i])
+        if start != graph.start_dates[i] or end != graph.end_dates[i]:
+            activities.append(Activity(id=activity_id, task_id=graph.task_ids[i],
+                                       planned_start_date=start, planned_end_date=end))
+
+        task_start, task_end = task_dates.get(graph.task_ids[i], (start, min(project_end_date, end)))
+        task_dates[graph.task_ids[i]] = (min(start, task_start), max(min(project_end_date, end), task_end))
+
+    tasks = [
+        Task(id=task_id, project_id=project.id, planned_start_date=task_dates[task_id][0],
+             planned_end_date=task_dates[task_id][1])
+        for task_id, start, end in Task.objects.filter(project_id=project.id)
+        .values_list('id', 'planned_start_date', 'planned_end_date')
+        if task_id in task_dates and task_dates[task_id] != (start, end)
+    ]
+    report(70)
+
+    return save_dates(project, tasks, activities, batch_size)
+
+
+def _downstream(successors: Dict[int, List[int]], activity_id: int) -> List[int]:
+    """Returns activities after the activity in topological order; ones in a cycle are left out."""
+    visited = {activity_id}
+    stack = [activity_id]
+    while stack:
+        for successor_id in successors.get(stack.pop(), ()):
+            if successor_id not in visited:
+                visited.add(successor_id)
+                stack.append(successor_id)
+
+    in_degree = defaultdict(int)
+    for node in visited:
+        for successor_id in successors.get(node, ()):
+            in_degree[successor_id] += 1
+
+    order = [activity_id] if in_degree[activity_id] == 0 else []
+    head = 0
+    while head < len(order):
+        for successor_id in successors.get(order[head], ()):
+            in_degree[successor_id] -= 1
+            if in_degree[successor_id] == 0:
+                order.append(successor_id)
+        head += 1
+
+    return order[1:]
+
+
+def roll_up_tasks(project: Project, task_ids: Iterable[int], moved: List[Activity] = ()) -> List[Task]:
+    """
+    Returns tasks that their dates changed by dates of their activities, with new dates (not saved).
+    Dates of `moved` activities are taken from them instead of database.
+    """
+    project_end_date = day_start(project.planned_end_date)
+
+    rows = Activity.objects.filter(task_id__in=task_ids).exclude(id__in=[activity.id for activity in moved])\
+        .values('task_id').annotate(start=Min('planned_start_date'), end=Max('planned_end_date'))\
+        .values_list('task_id', 'start', 'end')
+    rows = list(rows) + [(activity.task_id, activity.planned_start_date, activity.planned_end_date)
+                         for activity in moved]
+
+    new_dates = {}
+    for task_id, start, end in rows:
+        end = min(project_end_date, end)
+        if task_id in new_dates:
+            task_start, task_end = new_dates[task_id]
+            start, end = min(start, task_start), max(end, task_end)
+        new_dates[task_id] = (start, end)
+
+    return [
+        Task(id=task_id, project_id=project.id, planned_start_date=new_dates[task_id][0],
+             planned_end_date=new_dates[task_id][1])
+        for task_id, start, end in Task.objects.filter(id__in=new_dates.keys())
+        .values_list('id', 'planned_start_date', 'planned_end_date')
+        if new_dates[task_id] != (start, end)
+    ]
+
+
+def reschedule_successors(project: Project, activity: Activity) -> Tuple[List[int], List[int]]:
+    """
+    Moves activities after the activity to the earliest dates that their predecessors allow (like `schedule()`),
+    and rolls up dates of affected tasks. The activity itself is not moved.
+
+    Successors are walked level by level (a query per level), then links to the downstream activities
+    and dates of them and their direct predecessors are loaded, so it's proportional to the change,
+    not to the project. It returns ids of changed tasks and activities.
+    """
+    successors = defaultdict(list)
+    visited = {activity.id}
+    frontier = [activity.id]
+    while frontier:
+        next_frontier = []
+        for predecessor_id, successor_id, _, _ in links_from(project.id, frontier):
+            successors[predecessor_id].append(successor_id)
+            if successor_id not in visited:
+                visited.add(successor_id)
+                next_frontier.append(successor_id)
+        frontier = next_frontier
+
+    order = _downstream(successors, activity.id)
+
+    predecessors = defaultdict(list)
+    for predecessor_id, successor_id, link_type, lag in links_to(order):
+        predecessors[successor_id].append((predecessor_id, LINK_ENDS[link_type], lag))
+
+    needed = set(order)
+    for node in order:
+        needed.update(predecessor_id for predecessor_id, _, _ in predecessors[node])
+    needed.discard(activity.id)
+
+    dates = {activity.id: (activity.task_id, activity.planned_start_date, activity.planned_end_date)}
+    rows = Activity.objects.filter(id__in=needed).values_list('id', 'task_id', 'planned_start_date', 'planned_end_date')
+    dates.update((activity_id, (task_id, start, end)) for activity_id, task_id, start, end in rows)
+
+    project_start = day_start(project.planned_start_date)
+    activities = []
+    for node in order:
+        task_id, old_start, old_end = dates[node]
+        duration = old_end - old_start
+
+        start = project_start
+        for predecessor_id, (from_finish, to_finish), lag in predecessors[node]:
+            _, predecessor_start, predecessor_end = dates[predecessor_id]
+            bound = (predecessor_end if from_finish else predecessor_start) + lag
+            if to_finish:
+                bound -= duration
+            if start < bound:
+                start = bound
+
+        if start != old_start:
+            dates[node] = (task_id, start, start + duration)
+            activities.append(Activity(id=node, task_id=task_id, planned_start_date=start,
+                                       planned_end_date=start + duration))
+
+    tasks = roll_up_tasks(project, {activity.task_id}.union(moved.task_id for moved in activities), activities)
+    return save_dates(project, tasks, activities)
@@ -1,10 +1,15 @@
 import datetime
+import decimal
 from collections import defaultdict
+from itertools import islice
 from logging import Logger
-from typing import List, Callable
+from typing import List, Callable, Optional, Iterable, Dict, Iterator
 
+from django.core.files.storage import default_storage
 from django.db import transaction
-from django.db.models import Q, F, QuerySet
+from django.db.models import F, QuerySet, Prefetch
+from django.utils import timezone
+from django.utils.duration import duration_string
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
@@ -16,8 +21,10 @@ from rest_framework.utils import html
 from rest_framework.validators import UniqueTogetherValidator
 
 from chat.consumers import send_comment_to_channel
+from gantt.access import visible_project_ids, managed_project_ids
+from gantt.dependencies import find_cycle, NO_LAG
 from gantt.models import Team, Role, TeamMember, Project, Task, \
-    Activity, Assigned, State, Comment
+    Activity, Assigned, State, Comment, Dependency, Tombstone
 from user.models import User
 from user.serializers import UserSearchSerializer
 
@@ -48,7 +55,7 @@ class StateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = State
-        fields = '__all__'
+        exclude = ('updated_at',)  # see `ProjectChangesSerializer`
 
 
 class StateUpdateSerializer(StateSerializer):
@@ -57,7 +64,7 @@ class StateUpdateSerializer(StateSerializer):
 
     class Meta:
         model = State
-        fields = '__all__'
+        exclude = ('updated_at',)  # see `ProjectChangesSerializer`
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -73,10 +80,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
     author = serializers.PrimaryKeyRelatedField(read_only=True)
     activity = FilteredRelatedField(
-        lambda user: Activity.objects.filter(
-            Q(task__project__project_manager=user) |
-            Q(task__project__team__teammember__user=user)
-        ).distinct()
+        lambda user: Activity.objects.filter(project_id__in=visible_project_ids(user))
     )
 
     def create(self, validated_data):
@@ -85,7 +89,7 @@ class CommentSerializer(serializers.ModelSerializer):
         comment.save()
 
         data = CommentVerboseSerializer(comment, read_only=True).data
-        send_comment_to_channel(comment.id, data)
+        send_comment_to_channel(comment.activity_id, data)
 
         return comment
 
@@ -106,6 +110,7 @@ class CommentVerboseSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ('id', 'author', 'activity', 'created_at', 'updated_at', 'text')
         read_only_fields = fields
+        select_related = ('author',)
 
 
 class TeamSerializer(serializers.ModelSerializer):
@@ -181,6 +186,7 @@ class VerboseTeamMemberSerializer(serializers.ModelSerializer):
         model = TeamMember
         fields = ('id', 'team', 'role', 'user')
         read_only_fields = fields
+        select_related = ('team', 'role', 'user')
 
 
 # - - - -- - - - - - -- - - - -- - --- - -  - -- - -- - - -- - - --
@@ -258,7 +264,7 @@ class TaskSerializer(CheckDatesMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Task
-        fields = '__all__'
+        exclude = ('updated_at',)  # see `ProjectChangesSerializer`
 
 
 class TaskUpdateSerializer(TaskSerializer):
@@ -346,7 +352,7 @@ class AssignedListSerializer(serializers.ListSerializer):
 
 class Aau(serializers.PrimaryKeyRelatedField):
     def get_queryset(self):
-        return Activity.objects.filter(task__project__project_manager=self.context['request'].user)
+        return Activity.objects.filter(project_id__in=managed_project_ids(self.context['request']))
 
 
 class AssignedSerializer(serializers.ModelSerializer):
@@ -403,6 +409,18 @@ class VerboseAssignedSerializer(serializers.ModelSerializer):
         model = Assigned
         fields = ('id', 'user', 'activity')
         read_only_fields = fields
+        select_related = ('user',)
+
+
+class DependencySerializer(serializers.ModelSerializer):
+    """A link to a predecessor of an activity, it's written as an item of `predecessors` of `ActivitySerializer`."""
+    predecessor = FilteredRelatedField(
+        lambda user: Activity.objects.filter(project_id__in=visible_project_ids(user))
+    )
+
+    class Meta:
+        model = Dependency
+        fields = ['predecessor', 'type', 'lag']
 
 
 class VerboseActivity(serializers.ModelSerializer):
@@ -412,6 +430,7 @@ class VerboseActivity(serializers.ModelSerializer):
     """
     state = serializers.SerializerMethodField()
     assignees = serializers.SerializerMethodField(source='assigned_set')
+    predecessors = DependencySerializer(many=True, read_only=True, source='predecessor_links')
 
     @swagger_serializer_method(serializer_or_field=StateSerializer)
     def get_state(self, obj: Activity) -> StateSerializer:
@@ -426,8 +445,11 @@ class VerboseActivity(serializers.ModelSerializer):
         model = Activity
         fields = ['id', 'name', 'task', 'description', 'planned_start_date', 'planned_end_date',
                   'planned_budget', 'actual_start_date', 'actual_end_date', 'actual_budget', 'dependency', 'state',
-                  'assignees'
+                  'assignees', 'predecessors'
                   ]
+        select_related = ('state',)
+        prefetch_related = (Prefetch('assigned_set', queryset=Assigned.objects.select_related('user')),
+                            'predecessor_links')
 
 
 class ActivitySerializer(CheckDatesMixin, serializers.ModelSerializer):
@@ -437,6 +459,9 @@ class ActivitySerializer(CheckDatesMixin, serializers.ModelSerializer):
     The `task` field is readonly when updating.
 
     When the user modify the assignees, it creates or deletes `Assigned` objects according to user ids.
+
+    `predecessors` are links with type and lag (see `Dependency`), they are replaced by the given list.
+    `dependency` is a finish-to-start link without lag, which is kept for old clients.
     """
 
     class DependencyRK(serializers.PrimaryKeyRelatedField):
@@ -446,56 +471,113 @@ class ActivitySerializer(CheckDatesMixin, serializers.ModelSerializer):
             instance_id = instance if instance is None else instance.id
 
             return Activity.objects.filter(
-                Q(task__project__project_manager=user) |
-                Q(task__project__team__teammember__user=user)
-            ).only('id', 'name').exclude(id=instance_id).distinct()
+                project_id__in=visible_project_ids(user)
+            ).only('id', 'name').exclude(id=instance_id)
 
-    task = FilteredRelatedField(lambda user: Task.objects.filter(
-        Q(project__project_manager=user) |
-        Q(project__team__teammember__user=user)).distinct())
+    task = FilteredRelatedField(lambda user: Task.objects.filter(project_id__in=visible_project_ids(user)))
 
-    state = FilteredRelatedField(lambda user: State.objects.filter(
-        Q(project__team__teammember__user=user) |
-        Q(project__project_manager=user)
-    ).distinct(), required=False, allow_null=True)
+    state = FilteredRelatedField(lambda user: State.objects.filter(project_id__in=visible_project_ids(user)),
+                                 required=False, allow_null=True)
 
     dependency = DependencyRK(required=False, allow_null=True)
 
     assignees = AssignedUpdateSerializer(required=False, many=True, source='assigned_set')
 
+    predecessors = DependencySerializer(required=False, many=True, source='predecessor_links')
+
     def validate(self, attrs: dict):
 
         if attrs:
             instance = self.instance
-            task_project_id = attrs['task'].project.id if attrs.get('task') else instance.task.project.id
+            task_project_id = attrs['task'].project_id if attrs.get('task') else instance.project_id
             state_project_id = None
             dependency_project_id = None
 
             if instance:
                 if instance.state:
-                    state_project_id = instance.state.project.id
+                    state_project_id = instance.state.project_id
 
                 if instance.dependency:
-                    dependency_project_id = instance.dependency.task.project.id
+                    dependency_project_id = instance.dependency.project_id
 
-            state_project_id = attrs['state'].project.id if attrs.get('state') else state_project_id
-            dependency_project_id = attrs['dependency'].task.project.id if attrs.get('dependency')\
+            state_project_id = attrs['state'].project_id if attrs.get('state') else state_project_id
+            dependency_project_id = attrs['dependency'].project_id if attrs.get('dependency')\
                                     else dependency_project_id
 
             if (task_project_id == state_project_id or state_project_id is None) \
                     and (task_project_id == dependency_project_id or dependency_project_id is None):
+                self.check_predecessors(task_project_id, attrs)
+                self.check_acyclic(task_project_id, attrs)
                 return super().validate(attrs)
 
         raise serializers.ValidationError('projects not match.')
 
+    def check_predecessors(self, project_id: int, attrs: dict):
+        links = attrs.get('predecessor_links')
+        if links is None:
+            return
+
+        predecessor_ids = [link['predecessor'].id for link in links]
+        if len(set(predecessor_ids)) != len(predecessor_ids):
+            raise serializers.ValidationError({'predecessors': ['predecessors are repeated.']})
+
+        if self.instance is not None and self.instance.id in predecessor_ids:
+            raise serializers.ValidationError({'predecessors': ['activity can not be its own predecessor.']})
+
+        if any(link['predecessor'].project_id != project_id for link in links):
+            raise serializers.ValidationError('projects not match.')
+
+    def check_acyclic(self, project_id: int, attrs: dict):
+        """Rejects a dependency or predecessor that is a successor of the activity, e.g. A -> B -> A."""
+        dependency_ids = [link['predecessor'].id for link in attrs.get('predecessor_links', ())]
+        if attrs.get('dependency') is not None:
+            dependency_ids.append(attrs['dependency'].id)
+
+        if self.instance is None or not dependency_ids:
+            return
+
+        cycle = find_cycle(project_id, self.instance.id, dependency_ids)
+        if cycle:
+            raise serializers.ValidationError({
+                'dependency': [f'dependency makes a cycle: {" -> ".join(map(str, cycle + cycle[:1]))}.']
+            })
+
     def __init__(self, *args, **kwargs):
         """If object is being updated don't allow to be changed."""
         super().__init__(*args, **kwargs)
         if self.instance is not None:
             self.fields.get('task').read_only = True
 
+    @staticmethod
+    def set_predecessors(activity: Activity, links: List[dict]):
+        """Replaces links to predecessors of the activity, only changed links are written."""
+        old_links = {link.predecessor_id: link for link in Dependency.objects.filter(successor_id=activity.id)}
+        new_links = {
+            link['predecessor'].id: (link.get('type', Dependency.FINISH_TO_START), link.get('lag', NO_LAG))
+            for link in links
+        }
+
+        created = []
+        changed = []
+        for predecessor_id, (link_type, lag) in new_links.items():
+            link = old_links.get(predecessor_id)
+            if link is None:
+                created.append(Dependency(successor_id=activity.id, predecessor_id=predecessor_id,
+                                          type=link_type, lag=lag))
+            elif (link.type, link.lag) != (link_type, lag):
+                link.type, link.lag = link_type, lag
+                changed.append(link)
+
+        removed = old_links.keys() - new_links.keys()
+        if removed:
+            Dependency.objects.filter(successor_id=activity.id, predecessor_id__in=removed).delete()
+        Dependency.objects.bulk_create(created)
+        if changed:
+            Dependency.objects.bulk_update(changed, ['type', 'lag'])
+
     def update(self, instance, validated_data):
         assigned_set = validated_data.pop('assigned_set', None)
+        predecessor_links = validated_data.pop('predecessor_links', None)
 
         if assigned_set is not None:
 
@@ -508,28 +590,39 @@ class ActivitySerializer(CheckDatesMixin, serializers.ModelSerializer):
             assigned_users_for_delete = activity_assignees - input_user_ids
             new_assigned_users = input_user_ids - activity_assignees
 
-            new_assigned = [Assigned(user_id=user_id, activity_id=instance.id) for user_id in new_assigned_users]
+            new_assigned = [Assigned(user_id=user_id, activity_id=instance.id, project_id=instance.project_id)
+                            for user_id in new_assigned_users]
 
             try:
                 with transaction.atomic():
-                    Assigned.objects.filter(user_id__in=assigned_users_for_delete).delete()
+                    Assigned.objects.filter(activity_id=instance.id, user_id__in=assigned_users_for_delete).delete()
                     Assigned.objects.bulk_create(new_assigned)
             except Exception as e:
                 logger.error(e)
                 raise ValidationError
 
+        if predecessor_links is not None:
+            with transaction.atomic():
+                self.set_predecessors(instance, predecessor_links)
+                return super().update(instance, validated_data)
+
         return super().update(instance, validated_data)
 
     def create(self, validated_data):
         assigned_set = validated_data.pop('assigned_set', None)
+        predecessor_links = validated_data.pop('predecessor_links', None)
 
-        activity = super(ActivitySerializer, self).create(validated_data)
+        with transaction.atomic():
+            activity = super(ActivitySerializer, self).create(validated_data)
+            if predecessor_links:
+                self.set_predecessors(activity, predecessor_links)
 
         if assigned_set is None:
             return activity
 
         input_user_ids = {pk['user'].id for pk in assigned_set}
-        new_assigned = [Assigned(user_id=user_id, activity_id=activity.id) for user_id in input_user_ids]
+        new_assigned = [Assigned(user_id=user_id, activity_id=activity.id, project_id=activity.project_id)
+                        for user_id in input_user_ids]
 
         Assigned.objects.bulk_create(new_assigned)
 
@@ -539,8 +632,9 @@ class ActivitySerializer(CheckDatesMixin, serializers.ModelSerializer):
         model = Activity
         fields = ['id', 'name', 'task', 'description', 'planned_start_date', 'planned_end_date',
                   'planned_budget', 'actual_start_date', 'actual_end_date', 'actual_budget', 'dependency', 'state',
-                  'assignees'
+                  'assignees', 'predecessors'
                   ]
+        prefetch_related = ('assigned_set', 'predecessor_links')
 
 
 class ActivityUpdateSerializer(ActivitySerializer):
@@ -554,15 +648,18 @@ class AssignedToMeSerializer(serializers.ModelSerializer):
     project_id = serializers.SerializerMethodField()
 
     def get_project(self, obj) -> str:
-        return obj.task.project.name
+        return obj.project.name
 
     def get_project_id(self, obj) -> int:
-        return obj.task.project_id
+        return obj.project_id
 
     class Meta:
         model = Activity
         fields = ['id', 'name', 'task', 'planned_end_date',
                   'actual_start_date', 'dependency', 'state', 'project', 'project_id']
+        select_related = ('project',)
+        only = ('id', 'name', 'task', 'planned_end_date', 'actual_start_date', 'dependency', 'state',
+                'project__name')
 
 
 class TaskWithActivitiesSerializer(serializers.ModelSerializer):
@@ -595,44 +692,286 @@ class ProjectWithRelatedSerializer(serializers.ModelSerializer):
         return TaskWithActivitiesSerializer(tasks, many=True, read_only=True).data
 
 
+def _datetime_to_str(value: Optional[datetime.datetime], tz) -> Optional[str]:
+    """Same as `serializers.DateTimeField().to_representation()` with ISO 8601 format."""
+    if value is None:
+        return None
+
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _date_to_str(value: Optional[datetime.date]) -> Optional[str]:
+    return None if value is None else value.isoformat()
+
+
+_CENTS = decimal.Decimal('0.01')
+_BUDGET_CONTEXT = decimal.Context(prec=8)  # `max_digits` of budgets
+
+
+def _budget_to_str(value: Optional[decimal.Decimal]) -> Optional[str]:
+    """Same as `serializers.DecimalField(max_digits=8, decimal_places=2).to_representation()`."""
+    if value is None:
+        return None
+    return '{:f}'.format(value.quantize(_CENTS, context=_BUDGET_CONTEXT))
+
+
 class ProjectSimpleVerboseSerializer:
-    def __init__(self, instance: Project):
-        self.instance = instance
-
-    def _get_activity(self, activity: Activity):
-        data: dict = {
-            'id': activity.id, 'name': activity.name, 'task': activity.task_id, 'description': activity.description,
-            'planned_start_date': activity.planned_start_date, 'planned_end_date': activity.planned_end_date,
-            'planned_budget': activity.planned_budget, 'actual_start_date': activity.actual_start_date,
-            'actual_end_date': activity.actual_end_date, 'actual_budget': activity.actual_budget,
-            'dependency': activity.dependency_id, 'state': activity.state_id
-        }
-        return data
+    """
+    A fast readonly equivalent of `ProjectWithRelatedSerializer`, which `GetAll` uses.
+    It builds dicts from `.values()` rows with one query per model, instead of nested serializers per row.
 
-    def _get_task(self, task: Task):
-        data = {
-            'id': task.id, 'name': task.name, 'planned_start_date': task.planned_start_date,
-            'planned_end_date': task.planned_end_date, 'actual_start_date': task.actual_start_date,
-            'actual_end_date': task.actual_end_date, 'description': task.description,
-            'planned_budget': task.planned_budget, 'actual_budget': task.actual_budget,
-            'activities': [self._get_activity(activity) for activity in task.activity_set.all()]
+    Only activities in `activity_ids` are included. Its output must be the same as `ProjectWithRelatedSerializer`,
+    which is checked in tests.
+    """
+    project_fields = ('id', 'name', 'planned_start_date', 'planned_end_date', 'actual_start_date', 'actual_end_date',
+                      'description')
+    task_fields = ('id', 'name', 'planned_start_date', 'planned_end_date', 'actual_start_date', 'actual_end_date',
+                   'description', 'planned_budget', 'actual_budget')
+    activity_fields = ('id', 'name', 'task_id', 'description', 'planned_start_date', 'planned_end_date',
+                       'planned_budget', 'actual_start_date', 'actual_end_date', 'actual_budget', 'dependency_id',
+                       'state_id')
+    assigned_fields = ('id', 'activity_id', 'user_id', 'user__username', 'user__first_name', 'user__last_name',
+                       'user__avatar')
+
+    def __init__(self, project_id: int, activity_ids: Iterable[int]):
+        self.project_id = project_id
+        self.activity_ids = activity_ids
+        self.tz = timezone.get_current_timezone()
+
+    @property
+    def data(self) -> Optional[dict]:
+        return self.get_data()
+
+    @staticmethod
+    def _get_states(state_ids) -> dict:
+        return {
+            state_id: {'id': state_id, 'project': project_id, 'name': name}
+            for state_id, name, project_id in State.objects.filter(id__in=state_ids).values_list('id', 'name', 'project_id')
         }
+
+    def _assignees_data(self, assigned: QuerySet) -> list:
+        avatars = {}
+        data = []
+        for assigned_id, activity_id, user_id, username, first_name, last_name, avatar in \
+                assigned.order_by('id').values_list(*self.assigned_fields):
+            if avatar and avatar not in avatars:
+                avatars[avatar] = default_storage.url(avatar)
+
+            data.append({
+                'id': assigned_id,
+                'user': {'id': user_id, 'username': username, 'first_name': first_name, 'last_name': last_name,
+                         'avatar': avatars[avatar] if avatar else None},
+                'activity': activity_id
+            })
         return data
 
-    def _get_user(self):
-        pass
+    def _get_assignees(self, activity_ids) -> Dict[int, list]:
+        assignees = defaultdict(list)
+        for assigned in self._assignees_data(Assigned.objects.filter(activity_id__in=activity_ids)):
+            assignees[assigned['activity']].append(assigned)
+        return assignees
+
+    def _get_predecessors(self, activity_ids) -> Dict[int, list]:
+        predecessors = defaultdict(list)
+        rows = Dependency.objects.filter(successor_id__in=activity_ids).order_by('id')\
+            .values_list('successor_id', 'predecessor_id', 'type', 'lag')
+        for successor_id, predecessor_id, link_type, lag in rows:
+            predecessors[successor_id].append({'predecessor': predecessor_id, 'type': link_type,
+                                               'lag': duration_string(lag)})
+        return predecessors
+
+    def _get_activities(self, task_ids: Optional[Iterable[int]] = None) -> Dict[int, list]:
+        """Returns `task id -> activities`, only of tasks in `task_ids` if it's given."""
+        activities = Activity.objects.filter(id__in=self.activity_ids)
+        if task_ids is not None:
+            activities = activities.filter(task_id__in=task_ids)
+
+        activities_of_tasks = defaultdict(list)
+        for activity in self._activities_data(activities):
+            activities_of_tasks[activity['task']].append(activity)
+        return activities_of_tasks
+
+    def _activities_data(self, activities: QuerySet) -> list:
+        """Returns activities with their states, assignees and predecessors."""
+        tz = self.tz
+        rows = list(activities.order_by('id').values_list(*self.activity_fields))
+        activity_ids = [row[0] for row in rows]
+
+        states = self._get_states({row[-1] for row in rows if row[-1]})
+        assignees = self._get_assignees(activity_ids)
+        predecessors = self._get_predecessors(activity_ids)
+
+        return [
+            {
+                'id': activity_id,
+                'name': name,
+                'task': task_id,
+                'description': description,
+                'planned_start_date': _datetime_to_str(planned_start_date, tz),
+                'planned_end_date': _datetime_to_str(planned_end_date, tz),
+                'planned_budget': _budget_to_str(planned_budget),
+                'actual_start_date': _datetime_to_str(actual_start_date, tz),
+                'actual_end_date': _datetime_to_str(actual_end_date, tz),
+                'actual_budget': _budget_to_str(actual_budget),
+                'dependency': dependency_id,
+                # `VerboseActivity.get_state()` gives data of an empty `StateSerializer` if there is no state
+                'state': states[state_id] if state_id else {'project': None, 'name': ''},
+                'assignees': assignees.get(activity_id, []),
+                'predecessors': predecessors.get(activity_id, []),
+            }
+            for (activity_id, name, task_id, description, planned_start_date, planned_end_date, planned_budget,
+                 actual_start_date, actual_end_date, actual_budget, dependency_id, state_id) in rows
+        ]
+
+    def _get_tasks(self, rows: List[tuple], task_ids: Optional[List[int]] = None) -> list:
+        activities = self._get_activities(task_ids)
+        tasks = self._tasks_data(rows)
+        for task in tasks:
+            task['activities'] = activities.get(task['id'], [])
+        return tasks
+
+    def _tasks_data(self, rows: Iterable[tuple]) -> list:
+        tz = self.tz
+        return [
+            {
+                'id': task_id,
+                'name': name,
+                'planned_start_date': _datetime_to_str(planned_start_date, tz),
+                'planned_end_date': _datetime_to_str(planned_end_date, tz),
+                'actual_start_date': _datetime_to_str(actual_start_date, tz),
+                'actual_end_date': _datetime_to_str(actual_end_date, tz),
+                'description': description,
+                'planned_budget': _budget_to_str(planned_budget),
+                'actual_budget': _budget_to_str(actual_budget),
+            }
+            for (task_id, name, planned_start_date, planned_end_date, actual_start_date, actual_end_date,
+                 description, planned_budget, actual_budget) in rows
+        ]
+
+    def _task_rows(self) -> QuerySet:
+        return Task.objects.filter(project_id=self.project_id).order_by('id').values_list(*self.task_fields)
+
+    def get_project(self) -> Optional[dict]:
+        """Returns the project without `tasks`, or None if it doesn't exist."""
+        project = Project.objects.filter(id=self.project_id).values(*self.project_fields).first()
+        if project is None:
+            return None
+
+        project['planned_start_date'] = _date_to_str(project['planned_start_date'])
+        project['planned_end_date'] = _date_to_str(project['planned_end_date'])
+        project['actual_start_date'] = _date_to_str(project['actual_start_date'])
+        project['actual_end_date'] = _date_to_str(project['actual_end_date'])
+        return project
 
-    def get_data(self):
-        project = self.instance
-        data = {
-            'id': project.id,
-            'name': project.name,
-            'project_manager': project.project_manager_id,
-            'planned_start_date': project.planned_start_date,
-            'planned_end_date': project.planned_end_date,
-            'actual_start_date': project.actual_start_date,
-            'actual_end_date': project.actual_end_date,
-            'description': project.description,
-            'tasks': [self._get_task(task) for task in project.task_set.all()]
+    def get_data(self) -> Optional[dict]:
+        """Returns None if the project doesn't exist."""
+        project = self.get_project()
+        if project is not None:
+            project['tasks'] = self._get_tasks(list(self._task_rows()))
+        return project
+
+    def iter_tasks(self, chunk_size: int) -> Iterator[list]:
+        """Yields `tasks` of the data in lists of at most `chunk_size` tasks, which are loaded one chunk at a time."""
+        rows = self._task_rows().iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            yield self._get_tasks(chunk, [row[0] for row in chunk])
+
+
+class ProjectChangesSerializer(ProjectSimpleVerboseSerializer):
+    """
+    Objects of a project that are changed since `since`, see `gantt.changes`. Tasks (without activities),
+    activities, assignees and states are in the same format as `GetAll`, and `deleted` is ids of deleted ones.
+    Every query uses an index of (project, time), so it's not slower for larger projects.
+    """
+
+    def __init__(self, project_id: int, since: datetime.datetime):
+        super().__init__(project_id, ())
+        self.since = since
+
+    def get_data(self) -> dict:
+        project_id, since = self.project_id, self.since
+        deleted = {obj_type: [] for obj_type, _ in Tombstone.TYPES}
+        for obj_type, object_id in Tombstone.objects.filter(project_id=project_id, deleted_at__gte=since) \
+                .order_by('id').values_list('type', 'object_id'):
+            deleted[obj_type].append(object_id)
+
+        return {
+            'tasks': self._tasks_data(Task.objects.filter(project_id=project_id, updated_at__gte=since)
+                                      .order_by('id').values_list(*self.task_fields)),
+            'activities': self._activities_data(Activity.objects.filter(project_id=project_id,
+                                                                        updated_at__gte=since)),
+            'assignees': self._assignees_data(Assigned.objects.filter(project_id=project_id, updated_at__gte=since)),
+            'states': list(self._get_states(State.objects.filter(project_id=project_id, updated_at__gte=since)
+                                            .values('id')).values()),
+            'deleted': deleted,
         }
-        return data
+
+
+class ScheduledActivitySerializer(serializers.Serializer):
+    """A readonly serializer of an activity scheduled by critical path method."""
+    id = serializers.IntegerField()
+    task = serializers.IntegerField()
+    early_start = serializers.DateTimeField()
+    early_finish = serializers.DateTimeField()
+    late_start = serializers.DateTimeField()
+    late_finish = serializers.DateTimeField()
+    total_float = serializers.DurationField()
+    critical = serializers.BooleanField()
+
+
+class CriticalPathSerializer(serializers.Serializer):
+    """A readonly serializer. `critical_path` is ids of activities without float in order of dependencies."""
+    project = serializers.IntegerField()
+    finish = serializers.DateTimeField()
+    activities = ScheduledActivitySerializer(many=True)
+    critical_path = serializers.ListField(child=serializers.IntegerField())
+
+
+class JobSerializer(serializers.Serializer):
+    """Status of a background job, `result` is set when it's done or failed."""
+    id = serializers.CharField()
+    name = serializers.CharField()
+    status = serializers.ChoiceField(choices=['queued', 'running', 'done', 'failed'])
+    progress = serializers.IntegerField()
+    result = serializers.JSONField(allow_null=True)
+
+
+class ChangeSerializer(serializers.Serializer):
+    """An event of the change log of a project, the same as a message of the "changes" channel with its `seq`."""
+    seq = serializers.IntegerField()
+    event = serializers.ChoiceField(choices=['added', 'updated', 'deleted'])
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    parent = serializers.IntegerField()
+
+
+class ChangeLogSerializer(serializers.Serializer):
+    """A readonly serializer. `last` is seq of the last event of the log."""
+    last = serializers.IntegerField()
+    events = ChangeSerializer(many=True)
+
+
+class ChangedTaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Task
+        fields = ProjectSimpleVerboseSerializer.task_fields
+
+
+class DeletedSerializer(serializers.Serializer):
+    task = serializers.ListField(child=serializers.IntegerField())
+    activity = serializers.ListField(child=serializers.IntegerField())
+    assigned = serializers.ListField(child=serializers.IntegerField())
+    state = serializers.ListField(child=serializers.IntegerField())
+
+
+class ProjectChangesResponseSerializer(serializers.Serializer):
+    """A readonly serializer of output of `ProjectChangesSerializer` and its `version`."""
+    version = serializers.IntegerField()
+    tasks = ChangedTaskSerializer(many=True)
+    activities = VerboseActivity(many=True)
+    assignees = VerboseAssignedSerializer(many=True)
+    states = StateSerializer(many=True)
+    deleted = DeletedSerializer()
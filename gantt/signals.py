@@ -1,78 +1,209 @@
 from logging import getLogger
 
-from django.core.cache import cache
-from django.db.models.signals import post_delete, post_save
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save, pre_delete
 from django.dispatch import receiver
-from .models import Project, Activity, Task, State, Assigned
+from user.models import User
+from .access import sync_project_access, forget_project
+from .changes import record_deleted, touch_activities
+from .invalidation import invalidate_projects, invalidate_instances, remember, project_ids_of
+from .models import Project, Activity, Task, State, Assigned, Team, TeamMember, Dependency, Tombstone, \
+    post_bulk_save
 from .notifier import notify
-from .views import GetAll
 
 logger = getLogger(__name__)
-cache_str = GetAll.cache_pre_key
 
-del GetAll
 
+def _deleted_by(origin):
+    """Returns model of the object (or queryset) that `delete()` called on it."""
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return type(origin)
 
-def delete_cache(activity_id):
-    pid = Project.objects.filter(task__activity__id=activity_id).values_list('id', flat=True)[:1]
-    if pid:
-        project_id = pid[0]
-        cache_key = cache_str.format(project_id)
-        r = cache.delete(cache_key)
-        if r:
-            logger.info(f'cache "{cache_key}" deleted.')
+
+def _project_id(instance):
+    """Returns id of the project of an instance that doesn't have `project_id`, it's usually remembered."""
+    return next(iter(project_ids_of([instance])), None)
+
+
+def _origin_project_id(origin):
+    """Returns id of the project of an object that `delete()` called on it, or None for a queryset."""
+    if isinstance(origin, Project):
+        return origin.id
+    if isinstance(origin, (Task, Activity)):
+        return origin.project_id
+    return None
+
+
+@receiver(post_bulk_save, sender=Task, dispatch_uid='task_bulk_saved')
+@receiver(post_bulk_save, sender=Activity, dispatch_uid='activity_bulk_saved')
+@receiver(post_bulk_save, sender=Assigned, dispatch_uid='assigned_bulk_saved')
+@receiver(post_bulk_save, sender=State, dispatch_uid='state_bulk_saved')
+@receiver(post_bulk_save, sender=Dependency, dispatch_uid='dependency_bulk_saved')
+def bulk_save_handler(instances, **kwargs):
+    invalidate_instances(instances)
+
+
+@receiver(post_bulk_save, sender=Dependency, dispatch_uid='dependency_bulk_saved_changes')
+def dependency_bulk_save_changes_handler(instances, **kwargs):
+    touch_activities(instance.successor_id for instance in instances)
 
 
 @receiver(post_delete, sender=Activity, dispatch_uid='activity_deleted')
-def activity_post_delete_handler(instance: Activity, **kwargs):
-    delete_cache(instance.id)
+def activity_post_delete_handler(instance: Activity, origin=None, **kwargs):
+    if _deleted_by(origin) not in (Task, Project):
+        invalidate_instances([instance])
+        record_deleted(Tombstone.ACTIVITY, instance.id, instance.project_id)
 
-    notify("deleted", "activity", instance.id, instance.task_id)
+    notify("deleted", "activity", instance.id, instance.task_id, instance.project_id)
 
 
 @receiver(post_save, sender=Activity, dispatch_uid='activity_updated')
 def activity_post_save_handler(instance: Activity, created, **kwargs):
-    if created:
-        delete_cache(instance.id)
+    invalidate_instances([instance])
 
-    notify("added" if created else "updated", "activity", instance.id, instance.task_id)
+    notify("added" if created else "updated", "activity", instance.id, instance.task_id, instance.project_id)
 
 
 @receiver(post_delete, sender=Task, dispatch_uid='task_deleted')
-def task_post_delete_handler(instance: Task, **kwargs):
-    notify("deleted", "task", instance.id, instance.project_id)
+def task_post_delete_handler(instance: Task, origin=None, **kwargs):
+    if _deleted_by(origin) is not Project:
+        invalidate_projects([instance.project_id])
+        record_deleted(Tombstone.TASK, instance.id, instance.project_id)
+
+    notify("deleted", "task", instance.id, instance.project_id, instance.project_id)
 
 
 @receiver(post_save, sender=Task, dispatch_uid='task_updated')
 def task_post_save_handler(instance: Task, created, **kwargs):
-    notify("added" if created else "updated", "task", instance.id, instance.project_id)
+    remember('task', instance.id, instance.project_id)
+    invalidate_projects([instance.project_id])
+
+    notify("added" if created else "updated", "task", instance.id, instance.project_id, instance.project_id)
 
 
 @receiver(post_delete, sender=Project, dispatch_uid='project_deleted')
 def project_post_delete_handler(instance: Project, **kwargs):
-    notify("deleted", "project", instance.id, instance.project_manager_id)
+    notify("deleted", "project", instance.id, instance.project_manager_id, instance.id)
 
 
 @receiver(post_save, sender=Project, dispatch_uid='project_updated')
 def project_post_save_handler(instance: Project, created, **kwargs):
-    notify("added" if created else "updated", "project", instance.id, instance.project_manager_id)
+    invalidate_projects([instance.id])
+    notify("added" if created else "updated", "project", instance.id, instance.project_manager_id, instance.id)
+
+
+def _team_project_id(team_id):
+    return Team.objects.filter(id=team_id).values_list('project_id', flat=True).first()
+
+
+@receiver(pre_delete, sender=Project, dispatch_uid='project_access_forget')
+def project_pre_delete_access_handler(instance: Project, **kwargs):
+    forget_project(instance.id)
+
+
+@receiver(post_save, sender=Project, dispatch_uid='project_access_sync')
+def project_post_save_access_handler(instance: Project, **kwargs):
+    sync_project_access(instance.id)
+
+
+@receiver(pre_save, sender=Team, dispatch_uid='team_pre_save')
+def team_pre_save_handler(instance: Team, **kwargs):
+    instance._old_project_id = Team.objects.filter(id=instance.id).values_list('project_id', flat=True).first() \
+        if instance.id else None
+
+
+@receiver(post_save, sender=Team, dispatch_uid='team_updated')
+def team_post_save_handler(instance: Team, created, **kwargs):
+    old_project_id = getattr(instance, '_old_project_id', None)
+    if old_project_id and old_project_id != instance.project_id:
+        sync_project_access(old_project_id)
+        sync_project_access(instance.project_id)
+
+
+@receiver(post_delete, sender=Team, dispatch_uid='team_deleted')
+def team_post_delete_handler(instance: Team, origin=None, **kwargs):
+    if _deleted_by(origin) in (Project, User):
+        return  # access rows of the project are being deleted too
+
+    sync_project_access(instance.project_id)
+
+
+@receiver(pre_save, sender=TeamMember, dispatch_uid='team_member_pre_save')
+def team_member_pre_save_handler(instance: TeamMember, **kwargs):
+    instance._old_team_id = TeamMember.objects.filter(id=instance.id).values_list('team_id', flat=True).first() \
+        if instance.id else None
+
+
+@receiver(post_save, sender=TeamMember, dispatch_uid='team_member_updated')
+def team_member_post_save_handler(instance: TeamMember, created, **kwargs):
+    project_id = _team_project_id(instance.team_id)
+    sync_project_access(project_id)
+
+    old_team_id = getattr(instance, '_old_team_id', None)
+    if old_team_id and old_team_id != instance.team_id:
+        old_project_id = _team_project_id(old_team_id)
+        if old_project_id != project_id:
+            sync_project_access(old_project_id)
+
+
+@receiver(post_delete, sender=TeamMember, dispatch_uid='team_member_deleted')
+def team_member_post_delete_handler(instance: TeamMember, origin=None, **kwargs):
+    if _deleted_by(origin) in (Project, Team, User):
+        return  # the handler of origin syncs the index
+
+    sync_project_access(_team_project_id(instance.team_id))
 
 
 @receiver(post_delete, sender=State, dispatch_uid='state_deleted')
-def state_post_delete_handler(instance: State, **kwargs):
-    notify("deleted", "state", instance.id, instance.project_id)
+def state_post_delete_handler(instance: State, origin=None, **kwargs):
+    if _deleted_by(origin) is not Project:
+        invalidate_projects([instance.project_id])
+        record_deleted(Tombstone.STATE, instance.id, instance.project_id)  # activities of it have no state now
+
+    notify("deleted", "state", instance.id, instance.project_id, instance.project_id)
 
 
 @receiver(post_save, sender=State, dispatch_uid='state_updated')
 def state_post_save_handler(instance: State, created, **kwargs):
-    notify("added" if created else "updated", "state", instance.id, instance.project_id)
+    invalidate_projects([instance.project_id])
+
+    notify("added" if created else "updated", "state", instance.id, instance.project_id, instance.project_id)
 
 
 @receiver(post_delete, sender=Assigned, dispatch_uid='assigned_deleted')
-def assigned_post_delete_handler(instance: Assigned, **kwargs):
-    notify("deleted", "assigned", instance.id, instance.activity_id)
+def assigned_post_delete_handler(instance: Assigned, origin=None, **kwargs):
+    if _deleted_by(origin) not in (Activity, Task, Project):
+        invalidate_instances([instance])
+        record_deleted(Tombstone.ASSIGNED, instance.id, instance.project_id)
+
+    notify("deleted", "assigned", instance.id, instance.activity_id, instance.project_id)
 
 
 @receiver(post_save, sender=Assigned, dispatch_uid='assigned_updated')
-def state_post_save_handler(instance: Assigned, created, **kwargs):
-    notify("added" if created else "updated", "assigned", instance.id, instance.activity_id)
+def assigned_post_save_handler(instance: Assigned, created, **kwargs):
+    invalidate_instances([instance])
+
+    notify("added" if created else "updated", "assigned", instance.id, instance.activity_id,
+           instance.project_id)
+
+
+@receiver(post_delete, sender=Dependency, dispatch_uid='dependency_deleted')
+def dependency_post_delete_handler(instance: Dependency, origin=None, **kwargs):
+    if _deleted_by(origin) not in (Activity, Task, Project):
+        invalidate_instances([instance])
+        touch_activities([instance.successor_id])
+
+    # rows of a cascade are in the project of origin, so they don't run a query each
+    project_id = _origin_project_id(origin)
+    notify("deleted", "dependency", instance.id, instance.successor_id,
+           project_id if project_id is not None else _project_id(instance))
+
+
+@receiver(post_save, sender=Dependency, dispatch_uid='dependency_updated')
+def dependency_post_save_handler(instance: Dependency, created, **kwargs):
+    invalidate_instances([instance])
+    touch_activities([instance.successor_id])
+
+    notify("added" if created else "updated", "dependency", instance.id, instance.successor_id,
+           _project_id(instance))
@@ -0,0 +1,64 @@
+"""
+Versioned, pre-rendered snapshots of `GetAll` responses.
+
+Each project has a version counter in cache. Receivers in `gantt.signals` bump it whenever
+anything in the output of `GetAll` changes, so an old snapshot is never served again
+and expires by itself.
+"""
+import time
+from typing import Optional, Callable
+
+from django.core.cache import cache
+
+from Toiler.cache import get_or_compute
+
+version_pre_key = 'project_version_{:d}'
+snapshot_pre_key = 'project_snapshot_{:d}_{:d}'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24  # seconds
+
+
+def _new_version() -> int:
+    # based on current time, so a version is not repeated after its key is evicted.
+    return time.time_ns() // 1000
+
+
+def get_version(project_id: int) -> int:
+    project_id = int(project_id)
+    cache_key = version_pre_key.format(project_id)
+
+    version = cache.get(cache_key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(cache_key, version, None):
+            version = cache.get(cache_key, version)
+
+    return version
+
+
+def bump_version(*project_ids: Optional[int]):
+    """Marks every snapshot of projects as outdated."""
+    for project_id in project_ids:
+        if project_id is None:
+            continue
+
+        cache_key = version_pre_key.format(project_id)
+        try:
+            cache.incr(cache_key)
+        except ValueError:  # key not found
+            cache.set(cache_key, _new_version(), None)
+
+
+def make_etag(project_id: int, version: int) -> str:
+    return f'"{int(project_id)}-{version}"'
+
+
+def get_or_build(project_id: int, version: int, build: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+    """Returns the snapshot of the version, it's built by only one worker at a time."""
+    cache_key = snapshot_pre_key.format(int(project_id), version)
+    return get_or_compute(cache_key, build, SNAPSHOT_TIMEOUT)
+
+
+def get_built(project_id: int, version: int) -> Optional[bytes]:
+    """Returns the snapshot of the version if it's already built, a snapshot of a version never changes."""
+    entry = cache.get(snapshot_pre_key.format(int(project_id), version))
+    return None if entry is None else entry[0]
@@ -5,6 +5,8 @@ from dataclasses import dataclass, field
 from typing import ClassVar, Optional, Callable, Dict
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 
 Usr = get_user_model()
@@ -37,6 +39,28 @@ class GanttMixin:
         setattr(self, username, user)
 
 
+class ConstantQueriesMixin:
+    """A detector of N+1 queries."""
+
+    def assertConstantQueries(self, func: Callable, add_rows: Callable[[int], None], counts=(1, 5)):
+        """
+        Calls add_rows(count) then func() for every count, and fails if func() doesn't run
+        the same number of queries however many rows were added.
+        """
+        captured = []
+        for count in counts:
+            add_rows(count)
+            with CaptureQueriesContext(connection) as queries:
+                func()
+            captured.append([query['sql'] for query in queries.captured_queries])
+
+        first = captured[0]
+        for count, queries in zip(counts[1:], captured[1:]):
+            self.assertEqual(len(queries), len(first),
+                             f'{len(first)} queries with {counts[0]} rows, {len(queries)} queries after adding '
+                             f'{count} rows:\n' + '\n'.join(queries))
+
+
 class GanttApiTestCase(APITestCase):
 
     def __init__(self, *args, **kwargs):
@@ -0,0 +1,122 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+
+from gantt.access import visible_project_ids, can_access, managed_project_ids
+from gantt.models import Project, Team, Role, TeamMember, ProjectAccess, Task
+from gantt.permissons import IsProjectManagerOrReadOnly
+from gantt.tests.base import GanttMixin
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class TestProjectAccess(GanttMixin, TestCase):
+    def setUp(self) -> None:
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                              project_manager=self.user)
+        self.team = Team.objects.create(name='team', project=self.project)
+        self.role = Role.objects.create(name='role', project=self.project)
+
+    def access_users(self, project=None):
+        project = project or self.project
+        return set(ProjectAccess.objects.filter(project=project).values_list('user_id', flat=True))
+
+    def test_project_manager(self):
+        self.assertEqual(self.access_users(), {self.user.id})
+
+        self.project.project_manager = self.username1
+        self.project.save()
+        self.assertEqual(self.access_users(), {self.username1.id})
+
+    def test_team_member(self):
+        member = TeamMember.objects.create(team=self.team, user=self.username1, role=self.role)
+        self.assertEqual(self.access_users(), {self.user.id, self.username1.id})
+
+        # a user in two teams of the project
+        team2 = Team.objects.create(name='team2', project=self.project)
+        TeamMember.objects.create(team=team2, user=self.username1, role=self.role)
+        member.delete()
+        self.assertEqual(self.access_users(), {self.user.id, self.username1.id})
+
+        team2.delete()
+        self.assertEqual(self.access_users(), {self.user.id})
+
+    def test_move_team_to_other_project(self):
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        other = Project.objects.create(name='other', planned_start_date=now, planned_end_date=now,
+                                       project_manager=self.username2)
+        TeamMember.objects.create(team=self.team, user=self.username1, role=self.role)
+
+        self.team.project = other
+        self.team.save()
+
+        self.assertEqual(self.access_users(), {self.user.id})
+        self.assertEqual(self.access_users(other), {self.username2.id, self.username1.id})
+
+    def test_delete_project(self):
+        TeamMember.objects.create(team=self.team, user=self.username1, role=self.role)
+        self.project.delete()
+        self.assertFalse(ProjectAccess.objects.exists())
+
+    def test_delete_user(self):
+        self.create_user('leaving')
+        TeamMember.objects.create(team=self.team, user=self.leaving, role=self.role)
+        self.leaving.delete()
+        self.assertEqual(self.access_users(), {self.user.id})
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_cached_visible_projects(self):
+        cache.clear()
+        self.assertEqual(visible_project_ids(self.username1), frozenset())
+
+        with self.assertNumQueries(0):
+            self.assertFalse(can_access(self.project.id, self.username1))
+
+        TeamMember.objects.create(team=self.team, user=self.username1, role=self.role)
+
+        self.assertEqual(visible_project_ids(self.username1), {self.project.id})
+        with self.assertNumQueries(0):
+            self.assertTrue(can_access(str(self.project.id), self.username1))
+
+    def test_invalid_project_id(self):
+        self.assertFalse(can_access(None, self.user))
+        self.assertFalse(can_access('abc', self.user))
+
+
+class TestManagedProjects(GanttMixin, TestCase):
+    def setUp(self) -> None:
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                              project_manager=self.user)
+        self.other = Project.objects.create(name='other', planned_start_date=now, planned_end_date=now,
+                                            project_manager=self.username1)
+        self.tasks = [Task.objects.create(name=f'task{i}', project=project, planned_start_date=now,
+                                          planned_end_date=now)
+                      for i, project in enumerate((self.project, self.project, self.other))]
+
+    def request(self, method='patch', user=None):
+        request = Request(getattr(APIRequestFactory(), method)('/'))
+        request.user = user or self.user
+        return request
+
+    def test_resolved_once(self):
+        request = self.request()
+        with self.assertNumQueries(1):
+            self.assertEqual(managed_project_ids(request), {self.project.id})
+            self.assertEqual(managed_project_ids(request), {self.project.id})
+
+        self.assertEqual(managed_project_ids(self.request(user=self.username2)), frozenset())
+
+    def test_object_permission(self):
+        permission = IsProjectManagerOrReadOnly()
+        request = self.request()
+        with self.assertNumQueries(1):
+            self.assertEqual([permission.has_object_permission(request, None, task) for task in self.tasks],
+                             [True, True, False])
+
+        with self.assertNumQueries(0):
+            self.assertTrue(permission.has_object_permission(self.request('get'), None, self.tasks[2]))
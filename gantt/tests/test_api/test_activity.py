@@ -115,7 +115,8 @@ class TestActivityCreate(GanttMixin, APITestCase):
             'actual_budget': '30.00',
             'dependency': None,
             'state': None,
-            'assignees': []
+            'assignees': [],
+            'predecessors': []
         })
         self.assertEqual(response.data, ActivitySerializer(Activity.objects.get(id=1)).data)
 
@@ -1,130 +1,197 @@
-from django.contrib.auth.models import User
+"""
+Benchmarks of API endpoints on synthetic data of `gantt.load_data`.
+
+Every endpoint is requested with data of each scale of BENCH_SCALES (only 1x tasks of a project if it is not set)
+and it fails if:
+ - its number of queries isn't `queries` at any scale, a query per row is an N+1 bug
+   (streamed responses run queries for every chunk of rows),
+ - its median time is more than `ms` milliseconds for each 1x of data (so time grows at most linearly).
+`TestGetAllSerializer` compares the fast path of `GetAll` with DRF serializers,
+and `TestScheduling` times `gantt.scheduling.schedule` on a large random graph.
+
+Numbers of queries don't depend on the machine, so they are always checked at 1x.
+Times depend on the machine and larger scales take long, so they are checked only if BENCH_SCALES is set:
+
+    BENCH_SCALES=1,10,100 python manage.py test gantt.tests.test_api.test_bench
+
+Environment variables:
+ - BENCH_SCALES: comma separated scales, e.g. "1,10" for a quick run.
+   Time budgets and other benchmarks (`TestGetAllSerializer`, `TestScheduling`) are skipped without it.
+ - BENCH_OUTPUT: a path that results are written to as JSON, a list of
+   `{"endpoint", "params", "scale", "activities", "queries", "ms"}`, to compare runs in review.
+"""
+import json
+import os
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple
+from unittest import skipUnless
+
+from django.db import connection, reset_queries, transaction
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from rest_framework.test import APITestCase
-# from django.contrib.auth import get_user_model
 
-from gantt.models import Project, Task, Activity
-from gantt.tests.base import Timer
+from gantt.load_data import Scale, generate
+from gantt.models import Activity, Project, State
+from gantt.scheduling import schedule
+from gantt.tests.test_serializers.test_get_all import GetAllDataMixin
+from gantt.views import GetAll, StreamingListMixin
+from user.models import User
+
+BASE_SCALE = Scale(tasks=2, activities=5)  # 10 activities in 1x
+BENCHING = bool(os.environ.get('BENCH_SCALES'))
+SCALES = [int(scale) for scale in os.environ['BENCH_SCALES'].split(',')] if BENCHING else [1]
+REPEAT = 3
+
+bench = skipUnless(BENCHING, 'benchmarks run only if BENCH_SCALES is set.')
+
+
+@dataclass
+class Endpoint:
+    name: str
+    kwargs: Callable[[Project], Dict] = lambda project: {}
+    params: Dict = field(default_factory=dict)
+    queries: int = 0
+    ms: float = 50  # a budget for each 1x of data
+    method: str = 'get'
+    chunk: Tuple[int, int] = (0, 0)  # (rows, queries) of each chunk of a streamed response, after the first one
+
+    def query_budget(self, rows: int) -> int:
+        chunk_rows, chunk_queries = self.chunk
+        return self.queries + (chunk_queries * ((rows - 1) // chunk_rows) if chunk_rows else 0)
+
+
+def project_kwargs(project):
+    return {'proj_pk': project.id}
+
+
+def pk_kwargs(project):
+    return {'pk': project.id}
+
+
+ENDPOINTS = [
+    Endpoint('project-list', queries=1),
+    Endpoint('get_project_w_related', pk_kwargs, queries=8, ms=100),
+    Endpoint('get_project_w_related', pk_kwargs, {'stream': 'true'}, queries=8, ms=100,
+             chunk=(GetAll.stream_chunk_size * BASE_SCALE.activities, 4)),
+    Endpoint('task-list', project_kwargs, queries=2),
+    Endpoint('task-list', project_kwargs, {'page_size': 50, 'ordering': 'planned_start_date'}, queries=2),
+    Endpoint('activity-list', project_kwargs, queries=4, ms=100),
+    Endpoint('activity-list', project_kwargs, {'verbose': 'true'}, queries=4, ms=200),
+    Endpoint('activity-list', project_kwargs, {'verbose': 'true', 'stream': 'true'}, queries=4, ms=200,
+             chunk=(StreamingListMixin.stream_chunk_size, 2)),
+    Endpoint('activity-list', project_kwargs, {'page_size': 50, 'ordering': 'planned_start_date'}, queries=4),
+    Endpoint('assigned-list', project_kwargs, {'verbose': 'true'}, queries=2, ms=100),
+    Endpoint('assigned_to_me-list', queries=1),
+    Endpoint('comment-list', lambda project: {'activity_pk': project.activity_id}, queries=3),
+    Endpoint('state-list', project_kwargs, queries=2),
+    Endpoint('employee-list', project_kwargs, queries=2),
+    Endpoint('critical_path', pk_kwargs, queries=4),
+    Endpoint('activity-detail', lambda project: {'pk': project.activity_id}, {'description': 'changed'},
+             queries=10, ms=100, method='patch'),
+]
+
+
+def timed(func: Callable) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
 
-# User = get_user_model()
-timer = Timer()
+
+def measure(func: Callable) -> (int, float):
+    """Returns number of queries of func() and its median time in milliseconds of `REPEAT` runs."""
+    func()  # warm up
+
+    reset_queries()  # the log keeps a limited number of queries
+    with CaptureQueriesContext(connection) as queries:
+        times = [timed(func)]
+    count = len(queries)  # before the next request resets the log
+    times.extend(timed(func) for _ in range(REPEAT - 1))
+
+    return count, statistics.median(times)
 
 
 class TestBench(APITestCase):
-    fixtures = ['dumpdata.json']
-
-    # def tearDown(self) -> None:
-    # print(self.times)
-
-    # @classmethod
-    # def how_are_you(cls):
-    #
-    # with timer.measure('json_load'), open('/home/amir/Downloads/mockturtle2.json') as f:
-    #     data = json.load(f)
-    #
-    # timer.start('user_bulk_create')
-    # users = data[1]
-    # User.objects.bulk_create(
-    #     [
-    #         User(
-    #             id=i,
-    #             first_name=users[i].get('fist_name'),
-    #             last_name=users[i].get('last_name'),
-    #             username=users[i].get('username') + str(i),
-    #             email=users[i].get('email'),
-    #             password='PASSWORD'
-    #         )
-    #         for i in range(len(users))
-    #     ]
-    # )
-    #
-    # timer.stop('user_bulk_create')
-    #
-    # projects = []
-    # tasks = []
-    # activities = []
-    # timer.start('creating_models')
-    # for project, project_id in zip(data[0], range(1, len(data[0]))):
-    #     projects.append(
-    #         Project(
-    #             name=project.get('name'),
-    #             planed_start_date=datetime.utcfromtimestamp(project['planed_start_date'] / 10),
-    #             planed_end_date=datetime.utcfromtimestamp(project['planned_end_date']),
-    #             actual_start_date=datetime.utcfromtimestamp(project['actual_start_date']),
-    #             actual_end_date=datetime.utcfromtimestamp(project['actual_end_date']),
-    #             description=project['description']
-    #         )
-    #     )
-    #
-    #     for task, task_id in zip(project['tasks'], range(1, len(project['tasks']))):
-    #         tasks.append(
-    #             Task(
-    #                 name=task['name'],
-    #                 priority=task['priority'],
-    #                 planed_start_date=datetime.fromtimestamp(task['planed_start_date'] / 10, timezone.utc),
-    #                 planed_end_date=datetime.fromtimestamp(task['planned_end_date'], timezone.utc),
-    #                 actual_start_date=datetime.fromtimestamp(task['actual_start_date'], timezone.utc),
-    #                 actual_end_date=datetime.fromtimestamp(task['actual_end_date'], timezone.utc),
-    #                 description=task['description'],
-    #                 planed_budget=task['planned_budget'],
-    #                 actual_budget=task['actual_budget'],
-    #                 project_id=project_id
-    #             )
-    #         )
-    #
-    #         for activity in task['activities']:
-    #             activities.append(
-    #                 Activity(
-    #                     name=activity['name'],
-    #                     priority=activity['priority'],
-    #                     planed_start_date=datetime.fromtimestamp(activity['planed_start_date'] / 10, timezone.utc),
-    #                     planed_end_date=datetime.fromtimestamp(activity['planned_end_date'], timezone.utc),
-    #                     actual_start_date=datetime.fromtimestamp(activity['actual_start_date'], timezone.utc),
-    #                     actual_end_date=datetime.fromtimestamp(activity['actual_end_date'], timezone.utc),
-    #                     description=activity['description'],
-    #                     planed_budget=activity['planned_budget'],
-    #                     actual_budget=activity['actual_budget'],
-    #                     task_id=task_id
-    #                 )
-    #             )
-    #
-    # timer.stop('creating_models')
-    #
-    # with timer.measure('bulk_insert_all'):
-    #     timer.start('bulk_insert_project')
-    #
-    #     Project.objects.bulk_create(projects)
-    #
-    #     timer.stop('bulk_insert_project')
-    #     timer.start('bulk_insert_task')
-    #
-    #     Task.objects.bulk_create(tasks)
-    #
-    #     timer.stop('bulk_insert_task')
-    #     timer.start('bulk_insert_activity')
-    #
-    #     Activity.objects.bulk_create(activities)
-    #
-    #     timer.stop('bulk_insert_activity')
-    #
-    # cls.times = {'setup_data': {**timer.timers}}
-    # timer.timers.clear()
+    results: List[Dict]
 
     @classmethod
-    @timer.measure('load_data')
     def setUpClass(cls):
-        # url = reverse('project_all-detail', kwargs={'pk': 1})
-        cls.url = '/gantt/all/1/'
         super().setUpClass()
+        cls.results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        output = os.environ.get('BENCH_OUTPUT')
+        if output:
+            with open(output, 'w') as f:
+                json.dump(cls.results, f, indent=2)
+        super().tearDownClass()
+
+    def request(self, endpoint: Endpoint, project):
+        url = reverse(f'gantt:{endpoint.name}', kwargs=endpoint.kwargs(project))
+
+        def func():
+            response = getattr(self.client, endpoint.method)(url, endpoint.params)
+            self.assertLess(response.status_code, 300, url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        return func
+
+    def bench_scale(self, scale: int):
+        project = Project.objects.get(id=generate(BASE_SCALE.times(scale), seed=scale)[0])
+        project.activity_id = Activity.objects.filter(project=project).order_by('id').values_list('id', flat=True)[0]
+        Activity.objects.filter(id=project.activity_id).update(state=State.objects.get(project=project))
+        activities = Activity.objects.filter(project=project).count()
+        self.client.force_authenticate(User.objects.get(id=project.project_manager_id))
+
+        for endpoint in ENDPOINTS:
+            queries, ms = measure(self.request(endpoint, project))
+            result = {'endpoint': f'{endpoint.method.upper()} {endpoint.name}', 'params': endpoint.params,
+                      'scale': scale, 'activities': activities, 'queries': queries, 'ms': round(ms, 3)}
+            self.results.append(result)
+
+            with self.subTest(**result):
+                self.assertEqual(queries, endpoint.query_budget(activities))
+                if BENCHING:
+                    self.assertLessEqual(ms, endpoint.ms * scale)
+
+    def test_endpoints(self):
+        for scale in SCALES:
+            with transaction.atomic():
+                self.bench_scale(scale)
+                transaction.set_rollback(True)
+
+
+@bench
+class TestGetAllSerializer(GetAllDataMixin, TestCase):
+    def test_speed(self):
+        """The fast path of `GetAll` is 5x faster than DRF serializers."""
+
+        def best_time(func):
+            times = []
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - start)
+            return min(times)
+
+        drf_time, fast_time = best_time(self.drf_data), best_time(self.fast_data)
+        self.assertLess(fast_time * 5, drf_time, f'fast: {fast_time:f}s, drf: {drf_time:f}s')
 
-    @timer.measure('get_count_of_models')
-    def test_a(self):
-        print("len <'users' 'projects' 'tasks' 'activities'>: ", User.objects.count(), Project.objects.count(),
-              Task.objects.count(),
-              Activity.objects.count())
 
-    @timer.measure('hello')
+@bench
+class TestScheduling(SimpleTestCase):
     def test_speed(self):
-        self.client.force_login(User.objects.get(id=8))
-        self.client.get(self.url)
-        # print(response.data)
+        n = 50_000
+        rnd = random.Random(7)
+        durations = [rnd.randint(1, 100) for _ in range(n)]
+        edge_dst = list(range(1, n))
+        edge_src = [rnd.randrange(0, i) for i in edge_dst]
 
+        ms = timed(lambda: schedule(durations, edge_src, edge_dst))
+        self.assertLess(ms, 1000)
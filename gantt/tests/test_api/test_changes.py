@@ -0,0 +1,115 @@
+import datetime
+from unittest import mock
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from gantt import changes
+from gantt.load_data import Scale, generate
+from gantt.models import Project, Task, Activity, Assigned, State, Dependency, Tombstone
+from gantt.tests.base import GanttMixin
+from user.models import User
+
+
+class TestProjectChanges(GanttMixin, APITestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.get(id=generate(Scale(users=3, tasks=3, activities=3, assignees=1))[0])
+        self.url = reverse('gantt:changes', kwargs={'proj_pk': self.project.id})
+        self.client.force_authenticate(User.objects.get(id=self.project.project_manager_id))
+        self.since = changes.to_version(timezone.now())
+
+    def get_changes(self, **params) -> dict:
+        response = self.client.get(self.url, {'since': self.since, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_nothing_is_changed(self):
+        data = self.get_changes()
+        self.assertEqual([data['tasks'], data['activities'], data['assignees'], data['states']], [[]] * 4)
+        self.assertEqual(data['deleted'], {'task': [], 'activity': [], 'assigned': [], 'state': []})
+
+    def test_changed(self):
+        task = Task.objects.filter(project=self.project).first()
+        task.name = 'changed'
+        task.save()
+        activity = Activity.objects.create(name='new', task=task, planned_start_date=task.planned_start_date,
+                                           planned_end_date=task.planned_end_date)
+        deleted = Activity.objects.filter(project=self.project).exclude(task=task).first()
+        deleted_id = deleted.id
+        deleted.delete()
+        assigned = Assigned.objects.filter(project=self.project).first()
+        assigned_id = assigned.id
+        assigned.delete()
+        state = State.objects.create(name='new', project=self.project)
+
+        data = self.get_changes()
+
+        self.assertEqual([t['name'] for t in data['tasks']], ['changed'])
+        self.assertEqual([a['id'] for a in data['activities']], [activity.id])
+        self.assertEqual(data['activities'][0]['task'], task.id)
+        self.assertEqual(data['assignees'], [])
+        self.assertEqual(data['states'], [{'id': state.id, 'project': self.project.id, 'name': 'new'}])
+        # assignees of the deleted activity don't have tombstones
+        self.assertEqual(data['deleted'], {'task': [], 'activity': [deleted_id], 'assigned': [assigned_id],
+                                           'state': []})
+
+    def test_bulk_updated(self):
+        activities = list(Activity.objects.filter(project=self.project)[:2])
+        for activity in activities:
+            activity.planned_end_date += datetime.timedelta(days=1)
+        Activity.objects.bulk_update(activities, ['planned_end_date'])
+
+        self.assertEqual({a['id'] for a in self.get_changes()['activities']}, {a.id for a in activities})
+
+    def test_predecessors_changed(self):
+        predecessor, successor = Activity.objects.filter(project=self.project).order_by('id')[:2]
+        Dependency.objects.create(predecessor=predecessor, successor=successor, type=Dependency.START_TO_START)
+
+        activities = self.get_changes()['activities']
+        self.assertEqual([a['id'] for a in activities], [successor.id])
+        self.assertEqual(activities[0]['predecessors'][0]['predecessor'], predecessor.id)
+
+    def test_task_deleted(self):
+        task = Task.objects.filter(project=self.project).first()
+        task_id = task.id
+        task.delete()
+
+        self.assertEqual(self.get_changes()['deleted'], {'task': [task_id], 'activity': [], 'assigned': [],
+                                                         'state': []})
+
+    def test_queries(self):
+        for task in Task.objects.filter(project=self.project):
+            task.save()
+        Activity.objects.filter(project=self.project).first().save()
+        Assigned.objects.filter(project=self.project).first().save()
+
+        # access, tombstones, tasks, activities (their assignees, predecessors), assignees and states
+        with self.assertNumQueries(8):
+            self.get_changes()
+
+    def test_version(self):
+        now = timezone.now()
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            data = self.client.get(self.url).data
+        self.assertEqual(data, {'version': changes.to_version(now - datetime.timedelta(seconds=changes.OVERLAP))})
+        self.assertEqual(changes.from_version(data['version']), now - datetime.timedelta(seconds=changes.OVERLAP))
+
+    def test_expired(self):
+        Tombstone.objects.create(project_id=self.project.id, type=Tombstone.TASK, object_id=1)
+        Tombstone.objects.update(deleted_at=timezone.now() - datetime.timedelta(seconds=changes.TOMBSTONE_TIMEOUT + 1))
+        self.assertEqual(changes.prune_tombstones(), 1)
+
+        since = changes.to_version(timezone.now() - datetime.timedelta(seconds=changes.TOMBSTONE_TIMEOUT + 1))
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertIn('version', response.data)
+
+    def test_invalid(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        for since in (10 ** 20, -10 ** 20):
+            self.assertEqual(self.client.get(self.url, {'since': since}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
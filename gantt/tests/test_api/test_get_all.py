@@ -0,0 +1,82 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from gantt.models import Project, Task, Activity, Team, Role, TeamMember, Dependency
+from gantt.tests.base import GanttMixin
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TestGetAllSnapshot(GanttMixin, APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                              project_manager=self.user)
+        team = Team.objects.create(name='team', project=self.project)
+        role = Role.objects.create(name='role', project=self.project)
+        TeamMember.objects.create(team=team, user=self.username1, role=role)
+
+        self.task = Task.objects.create(name='task', project=self.project, planned_start_date=now,
+                                        planned_end_date=now)
+        self.activity = Activity.objects.create(name='activity', task=self.task, planned_start_date=now,
+                                                planned_end_date=now)
+        self.url = reverse('gantt:get_project_w_related', kwargs={'pk': self.project.id})
+
+    def test_not_member(self):
+        self.client.force_authenticate(self.username2)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {})
+        self.assertNotIn('ETag', response)
+
+    def test_not_modified(self):
+        self.client.force_authenticate(self.username1)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['tasks'][0]['activities'][0]['name'], 'activity')
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        # served from snapshot
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_changed(self):
+        self.client.force_authenticate(self.username1)
+        etag = self.client.get(self.url)['ETag']
+
+        self.activity.name = 'renamed'
+        self.activity.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['tasks'][0]['activities'][0]['name'], 'renamed')
+
+    def test_predecessors(self):
+        self.client.force_authenticate(self.username1)
+        etag = self.client.get(self.url)['ETag']
+
+        successor = Activity.objects.create(name='successor', task=self.task, planned_start_date=self.activity.planned_start_date,
+                                            planned_end_date=self.activity.planned_end_date)
+        Dependency.objects.create(predecessor=self.activity, successor=successor, type=Dependency.START_TO_START,
+                                  lag=datetime.timedelta(hours=1))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        activities = {item['id']: item for item in response.json()['tasks'][0]['activities']}
+        self.assertEqual(activities[successor.id]['predecessors'],
+                         [{'predecessor': self.activity.id, 'type': 'SS', 'lag': '01:00:00'}])
+        self.assertEqual(activities[self.activity.id]['predecessors'], [])
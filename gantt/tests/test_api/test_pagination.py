@@ -0,0 +1,83 @@
+import datetime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from gantt.models import Project, Task, Activity, Comment
+from gantt.tests.base import GanttMixin
+
+
+class TestKeysetPagination(GanttMixin, APITestCase):
+    def setUp(self) -> None:
+        now = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                              project_manager=self.user)
+        task = Task.objects.create(name='task', project=self.project, planned_start_date=now, planned_end_date=now)
+        # 3 activities start at the same time
+        self.activities = [
+            Activity.objects.create(name=f'activity{i}', task=task, planned_end_date=now + datetime.timedelta(days=9),
+                                    planned_start_date=now + datetime.timedelta(days=(7 - i) // 3, microseconds=5))
+            for i in range(8)
+        ]
+        for i in range(5):
+            Comment.objects.create(text=f'comment{i}', author=self.user, activity=self.activities[0])
+
+        self.url = reverse('gantt:activity-list', kwargs={'proj_pk': self.project.id})
+        self.client.force_authenticate(self.user)
+
+    def get_all_pages(self, url, **params):
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            if response.data['next'] is None:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_not_paginated_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 8)
+
+    def test_ordered_by_id(self):
+        ids = self.get_all_pages(self.url, page_size=3)
+        self.assertEqual(ids, [activity.id for activity in self.activities])
+
+    def test_ordered_by_start_date(self):
+        expected = [activity.id for activity in sorted(self.activities, key=lambda a: (a.planned_start_date, a.id))]
+        for page_size in (1, 2, 3, 8, 100):
+            with self.subTest(page_size=page_size):
+                ids = self.get_all_pages(self.url, page_size=page_size, ordering='planned_start_date', verbose='true')
+                self.assertEqual(ids, expected)
+
+    def test_no_offset(self):
+        response = self.client.get(self.url, {'page_size': 2})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertFalse([query for query in queries.captured_queries if 'OFFSET' in query['sql'].upper()])
+
+    def test_comments(self):
+        url = reverse('gantt:comment-list', kwargs={'activity_pk': self.activities[0].id})
+        ids = self.get_all_pages(url, page_size=2, ordering='created_at')
+        self.assertEqual(ids, list(Comment.objects.order_by('created_at', 'id').values_list('id', flat=True)))
+
+    def test_not_accessible(self):
+        self.client.force_authenticate(self.username2)
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.data, {'next': None, 'results': []})
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'invalid'}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(self.url, {'ordering': 'name', 'page_size': 2}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'page_size': 0}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_streamed_page(self):
+        response = self.client.get(self.url, {'page_size': 2, 'stream': 'true'})
+        self.assertEqual(len(response.data['results']), 2)
@@ -0,0 +1,316 @@
+import datetime
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from gantt.dependencies import project_links
+from gantt.notifier import _redis_cli
+from gantt.models import Project, Task, Activity, Team, Role, TeamMember, Dependency
+from gantt.scheduling import reschedule_successors
+from gantt.tests.base import GanttMixin
+
+
+class ScheduleMixin(GanttMixin):
+    def setUp(self) -> None:
+        self.start = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=self.start.date(),
+                                              planned_end_date=datetime.date(2022, 12, 1), project_manager=self.user)
+        team = Team.objects.create(name='team', project=self.project)
+        role = Role.objects.create(name='role', project=self.project)
+        TeamMember.objects.create(team=team, user=self.username1, role=role)
+
+        later = self.start + datetime.timedelta(days=30)
+        self.task1 = Task.objects.create(name='task1', project=self.project, planned_start_date=later,
+                                         planned_end_date=later)
+        self.task2 = Task.objects.create(name='task2', project=self.project, planned_start_date=later,
+                                         planned_end_date=later)
+
+        def activity(name, task, days, dependency=None):
+            return Activity.objects.create(name=name, task=task, planned_start_date=later,
+                                           planned_end_date=later + datetime.timedelta(days=days),
+                                           dependency=dependency)
+
+        self.a = activity('a', self.task1, 2)
+        self.b = activity('b', self.task1, 5, self.a)
+        self.c = activity('c', self.task2, 1, self.a)
+        self.d = activity('d', self.task2, 3, self.b)
+
+    def day(self, days):
+        return self.start + datetime.timedelta(days=days)
+
+    def auto_schedule(self) -> dict:
+        """Runs the job of auto schedule and returns it."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(reverse('gantt:auto_schedule', kwargs={'pk': self.project.id}))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        return self.client.get(response['Location']).data
+
+
+class TestSchedule(ScheduleMixin, APITestCase):
+    def test_auto_schedule(self):
+        url = reverse('gantt:auto_schedule', kwargs={'pk': self.project.id})
+
+        self.client.force_login(self.username1)
+        response = self.client.put(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_login(self.user)
+        job = self.auto_schedule()
+        self.assertEqual((job['name'], job['status'], job['progress']), ('auto_schedule', 'done', 100))
+
+        for activity, start, end in ((self.a, 0, 2), (self.b, 2, 7), (self.c, 2, 3), (self.d, 7, 10)):
+            activity.refresh_from_db()
+            self.assertEqual((activity.planned_start_date, activity.planned_end_date), (self.day(start), self.day(end)))
+
+        self.task1.refresh_from_db()
+        self.task2.refresh_from_db()
+        self.assertEqual((self.task1.planned_start_date, self.task1.planned_end_date), (self.day(0), self.day(7)))
+        self.assertEqual((self.task2.planned_start_date, self.task2.planned_end_date), (self.day(2), self.day(10)))
+
+    def test_job_of_others(self):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(reverse('gantt:auto_schedule', kwargs={'pk': self.project.id}))
+
+        self.client.force_login(self.username1)
+        self.assertEqual(self.client.get(response['Location']).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('gantt:job', kwargs={'job_id': 'missing'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_auto_schedule_writes_changed_rows(self):
+        Activity.objects.filter(id=self.a.id).update(planned_start_date=self.day(0), planned_end_date=self.day(2))
+        self.client.force_login(self.user)
+
+        with mock.patch.object(_redis_cli, 'publish') as publish:
+            result = self.auto_schedule()['result']
+
+        self.assertEqual(sorted(result['activities']), [self.b.id, self.c.id, self.d.id])
+        self.assertEqual(sorted(result['tasks']), [self.task1.id, self.task2.id])
+
+        messages = [json.loads(call.args[1]) for call in publish.call_args_list]
+        self.assertEqual([message for message in messages if message['event'] == 'schedule_changed'], [{
+            'event': 'schedule_changed', 'type': 'project', 'id': self.project.id, 'parent': self.user.id,
+            'tasks': result['tasks'], 'activities': result['activities']
+        }])
+        self.assertEqual([(message['status'], message['progress']) for message in messages
+                          if message['event'] == 'job_changed'],
+                         [('queued', 0), ('running', 0), ('running', 30), ('running', 60), ('running', 70),
+                          ('done', 100)])
+
+        with mock.patch.object(_redis_cli, 'publish') as publish:
+            result = self.auto_schedule()['result']
+
+        self.assertEqual(result, {'tasks': [], 'activities': []})
+        self.assertNotIn('schedule_changed', [json.loads(call.args[1])['event'] for call in publish.call_args_list])
+
+    def test_auto_schedule_with_links(self):
+        # d starts 8 days after c starts, and b finishes 1 day after d finishes
+        Dependency.objects.create(predecessor=self.c, successor=self.d, type=Dependency.START_TO_START,
+                                  lag=datetime.timedelta(days=8))
+        Dependency.objects.create(predecessor=self.d, successor=self.b, type=Dependency.FINISH_TO_FINISH,
+                                  lag=datetime.timedelta(days=1))
+        Activity.objects.filter(id=self.d.id).update(dependency=None)
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.auto_schedule()['status'], 'done')
+
+        for activity, start, end in ((self.c, 2, 3), (self.d, 10, 13), (self.b, 9, 14)):
+            activity.refresh_from_db()
+            self.assertEqual((activity.planned_start_date, activity.planned_end_date), (self.day(start), self.day(end)))
+
+    def test_project_links(self):
+        Dependency.objects.create(predecessor=self.a, successor=self.b, type=Dependency.START_TO_START)
+        Dependency.objects.create(predecessor=self.c, successor=self.d, lag=datetime.timedelta(days=1))
+
+        with self.assertNumQueries(1):
+            links = project_links(self.project.id)
+
+        no_lag = datetime.timedelta()
+        self.assertEqual(sorted(links), sorted([
+            (self.a.id, self.b.id, 'SS', no_lag),  # instead of `b.dependency`
+            (self.a.id, self.c.id, 'FS', no_lag),
+            (self.b.id, self.d.id, 'FS', no_lag),
+            (self.c.id, self.d.id, 'FS', datetime.timedelta(days=1)),
+        ]))
+
+    def test_critical_path(self):
+        url = reverse('gantt:critical_path', kwargs={'pk': self.project.id})
+
+        self.client.force_login(self.username2)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_login(self.username1)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(response.data['critical_path'], [self.a.id, self.b.id, self.d.id])
+        activities = {item['id']: item for item in response.data['activities']}
+        self.assertEqual(activities[self.c.id]['total_float'], '7 00:00:00')
+        self.assertFalse(activities[self.c.id]['critical'])
+        self.assertEqual(activities[self.d.id]['late_finish'], '2022-01-11T00:00:00Z')
+
+        # nothing is saved
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.planned_start_date, self.day(30))
+
+    def test_auto_schedule_reports_cycles(self):
+        Activity.objects.filter(id=self.a.id).update(dependency=self.d)  # not through API
+
+        self.client.force_login(self.user)
+        job = self.auto_schedule()
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(sorted(job['result']['cycles'][0]), sorted([self.a.id, self.b.id, self.d.id]))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestCycleValidation(ScheduleMixin, APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def patch(self, activity, dependency):
+        url = reverse('gantt:activity-detail', kwargs={'pk': activity.id})
+        return self.client.patch(url, {'dependency': dependency.id})
+
+    def test_reject_cycle(self):
+        response = self.patch(self.a, self.d)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cycle', str(response.data['dependency']))
+
+        self.a.refresh_from_db()
+        self.assertIsNone(self.a.dependency)
+
+    def test_index_is_updated(self):
+        self.assertEqual(self.patch(self.c, self.d).status_code, status.HTTP_200_OK)  # a -> b -> d -> c
+        self.assertEqual(self.patch(self.b, self.c).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.patch(self.c, self.a).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.patch(self.b, self.c).status_code, status.HTTP_200_OK)
+
+    def test_set_predecessors(self):
+        url = reverse('gantt:activity-detail', kwargs={'pk': self.d.id})
+        response = self.client.patch(url, {'predecessors': [
+            {'predecessor': self.c.id, 'type': 'SS', 'lag': '2 00:00:00'},
+            {'predecessor': self.a.id},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data['predecessors'], key=lambda link: link['predecessor']), [
+            {'predecessor': self.a.id, 'type': 'FS', 'lag': '00:00:00'},
+            {'predecessor': self.c.id, 'type': 'SS', 'lag': '2 00:00:00'},
+        ])
+        self.assertEqual(response.data['dependency'], self.b.id)
+
+        response = self.client.patch(url, {'predecessors': [{'predecessor': self.c.id, 'type': 'FF'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Dependency.objects.filter(successor=self.d).values_list('predecessor_id', 'type', 'lag')),
+                         [(self.c.id, 'FF', datetime.timedelta())])
+
+    def test_reject_invalid_predecessors(self):
+        url = reverse('gantt:activity-detail', kwargs={'pk': self.a.id})
+
+        response = self.client.patch(url, {'predecessors': [{'predecessor': self.d.id}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cycle', str(response.data['dependency']))
+
+        response = self.client.patch(url, {'predecessors': [{'predecessor': self.a.id}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(url, {'predecessors': [{'predecessor': self.c.id}, {'predecessor': self.c.id}]},
+                                     format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Dependency.objects.exists())
+
+    def test_create_with_predecessors(self):
+        response = self.client.post(reverse('gantt:activity-list'), {
+            'name': 'e', 'task': self.task2.id, 'planned_start_date': self.day(0), 'planned_end_date': self.day(1),
+            'predecessors': [{'predecessor': self.d.id, 'type': 'SF', 'lag': '-1 00:00:00'}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        link = Dependency.objects.get(successor_id=response.data['id'])
+        self.assertEqual((link.predecessor_id, link.type, link.lag), (self.d.id, 'SF', datetime.timedelta(days=-1)))
+
+
+class TestIncrementalSchedule(ScheduleMixin, APITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client.force_login(self.user)
+        self.auto_schedule()
+
+    def assertDates(self, obj, start, end):
+        obj.refresh_from_db()
+        self.assertEqual((obj.planned_start_date, obj.planned_end_date), (self.day(start), self.day(end)))
+
+    def test_move_successors(self):
+        url = reverse('gantt:activity-detail', kwargs={'pk': self.b.id})
+
+        with mock.patch.object(_redis_cli, 'publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {'planned_end_date': self.day(9)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertDates(self.a, 0, 2)
+        self.assertDates(self.b, 2, 9)
+        self.assertDates(self.c, 2, 3)
+        self.assertDates(self.d, 9, 12)
+        self.assertDates(self.task1, 0, 9)
+        self.assertDates(self.task2, 2, 12)
+
+        messages = [json.loads(call.args[1]) for call in publish.call_args_list]
+        changed = [message for message in messages if message['event'] == 'schedule_changed']
+        self.assertEqual(len(changed), 1)
+        self.assertEqual(changed[0]['activities'], [self.d.id])
+        self.assertEqual(sorted(changed[0]['tasks']), [self.task1.id, self.task2.id])
+
+    def test_move_back(self):
+        url = reverse('gantt:activity-detail', kwargs={'pk': self.a.id})
+        response = self.client.patch(url, {'planned_end_date': self.day(1)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertDates(self.b, 1, 6)
+        self.assertDates(self.c, 1, 2)
+        self.assertDates(self.d, 6, 9)
+        self.assertDates(self.task1, 0, 6)
+        self.assertDates(self.task2, 1, 9)
+
+    def test_change_dependency(self):
+        url = reverse('gantt:activity-detail', kwargs={'pk': self.c.id})
+        response = self.client.patch(url, {'predecessors': [{'predecessor': self.d.id, 'type': 'SS'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDates(self.c, 2, 3)  # the activity itself is not moved
+
+        url = reverse('gantt:activity-detail', kwargs={'pk': self.d.id})
+        response = self.client.patch(url, {'planned_start_date': self.day(8), 'planned_end_date': self.day(11)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDates(self.c, 8, 9)
+
+    def test_unrelated_change(self):
+        url = reverse('gantt:activity-detail', kwargs={'pk': self.d.id})
+        with mock.patch('gantt.views.reschedule_successors') as reschedule:
+            response = self.client.patch(url, {'name': 'renamed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        reschedule.assert_not_called()
+
+    def test_only_downstream_is_loaded(self):
+        def queries() -> int:
+            with CaptureQueriesContext(connection) as context:
+                reschedule_successors(self.project, self.b)
+            return len(context.captured_queries)
+
+        queries()  # it's moved, then nothing is changed
+        before = queries()
+        predecessor = self.c
+        for i in range(10):  # a chain that isn't after b
+            predecessor = Activity.objects.create(name=f'e{i}', task=self.task2, dependency=predecessor,
+                                                  planned_start_date=self.day(0), planned_end_date=self.day(1))
+
+        with mock.patch('gantt.scheduling.project_links') as links:
+            self.assertEqual(queries(), before)
+        links.assert_not_called()
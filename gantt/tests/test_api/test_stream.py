@@ -0,0 +1,86 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from gantt.models import Project, Task, Activity, Assigned, Dependency, State
+from gantt.tests.base import GanttMixin
+from gantt.views import StreamingListMixin, GetAll
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class TestStreaming(GanttMixin, APITestCase):
+    def setUp(self) -> None:
+        now = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                              project_manager=self.user)
+        state = State.objects.create(name='state', project=self.project)
+        activities = []
+        for i in range(5):
+            task = Task.objects.create(name=f'task{i}', project=self.project, planned_start_date=now,
+                                       planned_end_date=now + datetime.timedelta(days=i))
+            for j in range(3):
+                activities.append(Activity.objects.create(
+                    name=f'activity{i}-{j}', task=task, planned_start_date=now, state=state if j else None,
+                    planned_end_date=now + datetime.timedelta(days=j)
+                ))
+                Assigned.objects.create(activity=activities[-1], user=self.user)
+        Dependency.objects.create(predecessor=activities[0], successor=activities[4], lag=datetime.timedelta(hours=1))
+
+        self.client.force_authenticate(self.user)
+
+    def assertSameStream(self, url, **params):
+        expected = self.client.get(url, params)
+        with mock.patch.object(StreamingListMixin, 'stream_chunk_size', 2), \
+                mock.patch.object(GetAll, 'stream_chunk_size', 2):
+            response = self.client.get(url, {**params, 'stream': 'true'})
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        self.assertEqual(b''.join(response.streaming_content), expected.content)
+        return expected
+
+    def test_lists(self):
+        for name in ('task-list', 'activity-list', 'assigned-list'):
+            for verbose in ('false', 'true'):
+                with self.subTest(name=name, verbose=verbose):
+                    url = reverse(f'gantt:{name}', kwargs={'proj_pk': self.project.id})
+                    self.assertTrue(self.assertSameStream(url, verbose=verbose).json())
+
+    def test_list_of_others(self):
+        self.client.force_authenticate(self.username2)
+        url = reverse('gantt:activity-list', kwargs={'proj_pk': self.project.id})
+        self.assertEqual(self.assertSameStream(url).json(), [])
+
+    def test_list_queries(self):
+        url = reverse('gantt:activity-list', kwargs={'proj_pk': self.project.id})
+        with mock.patch.object(StreamingListMixin, 'stream_chunk_size', 5):
+            response = self.client.get(url, {'stream': 'true', 'verbose': 'true'})
+            # a query for activities with states and 2 prefetch queries for every chunk of activities
+            with self.assertNumQueries(1 + 3 * 2):
+                b''.join(response.streaming_content)
+
+    def test_get_all(self):
+        url = reverse('gantt:get_project_w_related', kwargs={'pk': self.project.id})
+        self.assertEqual(len(self.assertSameStream(url).json()['tasks']), 5)
+
+    def test_get_all_empty_project(self):
+        Task.objects.all().delete()
+        url = reverse('gantt:get_project_w_related', kwargs={'pk': self.project.id})
+        self.assertEqual(self.assertSameStream(url).json()['tasks'], [])
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_get_all_built_snapshot(self):
+        cache.clear()
+        url = reverse('gantt:get_project_w_related', kwargs={'pk': self.project.id})
+        content = self.client.get(url).content
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'stream': 'true'})
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response.content, content)
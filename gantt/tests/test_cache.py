@@ -0,0 +1,131 @@
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from Toiler.cache import get_or_compute, TieredCache
+from Toiler.settings.base import CACHES
+from gantt.access import cache_pre_key as visible_projects_pre_key
+from gantt.invalidation import activities_pre_key
+from gantt.snapshots import version_pre_key
+
+TIERED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+    # two workers
+    'worker1': {'BACKEND': 'Toiler.cache.TieredCache', 'LOCATION': 'shared',
+                'OPTIONS': {'LOCAL_TIMEOUT': 5, 'LOCAL_LOCATION': 'worker1'}},
+    'worker2': {'BACKEND': 'Toiler.cache.TieredCache', 'LOCATION': 'shared',
+                'OPTIONS': {'LOCAL_TIMEOUT': 5, 'LOCAL_LOCATION': 'worker2', 'SHARED_ONLY': ['version_']}},
+}
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TestTieredCache(SimpleTestCase):
+    def setUp(self) -> None:
+        for alias in TIERED_CACHES:
+            caches[alias].clear()
+
+        self.worker1 = caches['worker1']
+        self.worker2 = caches['worker2']
+
+    def test_shared_between_workers(self):
+        self.worker1.set('key', 'value')
+        self.assertEqual(caches['shared'].get('key'), 'value')
+        self.assertEqual(self.worker2.get('key'), 'value')
+
+        self.worker2.delete('key')
+        self.assertIsNone(self.worker2.get('key'))
+        self.assertIsNone(caches['shared'].get('key'))
+
+    def test_served_from_local(self):
+        self.worker1.set('key', 'value')
+        with mock.patch.object(caches['shared'], 'get') as shared_get:
+            self.assertEqual(self.worker1.get('key'), 'value')
+            shared_get.assert_not_called()
+
+    def test_local_timeout(self):
+        self.worker1.set('key', 'value')
+        self.worker2.get('key')
+        self.worker1.set('key', 'new value')
+
+        self.assertEqual(self.worker2.get('key'), 'value')  # local copy of worker2
+
+        with mock.patch('time.time', return_value=time.time() + 6):
+            self.assertEqual(self.worker2.get('key'), 'new value')
+
+    def test_shared_only(self):
+        self.worker1.set('version_1', 1)
+        self.assertEqual(self.worker2.get('version_1'), 1)
+        self.worker1.set('version_1', 2)
+        self.assertEqual(self.worker2.get('version_1'), 2)  # without a local copy
+
+        self.worker2.set('version_2', 1)
+        with mock.patch.object(caches['shared'], 'get', return_value=3):
+            self.assertEqual(self.worker2.get('version_2'), 3)
+
+    def test_invalidated_keys_are_shared_only(self):
+        """Keys that a worker deletes or changes for others are not kept locally by the settings."""
+        options = {**CACHES['default']['OPTIONS'], 'LOCAL_LOCATION': 'worker3'}
+        worker3 = TieredCache('shared', {'OPTIONS': options})
+        for key in (visible_projects_pre_key.format(1), version_pre_key.format(1), activities_pre_key.format(1)):
+            with self.subTest(key=key):
+                worker3.set(key, 'old')
+                self.worker1.delete(key)
+                self.assertIsNone(worker3.get(key))
+
+    def test_add_and_incr(self):
+        self.assertTrue(self.worker1.add('counter', 1))
+        self.assertFalse(self.worker2.add('counter', 5))
+
+        self.worker2.get('counter')
+        self.assertEqual(self.worker1.incr('counter'), 2)
+        self.assertEqual(self.worker1.get('counter'), 2)
+
+        with self.assertRaises(ValueError):
+            self.worker1.incr('missing')
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TestGetOrCompute(SimpleTestCase):
+    def setUp(self) -> None:
+        self.cache = caches['default']
+        self.cache.clear()
+
+    def test_compute_once(self):
+        compute = mock.Mock(return_value=(1, 2))
+
+        self.assertEqual(get_or_compute('key', compute, cache=self.cache), (1, 2))
+        self.assertEqual(get_or_compute('key', compute, cache=self.cache), (1, 2))
+        compute.assert_called_once()
+
+    def test_stale_while_other_computes(self):
+        get_or_compute('key', lambda: 'old', timeout=10, cache=self.cache)
+        self.cache.add('key:lock', 'other worker')
+
+        with mock.patch('time.time', return_value=time.time() + 11):
+            compute = mock.Mock(return_value='new')
+            self.assertEqual(get_or_compute('key', compute, timeout=10, cache=self.cache), 'old')
+            compute.assert_not_called()
+
+        self.cache.delete('key:lock')
+        with mock.patch('time.time', return_value=time.time() + 11):
+            self.assertEqual(get_or_compute('key', lambda: 'new', timeout=10, cache=self.cache), 'new')
+
+    def test_wait_for_lock_holder(self):
+        self.cache.add('key:lock', 'other worker')
+        compute = mock.Mock(return_value='mine')
+
+        def other_worker_sets(seconds):
+            self.cache.set('key', ('computed by other', time.time() + 100))
+
+        with mock.patch('time.sleep', side_effect=other_worker_sets):
+            self.assertEqual(get_or_compute('key', compute, cache=self.cache), 'computed by other')
+        compute.assert_not_called()
+
+    def test_none_is_not_cached(self):
+        compute = mock.Mock(return_value=None)
+        get_or_compute('key', compute, cache=self.cache)
+        get_or_compute('key', compute, cache=self.cache)
+        self.assertEqual(compute.call_count, 2)
@@ -0,0 +1,136 @@
+import datetime
+import uuid
+from unittest import mock
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.test import SimpleTestCase
+
+from gantt.changelog import ChangeLog
+from gantt.models import Project, Task
+from gantt.notifier import _redis_cli, _notifier
+from gantt.tests.base import GanttMixin
+
+
+def change(seq, event, obj_type, object_id, parent_id=0):
+    return {'seq': seq, 'event': event, 'type': obj_type, 'id': object_id, 'parent': parent_id}
+
+
+class LogMixin:
+    def setUp(self) -> None:
+        super().setUp()
+        self.log = ChangeLog(_redis_cli, prefix=f'test-{uuid.uuid4().hex}', max_length=100, timeout=60)
+
+    def tearDown(self) -> None:
+        keys = [key for project_id in (1, 2) for key in (self.log.stream_key(project_id), self.log.seq_key(project_id))]
+        self.log.redis.delete(*keys)
+        super().tearDown()
+
+
+class TestChangeLog(LogMixin, SimpleTestCase):
+    def test_read(self):
+        self.assertEqual(self.log.append(1, [('added', 'task', 10, 1), ('updated', 'task', 10, 1)]), 2)
+        self.assertEqual(self.log.append(1, [('deleted', 'task', 10, None)]), 3)
+        self.log.append(2, [('added', 'task', 20, 2)])
+
+        self.assertEqual(self.log.read(1, 0), [change(1, 'added', 'task', 10, 1), change(2, 'updated', 'task', 10, 1),
+                                               change(3, 'deleted', 'task', 10)])
+        self.assertEqual(self.log.read(1, 1, limit=1), [change(2, 'updated', 'task', 10, 1)])
+        self.assertEqual(self.log.read(1, 3), [])
+        self.assertEqual(self.log.read(2, 0), [change(1, 'added', 'task', 20, 2)])
+
+    def test_trimmed(self):
+        self.log.append(1, [('updated', 'task', i, 1) for i in range(5)])
+        self.log.redis.xtrim(self.log.stream_key(1), maxlen=2, approximate=False)
+
+        self.assertIsNone(self.log.read(1, 2))  # the 3rd event isn't retained
+        self.assertEqual([event['seq'] for event in self.log.read(1, 3)], [4, 5])
+
+    def test_lost(self):
+        self.log.append(1, [('added', 'task', 1, 1)])
+        self.log.mark_lost([1])
+        self.assertEqual(self.log.append(1, [('updated', 'task', 1, 1)]), 3)
+
+        self.assertIsNone(self.log.read(1, 1))
+        self.assertEqual(self.log.read(1, 2), [change(3, 'updated', 'task', 1, 1)])
+        self.assertEqual(self.log.append(1, [('updated', 'task', 1, 1)]), 4)  # only one gap
+        self.assertIsNone(self.log.read(1, 0))  # the gap is in the middle
+
+    def test_lost_by_another_process(self):
+        other = ChangeLog(self.log.redis, prefix=self.log.prefix, max_length=100, timeout=60)
+        self.log.append(1, [('added', 'task', 1, 1)] * 4)
+        self.log.mark_lost([1])
+        self.assertEqual(other.append(1, [('updated', 'task', 1, 1)]), 5)
+
+        self.log.append_many({2: [('added', 'task', 2, 2)]})  # it reaches redis again
+        self.assertIsNone(other.read(1, 5))
+        self.assertEqual(other.append(1, [('updated', 'task', 1, 1)]), 7)
+        self.assertIsNone(other.read(1, 4))
+        self.assertEqual(other.read(1, 6), [change(7, 'updated', 'task', 1, 1)])
+
+    def test_restarted(self):
+        self.log.append(1, [('added', 'task', 1, 1)] * 3)
+        self.log.redis.delete(self.log.seq_key(1))  # e.g. it's evicted
+
+        self.assertIsNone(self.log.read(1, 3))
+        with self.assertLogs('gantt.changelog', 'WARNING'):
+            self.assertEqual(self.log.append(1, [('updated', 'task', 1, 1)]), 1)
+        self.assertEqual(self.log.read(1, 0), [change(1, 'updated', 'task', 1, 1)])
+
+
+class TestChangeLogView(GanttMixin, APITestCase):
+    def setUp(self) -> None:
+        now = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        self.log = ChangeLog(_redis_cli, prefix=f'test-{uuid.uuid4().hex}', max_length=100, timeout=60)
+        patcher = mock.patch.object(_notifier, 'log', self.log)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        with self.captureOnCommitCallbacks(execute=True):  # a batch of the project is flushed, so are the next ones
+            self.project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                                  project_manager=self.user)
+        self.tasks = [Task(name=f'task{i}', project=self.project, planned_start_date=now, planned_end_date=now)
+                      for i in range(3)]
+        self.url = reverse('gantt:change_log', kwargs={'proj_pk': self.project.id})
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self) -> None:
+        self.log.redis.delete(self.log.stream_key(self.project.id), self.log.seq_key(self.project.id))
+        super().tearDown()
+
+    def test_resume(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tasks[0].save()
+        last = self.client.get(self.url).data['last']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tasks[1].save()
+            self.tasks[2].save()
+
+        response = self.client.get(self.url, {'after': last})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'last': last + 2, 'events': [
+            change(last + 1, 'added', 'task', self.tasks[1].id, self.project.id),
+            change(last + 2, 'added', 'task', self.tasks[2].id, self.project.id),
+        ]})
+
+        response = self.client.get(self.url, {'after': last, 'limit': 1})
+        self.assertEqual([event['seq'] for event in response.data['events']], [last + 1])
+
+    def test_snapshot_is_required(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for task in self.tasks:
+                task.save()
+        self.log.redis.xtrim(self.log.stream_key(self.project.id), maxlen=1, approximate=False)
+
+        response = self.client.get(self.url, {'after': 1})  # only the project was added
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(response.data['last'], 4)
+
+    def test_invalid(self):
+        self.assertEqual(self.client.get(self.url, {'after': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'after': -1}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(self.username1)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
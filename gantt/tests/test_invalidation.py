@@ -0,0 +1,91 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from gantt import invalidation
+from gantt.invalidation import project_ids_of, activities_pre_key
+from gantt.models import Project, Task, Activity, Assigned
+from gantt.snapshots import get_version
+from gantt.tests.base import GanttMixin
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TestInvalidation(GanttMixin, TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.now = now = datetime.datetime.now(tz=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                              project_manager=self.user)
+        self.task = Task.objects.create(name='task', project=self.project, planned_start_date=now,
+                                        planned_end_date=now)
+        self.activity = Activity.objects.create(name='activity', task=self.task, planned_start_date=now,
+                                                planned_end_date=now)
+        self.assigned = Assigned.objects.create(activity=self.activity, user=self.username1)
+
+    def test_resolve_loaded_foreign_keys(self):
+        invalidation._known_projects.clear()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(project_ids_of([self.task, self.activity, self.assigned]), {self.project.id})
+
+        # foreign keys are not loaded, but the ids are remembered
+        activity = Activity.objects.get(id=self.activity.id)
+        assigned = Assigned.objects.get(id=self.assigned.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(project_ids_of([activity, assigned]), {self.project.id})
+
+    def test_resolve_unknown(self):
+        invalidation._known_projects.clear()
+        # like rows of `bulk_update()` in scheduling, which don't have `project_id`
+        activities = [Activity(id=activity.id, task_id=activity.task_id) for activity in Activity.objects.all()]
+        assignees = [Assigned(id=assigned.id, activity_id=assigned.activity_id) for assigned in Assigned.objects.all()]
+
+        with self.assertNumQueries(2):
+            self.assertEqual(project_ids_of(activities + assignees), {self.project.id})
+
+    def test_update(self):
+        cache_key = activities_pre_key.format(self.project.id)
+        cache.set(cache_key, (self.activity.id,))
+        version = get_version(self.project.id)
+
+        self.activity.name = 'renamed'
+        self.activity.save()
+
+        self.assertIsNone(cache.get(cache_key))
+        self.assertNotEqual(version, get_version(self.project.id))
+
+    def test_move(self):
+        other = Project.objects.create(name='other', planned_start_date=self.now, planned_end_date=self.now,
+                                       project_manager=self.user)
+        other_task = Task.objects.create(name='task', project=other, planned_start_date=self.now,
+                                         planned_end_date=self.now)
+        for project_id in (self.project.id, other.id):
+            cache.set(activities_pre_key.format(project_id), (self.activity.id,))
+        versions = get_version(self.project.id), get_version(other.id)
+
+        self.activity.task = other_task
+        self.activity.save()
+
+        for project_id, version in zip((self.project.id, other.id), versions):
+            self.assertIsNone(cache.get(activities_pre_key.format(project_id)))
+            self.assertNotEqual(version, get_version(project_id))
+        self.assertEqual(project_ids_of([Assigned.objects.get(id=self.assigned.id)]), {other.id})
+
+    def test_delete(self):
+        for instance in (self.assigned, self.activity, self.task):
+            version = get_version(self.project.id)
+            instance.delete()
+            self.assertNotEqual(version, get_version(self.project.id), type(instance).__name__)
+
+    def test_bulk(self):
+        version = get_version(self.project.id)
+        self.activity.planned_end_date = self.now + datetime.timedelta(days=1)
+        Activity.objects.bulk_update([self.activity], fields=['planned_end_date'])
+        self.assertNotEqual(version, get_version(self.project.id))
+
+        version = get_version(self.project.id)
+        Assigned.objects.bulk_create([Assigned(activity_id=self.activity.id, user_id=self.username2.id)])
+        self.assertNotEqual(version, get_version(self.project.id))
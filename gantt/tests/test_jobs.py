@@ -0,0 +1,122 @@
+import uuid
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from redis import ConnectionError
+
+from gantt.jobs import register, get_queue, RedisQueue, JobFailed, DONE, FAILED, QUEUED, RUNNING
+
+LOCAL_QUEUE = {'BACKEND': 'gantt.jobs.LocalQueue'}
+
+
+@register('test_add')
+def add_job(job, a, b):
+    job.report(50)
+    return a + b
+
+
+@register('test_fail')
+def fail_job(job, reason):
+    if reason == 'invalid':
+        raise JobFailed({'detail': 'invalid input.'})
+    raise RuntimeError(reason)
+
+
+@override_settings(JOB_QUEUE=LOCAL_QUEUE)
+class TestLocalQueue(TestCase):
+    def test_worker(self):
+        queue = get_queue()
+        with self.captureOnCommitCallbacks(execute=True):
+            job = queue.enqueue('test_add', 1, a=2, b=3)
+        self.assertEqual(queue.get(job.id).status, QUEUED)
+
+        out = StringIO()
+        call_command('worker', burst=True, stdout=out)
+        self.assertIn(f'job {job.id} (test_add) is done.', out.getvalue())
+
+        job = queue.get(job.id)
+        self.assertEqual((job.status, job.progress, job.result, job.user_id), (DONE, 100, 5, 1))
+
+    def test_failed(self):
+        queue = get_queue()
+        with self.captureOnCommitCallbacks(execute=True):
+            invalid = queue.enqueue('test_fail', reason='invalid')
+            error = queue.enqueue('test_fail', reason='bug')
+
+        with self.assertLogs('gantt.jobs', 'ERROR'):
+            call_command('worker', burst=True, stdout=StringIO())
+
+        self.assertEqual((queue.get(invalid.id).status, queue.get(invalid.id).result),
+                         (FAILED, {'detail': 'invalid input.'}))
+        self.assertEqual((queue.get(error.id).status, queue.get(error.id).result), (FAILED, {'detail': 'job failed.'}))
+
+    def test_published(self):
+        queue = get_queue()
+        with mock.patch('gantt.jobs.JobNotifier.job_changed') as job_changed:
+            with self.captureOnCommitCallbacks(execute=True):
+                job = queue.enqueue('test_add', 1, a=2, b=3)
+                job_changed.assert_not_called()  # not committed yet
+            call_command('worker', burst=True, stdout=StringIO())
+
+        self.assertEqual([c.args for c in job_changed.call_args_list], [
+            (job.id, 1, QUEUED, 0), (job.id, 1, RUNNING, 0), (job.id, 1, RUNNING, 50), (job.id, 1, DONE, 100),
+        ])
+
+    def test_redis_is_down(self):
+        """Failed publishing doesn't fail the job."""
+        queue = get_queue()
+        with self.captureOnCommitCallbacks(execute=True):
+            job = queue.enqueue('test_add', a=2, b=3)
+
+        with mock.patch('gantt.notifier._redis_cli.publish', side_effect=ConnectionError), \
+                self.assertLogs('gantt.notifier', 'WARNING'):
+            call_command('worker', burst=True, stdout=StringIO())
+        self.assertEqual(queue.get(job.id).status, DONE)
+
+    def test_not_registered(self):
+        with self.assertRaises(KeyError):
+            get_queue().enqueue('missing')
+
+
+class TestRedisQueue(TestCase):
+    def setUp(self) -> None:
+        self.name = f'test-{uuid.uuid4().hex}'
+        self.queue = RedisQueue(settings.NOTIFIER['HOST'], settings.NOTIFIER['PORT'], NAME=self.name)
+
+    def tearDown(self) -> None:
+        self.queue.redis.delete(*self.queue.redis.keys(f'{self.name}:*'))
+
+    def test_round_trip(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = self.queue.enqueue('test_add', a=1, b=1)
+            self.assertIsNone(self.queue.pop(1))  # not committed yet
+
+        popped = self.queue.pop(1)
+        self.assertEqual((popped.id, popped.kwargs), (job.id, {'a': 1, 'b': 1}))
+
+        self.queue.run(popped)
+        self.assertEqual(self.queue.get(job.id).result, 2)
+        self.assertFalse(self.queue.redis.exists(self.queue.processing_pre_key.format(self.queue.worker_id)))
+        self.assertIsNone(self.queue.pop(1))
+
+    def test_recover(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = self.queue.enqueue('test_add', a=1, b=1)
+        crashed = RedisQueue(client=self.queue.redis, NAME=self.name, worker_id='crashed')
+        self.assertEqual(crashed.pop(1).id, job.id)  # then it stops without running it
+
+        self.assertEqual(self.queue.recover(), 0)  # its heartbeat isn't expired
+        self.queue.redis.delete(crashed.heartbeat_pre_key.format('crashed'))
+
+        out = StringIO()
+        queue = {'BACKEND': 'gantt.jobs.RedisQueue', 'OPTIONS': {'client': self.queue.redis, 'NAME': self.name}}
+        with self.assertLogs('gantt.jobs', 'WARNING'), override_settings(JOB_QUEUE=queue):
+            call_command('worker', burst=True, timeout=1, stdout=out)
+        self.assertIn('1 jobs of stopped workers are queued again.', out.getvalue())
+
+        self.assertEqual(self.queue.get(job.id).status, DONE)
+        self.assertFalse(self.queue.redis.exists(crashed.processing_pre_key.format('crashed')))
+        self.assertEqual(self.queue.recover(), 0)
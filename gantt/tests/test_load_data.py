@@ -0,0 +1,66 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from gantt.load_data import Scale, generate
+from gantt.models import Project, Task, Activity, Assigned, Comment, TeamMember, Dependency, ProjectAccess
+from user.models import User
+
+
+def snapshot():
+    return (
+        list(Activity.objects.order_by('id').values_list('task_id', 'planned_start_date', 'state_id', 'dependency_id')),
+        list(Assigned.objects.order_by('id').values_list('activity_id', 'user_id')),
+    )
+
+
+class TestGenerateLoadData(TestCase):
+    def test_command(self):
+        out = StringIO()
+        call_command('generate_load_data', users=6, projects=3, teams=2, members=4, tasks=4, activities=5,
+                     assignees=2, comments=3, dependencies=0.5, chunk_size=7, stdout=out)
+
+        self.assertIn('are generated', out.getvalue())
+        self.assertEqual(User.objects.count(), 6)
+        self.assertEqual(Project.objects.count(), 3)
+        self.assertEqual(TeamMember.objects.count(), 3 * 3)
+        self.assertEqual(Task.objects.count(), 3 * 4)
+        self.assertEqual(Activity.objects.count(), 3 * 4 * 5)
+        self.assertEqual(Assigned.objects.count(), 3 * 4 * 5 * 2)
+        self.assertEqual(Comment.objects.count(), 3 * 4 * 5 * 3)
+        self.assertEqual(ProjectAccess.objects.count(), 3 * 4)
+
+        # links are finish-to-start chains of activities of a task
+        self.assertTrue(Dependency.objects.exists())
+        for link in Dependency.objects.select_related('predecessor', 'successor'):
+            self.assertEqual(link.successor.dependency_id, link.predecessor_id)
+            self.assertEqual(link.successor.task_id, link.predecessor.task_id)
+            self.assertEqual(link.successor.planned_start_date, link.predecessor.planned_end_date)
+
+        # assignees are members of the project
+        for assigned in Assigned.objects.all():
+            self.assertTrue(ProjectAccess.objects.filter(project_id=assigned.project_id,
+                                                         user_id=assigned.user_id).exists())
+
+    def test_deterministic(self):
+        def run(seed):
+            Project.objects.all().delete()
+            User.objects.all().delete()
+            generate(Scale(tasks=3, dependencies=0.5, distribution='uniform'), seed=seed)
+            return snapshot()
+
+        first = run(seed=1)  # ids restart from 1 in empty tables
+        self.assertEqual(run(seed=1), first)
+        self.assertNotEqual(run(seed=2), first)
+
+    def test_interrupted(self):
+        with mock.patch('gantt.load_data.sync_project_access', side_effect=[None, KeyboardInterrupt]):
+            with self.assertRaises(KeyboardInterrupt):
+                generate(Scale(projects=3))
+
+        # only the first project is left, and the next run makes new ids
+        self.assertEqual((Project.objects.count(), Task.objects.count()), (1, Scale.tasks))
+        self.assertEqual(len(generate(Scale(projects=2))), 2)
+        self.assertEqual(Project.objects.count(), 3)
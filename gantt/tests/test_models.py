@@ -0,0 +1,51 @@
+import datetime
+
+from django.test import TestCase
+
+from gantt.models import Project, Task, Activity, Assigned, Comment
+from gantt.tests.base import GanttMixin
+
+
+class TestProjectCopy(GanttMixin, TestCase):
+    def setUp(self) -> None:
+        now = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                              project_manager=self.user)
+        self.project2 = Project.objects.create(name='project2', planned_start_date=now, planned_end_date=now,
+                                               project_manager=self.user)
+        self.task = Task.objects.create(name='task', project=self.project, planned_start_date=now,
+                                        planned_end_date=now)
+        self.task2 = Task.objects.create(name='task2', project=self.project2, planned_start_date=now,
+                                         planned_end_date=now)
+        self.activity = Activity.objects.create(name='activity', task=self.task, planned_start_date=now,
+                                                planned_end_date=now)
+
+    def test_save(self):
+        assigned = Assigned.objects.create(activity=self.activity, user=self.user)
+        comment = Comment.objects.create(activity=self.activity, author=self.user, text='text')
+
+        self.assertEqual((self.activity.project_id, assigned.project_id, comment.project_id), (self.project.id,) * 3)
+
+    def test_bulk_create(self):
+        now = self.activity.planned_start_date
+        activities = Activity.objects.bulk_create([
+            Activity(name='a', task_id=self.task.id, planned_start_date=now, planned_end_date=now),
+            Activity(name='b', task_id=self.task2.id, planned_start_date=now, planned_end_date=now),
+        ])
+        self.assertEqual([activity.project_id for activity in activities], [self.project.id, self.project2.id])
+
+        with self.assertNumQueries(2):  # the project and the insert
+            Assigned.objects.bulk_create([Assigned(activity_id=activities[1].id, user_id=self.user.id)])
+        self.assertEqual(Assigned.objects.get().project_id, self.project2.id)
+
+    def test_move_activity(self):
+        Assigned.objects.create(activity=self.activity, user=self.user)
+        Comment.objects.create(activity=self.activity, author=self.user, text='text')
+
+        activity = Activity.objects.get(id=self.activity.id)
+        activity.task = self.task2
+        activity.save()
+
+        self.assertEqual(Activity.objects.get().project_id, self.project2.id)
+        self.assertEqual(Assigned.objects.get().project_id, self.project2.id)
+        self.assertEqual(Comment.objects.get().project_id, self.project2.id)
@@ -0,0 +1,227 @@
+import datetime
+import json
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from redis import ConnectionError
+
+from gantt import invalidation
+from gantt.models import Project, Task, Activity, Dependency
+from gantt.notifier import Notifier, _notifier, encode_events, decode, TYPE_CODES, EVENT_CODES, ScheduleNotifier
+from gantt.tests.base import GanttMixin
+
+
+def published(redis) -> list:
+    """Returns events that were published with pipelines of the mocked redis."""
+    pipe = redis.pipeline.return_value
+    return [event for call in pipe.publish.call_args_list for event in decode(call.args[1])]
+
+
+def event(event, obj_type, object_id, parent_id=0):
+    return {'event': event, 'type': obj_type, 'id': object_id, 'parent': parent_id}
+
+
+class TestBatchNotifier(TestCase):
+    def setUp(self) -> None:
+        self.redis = mock.MagicMock()
+        self.notifier = Notifier(self.redis)
+
+    def test_published_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notifier.notify('added', 'task', 1, 0)
+            self.notifier.notify('updated', 'task', 1, 0)
+            self.notifier.notify('updated', 'activity', 2, 1)
+            self.notifier.notify('updated', 'activity', 2, 1)
+            self.notifier.notify('deleted', 'task', 1, 0)
+            self.assertFalse(self.redis.pipeline.called)
+
+        self.assertEqual(published(self.redis), [event('added', 'task', 1), event('updated', 'activity', 2, 1),
+                                                 event('deleted', 'task', 1)])
+        self.assertEqual(self.redis.pipeline.return_value.execute.call_count, 1)
+
+    def test_parent_is_changed(self):
+        log = mock.MagicMock()
+        notifier = Notifier(self.redis, log=log)
+        with self.captureOnCommitCallbacks(execute=True):
+            notifier.notify('updated', 'activity', 1, 10, project_id=5)
+            notifier.notify('updated', 'task', 2, 5, project_id=5)
+            notifier.notify('updated', 'activity', 1, 20, project_id=5)  # it's moved to another task
+
+        self.assertEqual(published(self.redis), [event('updated', 'activity', 1, 20), event('updated', 'task', 2, 5)])
+        log.append_many.assert_called_once_with({5: [('updated', 'activity', 1, 20), ('updated', 'task', 2, 5)]})
+
+    def test_on_commit_of_django_4_1(self):
+        connection = transaction.get_connection()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.notifier.notify('added', 'task', 1, 0)
+            entries = [entry[:2] for entry in connection.run_on_commit]  # (sids, func)
+            with mock.patch.object(connection, 'run_on_commit', entries):
+                self.notifier.notify('added', 'task', 2, 0)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(published(self.redis), [event('added', 'task', 1), event('added', 'task', 2)])
+
+    def test_rolled_back(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.notifier.notify('added', 'task', 1, 0)
+            try:
+                with transaction.atomic():
+                    self.notifier.notify('added', 'task', 2, 0)
+                    raise ValueError
+            except ValueError:
+                pass
+            self.notifier.notify('updated', 'task', 3, 0)
+
+        self.assertEqual(published(self.redis), [event('added', 'task', 1), event('updated', 'task', 3)])
+        self.assertEqual(len(callbacks), 2)  # the batch of the rolled back savepoint is dropped
+
+    def test_new_batch_after_commit(self):
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.notifier.notify('updated', 'task', 1, 0)
+
+        self.assertEqual(published(self.redis), [event('updated', 'task', 1)] * 2)
+
+    def test_redis_is_down(self):
+        notifier = Notifier(self.redis, max_buffer=3, retry_after=60, wire_format='json')  # a message per event
+        pipe = self.redis.pipeline.return_value
+        pipe.execute.side_effect = ConnectionError
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notifier.notify('added', 'task', 1, 0)
+            notifier.notify('added', 'task', 2, 0)
+        self.assertEqual(pipe.execute.call_count, 1)
+
+        # it's not tried again before `retry_after`, and the oldest events are dropped
+        with self.captureOnCommitCallbacks(execute=True):
+            notifier.notify('added', 'task', 3, 0)
+            notifier.notify('added', 'task', 4, 0)
+        self.assertEqual(pipe.execute.call_count, 1)
+        self.assertEqual(len(notifier.backlog), 3)
+
+        pipe.reset_mock(side_effect=True)
+        notifier.retry_at = 0
+        with self.captureOnCommitCallbacks(execute=True):
+            notifier.notify('added', 'task', 5, 0)
+
+        self.assertEqual([message['id'] for message in published(self.redis)], [3, 4, 5])
+        self.assertFalse(notifier.backlog)
+
+    def test_change_log(self):
+        log = mock.MagicMock()
+        notifier = Notifier(self.redis, log=log)
+        with self.captureOnCommitCallbacks(execute=True):
+            notifier.notify('added', 'task', 1, 10, project_id=10)
+            notifier.notify('updated', 'activity', 2, 1, project_id=10)
+            notifier.notify('added', 'user', 3, 0)
+
+        log.append_many.assert_called_once_with({10: [('added', 'task', 1, 10), ('updated', 'activity', 2, 1)]})
+
+        # the log has a gap for events that are not appended
+        log.append_many.side_effect = ConnectionError
+        with self.assertLogs('gantt.notifier', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            notifier.notify('deleted', 'task', 1, 10, project_id=10)
+        log.mark_lost.assert_called_once_with({10: [('deleted', 'task', 1, 10)]})
+
+    def test_invalid_event(self):
+        with self.assertRaises(Exception):
+            self.notifier.notify('moved', 'task', 1, 0)
+        with self.assertRaises(Exception):
+            self.notifier.notify('added', 'team', 1, 0)
+
+
+class TestNotifierWithoutTransaction(SimpleTestCase):
+    def test_published_at_once(self):
+        redis = mock.MagicMock()
+        Notifier(redis).notify('added', 'user', 1, 0)
+        self.assertEqual(published(redis), [event('added', 'user', 1)])
+
+
+class TestScheduleNotifier(SimpleTestCase):
+    def test_redis_is_down(self):
+        redis = mock.MagicMock()
+        redis.publish.side_effect = ConnectionError
+        with self.assertLogs('gantt.notifier', 'WARNING'):
+            ScheduleNotifier(redis).schedule_changed(1, 2, [3], [4])
+
+
+class TestSignals(GanttMixin, TestCase):
+    def test_one_pipeline_per_transaction(self):
+        now = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        with mock.patch.object(_notifier, 'redis') as redis, self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                             project_manager=self.user)
+            tasks = [Task.objects.create(name=f'task{i}', project=project, planned_start_date=now,
+                                         planned_end_date=now) for i in range(3)]
+            for task in tasks:
+                task.save()
+
+        self.assertEqual(published(redis), [event('added', 'project', project.id, self.user.id)] +
+                         [event('added', 'task', task.id, project.id) for task in tasks])
+        self.assertEqual(redis.pipeline.return_value.execute.call_count, 1)
+
+    def test_cascade_of_dependencies(self):
+        """Deleted dependencies of a deleted activity don't run a query each to find their project."""
+        now = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                         project_manager=self.user)
+        task = Task.objects.create(name='task', project=project, planned_start_date=now, planned_end_date=now)
+
+        def delete_queries(successors: int) -> int:
+            predecessor = Activity.objects.create(name='a', task=task, planned_start_date=now, planned_end_date=now)
+            for _ in range(successors):
+                successor = Activity.objects.create(name='b', task=task, planned_start_date=now,
+                                                    planned_end_date=now)
+                Dependency.objects.create(predecessor=predecessor, successor=successor)
+            invalidation._known_projects.clear()
+
+            with mock.patch.object(_notifier, 'redis') as redis, self.captureOnCommitCallbacks(execute=True):
+                with CaptureQueriesContext(connection) as queries:
+                    predecessor.delete()
+            deleted = [e for e in published(redis) if e['type'] == 'dependency']
+            self.assertEqual(len(deleted), successors)
+            return len(queries)
+
+        self.assertEqual(delete_queries(1), delete_queries(5))
+
+
+class TestWireFormat(SimpleTestCase):
+    events = [('added', 'task', 1, 20), ('updated', 'activity', 2 ** 40, 1), ('deleted', 'user', 3, None)]
+
+    def test_compact(self):
+        message = encode_events(self.events)
+        self.assertEqual(len(message), 3 + 18 * 3)
+        self.assertEqual(decode(message), [event('added', 'task', 1, 20), event('updated', 'activity', 2 ** 40, 1),
+                                           event('deleted', 'user', 3, 0)])
+        self.assertEqual(decode(encode_events([])), [])
+
+    def test_codes_are_unique(self):
+        for codes in (TYPE_CODES, EVENT_CODES):
+            self.assertEqual(len(set(codes.values())), len(codes))
+
+    def test_unknown_version(self):
+        with self.assertRaises(ValueError):
+            decode(b'\x02' + encode_events(self.events)[1:])
+
+    def test_batches(self):
+        redis = mock.MagicMock()
+        notifier = Notifier(redis, wire_format='compact', batch_size=2)
+        notifier.send(notifier.encode(self.events))
+
+        messages = [call.args[1] for call in redis.pipeline.return_value.publish.call_args_list]
+        self.assertEqual([len(decode(message)) for message in messages], [2, 1])
+
+    def test_json(self):
+        notifier = Notifier(mock.MagicMock(), wire_format='json')
+        messages = notifier.encode(self.events[:2])
+
+        self.assertEqual([json.loads(message) for message in messages],
+                         [event('added', 'task', 1, 20), event('updated', 'activity', 2 ** 40, 1)])
+        self.assertEqual(decode(messages[0]), [event('added', 'task', 1, 20)])
+        self.assertEqual(decode(messages[0].encode()), [event('added', 'task', 1, 20)])
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            Notifier(mock.MagicMock(), wire_format='xml')
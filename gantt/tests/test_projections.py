@@ -0,0 +1,92 @@
+import datetime
+
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from gantt.models import Project, Task, Activity, Assigned, Comment, Team, Role, TeamMember, State
+from gantt.projections import project, get_projection
+from gantt.serializers import AssignedToMeSerializer, TaskSerializer
+from gantt.tests.base import GanttMixin, ConstantQueriesMixin
+
+
+class TestProjection(GanttMixin, APITestCase):
+    def test_get_projection(self):
+        self.assertEqual(get_projection(AssignedToMeSerializer).select_related, ('project',))
+        self.assertEqual(get_projection(TaskSerializer), ((), (), ()))
+
+    def test_project(self):
+        queryset = project(Activity.objects.all(), AssignedToMeSerializer)
+        self.assertEqual(queryset.query.select_related, {'project': {}})
+        self.assertEqual(queryset.query.deferred_loading[1], False)  # only the listed fields are loaded
+
+
+class TestNoNPlusOne(ConstantQueriesMixin, GanttMixin, APITestCase):
+    """Every list runs the same number of queries however many rows it has."""
+
+    def setUp(self) -> None:
+        self.now = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=self.now,
+                                              planned_end_date=self.now, project_manager=self.user)
+        self.state = State.objects.create(name='state', project=self.project)
+        self.task = Task.objects.create(name='task', project=self.project, planned_start_date=self.now,
+                                        planned_end_date=self.now)
+        self.activity = Activity.objects.create(name='activity', task=self.task, planned_start_date=self.now,
+                                                planned_end_date=self.now)
+        self.client.force_authenticate(self.user)
+
+    def add_activities(self, count):
+        for _ in range(count):
+            activity = Activity.objects.create(name='activity', task=self.task, planned_start_date=self.now,
+                                               planned_end_date=self.now, state=self.state)
+            Assigned.objects.create(activity=activity, user=self.user)
+            Assigned.objects.create(activity=activity, user=self.username1)
+            activity.predecessor_links.create(predecessor=self.activity)
+
+    def add_tasks(self, count):
+        for _ in range(count):
+            Task.objects.create(name='task', project=self.project, planned_start_date=self.now,
+                                planned_end_date=self.now)
+
+    def add_comments(self, count):
+        for _ in range(count):
+            Comment.objects.create(text='comment', author=self.username1, activity=self.activity)
+
+    def add_members(self, count):
+        for _ in range(count):
+            team = Team.objects.create(name='team', project=self.project)
+            role = Role.objects.create(name='role', project=self.project)
+            TeamMember.objects.create(team=team, role=role, user=self.user)
+
+    def get(self, name, params=None, **kwargs):
+        def func():
+            response = self.client.get(reverse(f'gantt:{name}', kwargs=kwargs), params)
+            self.assertEqual(response.status_code, 200)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        return func
+
+    def test_assigned_to_me(self):
+        self.assertConstantQueries(self.get('assigned_to_me-list'), self.add_activities)
+
+    def test_activity_list(self):
+        for params in ({}, {'verbose': 'true'}, {'verbose': 'true', 'stream': 'true'},
+                       {'verbose': 'true', 'page_size': 100}):
+            with self.subTest(params=params):
+                self.assertConstantQueries(self.get('activity-list', params, proj_pk=self.project.id),
+                                           self.add_activities)
+
+    def test_assigned_list(self):
+        for params in ({}, {'verbose': 'true'}):
+            with self.subTest(params=params):
+                self.assertConstantQueries(self.get('assigned-list', params, proj_pk=self.project.id),
+                                           self.add_activities)
+
+    def test_task_list(self):
+        self.assertConstantQueries(self.get('task-list', proj_pk=self.project.id), self.add_tasks)
+
+    def test_comment_list(self):
+        self.assertConstantQueries(self.get('comment-list', activity_pk=self.activity.id), self.add_comments)
+
+    def test_team_member_list(self):
+        self.assertConstantQueries(self.get('team-member-list', {'verbose': 'true'}), self.add_members)
@@ -0,0 +1,129 @@
+"""
+Query plans of hot endpoints, every query that they run is explained by the local database
+and a full scan of a table fails the test, as does a sort of rows for a page (a query with LIMIT),
+which should be read in the order of an index.
+
+Plans are checked on SQLite and MySQL, and those tests are skipped on other databases.
+"""
+import datetime
+import json
+from typing import List
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from gantt.models import Project, Task, Activity, Assigned, Comment, Team, Role, TeamMember, State
+from gantt.tests.base import GanttMixin
+
+
+def _sqlite_problems(sql: str, tables: set, paged: bool) -> List[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        details = [row[-1] for row in cursor.fetchall()]
+
+    return [
+        detail for detail in details
+        # "SCAN table" reads all rows of it, "SCAN table USING INDEX" reads the whole index
+        if (detail.startswith('SCAN ') and detail.split()[1] in tables) or (paged and 'TEMP B-TREE' in detail)
+    ]
+
+
+def _mysql_problems(sql: str, tables: set, paged: bool) -> List[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN FORMAT=JSON {sql}')
+        plan = json.loads(cursor.fetchone()[0])
+
+    problems = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get('table_name') in tables and node.get('access_type') in ('ALL', 'index'):
+                problems.append(f"{node['access_type']} {node['table_name']}")
+            if paged and node.get('using_filesort'):
+                problems.append('filesort')
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(plan)
+    return problems
+
+
+class QueryPlanMixin:
+    def assertNoFullScan(self, func, *args, **kwargs):
+        """Calls func and fails if a SELECT query of it scans a whole table or sorts rows of a page."""
+        explainers = {'sqlite': _sqlite_problems, 'mysql': _mysql_problems}
+        if connection.vendor not in explainers:
+            self.skipTest(f'query plans of {connection.vendor} are not checked.')
+
+        with CaptureQueriesContext(connection) as queries:
+            result = func(*args, **kwargs)
+
+        tables = set(connection.introspection.table_names())
+        selects = [query['sql'] for query in queries.captured_queries if query['sql'].upper().startswith(('SELECT',
+                                                                                                          'WITH'))]
+        self.assertTrue(selects)
+        for sql in selects:
+            problems = explainers[connection.vendor](sql, tables, ' LIMIT ' in sql.upper())
+            self.assertFalse(problems, f'{problems} in plan of:\n{sql}')
+
+        return result
+
+
+class TestQueryPlans(QueryPlanMixin, GanttMixin, APITestCase):
+    def setUp(self) -> None:
+        now = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=now, planned_end_date=now,
+                                              project_manager=self.user)
+        team = Team.objects.create(name='team', project=self.project)
+        role = Role.objects.create(name='role', project=self.project)
+        TeamMember.objects.create(team=team, user=self.username1, role=role)
+        state = State.objects.create(name='state', project=self.project)
+
+        task = Task.objects.create(name='task', project=self.project, planned_start_date=now, planned_end_date=now)
+        self.activity = Activity.objects.create(name='activity', task=task, planned_start_date=now,
+                                                planned_end_date=now, state=state)
+        Activity.objects.create(name='activity2', task=task, planned_start_date=now, planned_end_date=now)
+        Assigned.objects.create(activity=self.activity, user=self.username1)
+        Comment.objects.create(text='comment', author=self.user, activity=self.activity)
+
+        self.client.force_authenticate(self.username1)
+
+    def get(self, name, params=None, **kwargs):
+        response = self.client.get(reverse(f'gantt:{name}', kwargs=kwargs), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_activity_list(self):
+        for params in ({}, {'verbose': 'true'}, {'page_size': 1, 'ordering': 'planned_start_date'}):
+            with self.subTest(params=params):
+                self.assertNoFullScan(self.get, 'activity-list', params, proj_pk=self.project.id)
+
+    def test_activity_next_page(self):
+        url = self.get('activity-list', {'page_size': 1, 'ordering': 'planned_start_date'},
+                       proj_pk=self.project.id).data['next']
+        self.assertNoFullScan(self.client.get, url)
+
+    def test_task_list(self):
+        self.assertNoFullScan(self.get, 'task-list', {'page_size': 1, 'ordering': 'planned_start_date'},
+                              proj_pk=self.project.id)
+
+    def test_assigned_list(self):
+        self.assertNoFullScan(self.get, 'assigned-list', {'verbose': 'true'}, proj_pk=self.project.id)
+
+    def test_assigned_to_me(self):
+        self.assertNoFullScan(self.get, 'assigned_to_me-list')
+
+    def test_comment_list(self):
+        self.assertNoFullScan(self.get, 'comment-list', {'page_size': 1, 'ordering': 'created_at'},
+                              activity_pk=self.activity.id)
+
+    def test_get_all(self):
+        self.assertNoFullScan(self.get, 'get_project_w_related', pk=self.project.id)
+
+    def test_team_member_access(self):
+        self.assertNoFullScan(lambda: list(TeamMember.objects.filter(user=self.username1, team__project=self.project)))
@@ -0,0 +1,75 @@
+import datetime
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer as OriginalRenderer
+
+from Toiler import renderers
+from Toiler.renderers import CamelCaseJSONRenderer, camel_key
+
+PAYLOADS = [
+    None,
+    'a_string',
+    [],
+    {'snake_case_key': 1, 'key_2': 2, 'a_b_c': {'nested_key': [{'in_list': True}]}, '_private': None, 'x_': 0},
+    OrderedDict([('planned_start_date', datetime.datetime(2022, 1, 1, 10, 30, 15, 123456,
+                                                          tzinfo=datetime.timezone.utc)),
+                 ('date_value', datetime.date(2022, 1, 1)), ('time_value', datetime.time(10, 30)),
+                 ('lag_value', datetime.timedelta(hours=2)), ('uuid_value', uuid.UUID(int=1))]),
+    {'budget': Decimal('12.50'), 'tiny_budget': Decimal('1E-7')},
+    {'floats': [0.0, -0.0, 1.5, 1e-4, 1e-5, 1e15, 1e16, 123456.789]},
+    {'unicode_text': 'سلام     \x00 \x1f "quote" \\ /'},
+    {'lazy_text': gettext_lazy('Not found.'), gettext_lazy('lazy_key'): 1},
+    {1: 'int key', 2.5: 'float key', None: 'none key'},
+    {'a_set': {1}, 'a_tuple': (1, 2), 'a_range': range(3), 'keys': {'a': 1}.keys(), 'bytes_value': b'ab'},
+    {'big_int': 2 ** 70},
+]
+
+
+class TestCamelCaseJSONRenderer(SimpleTestCase):
+    def render_both(self, data, accepted_media_type=None, renderer_context=None):
+        original = OriginalRenderer().render(data, accepted_media_type, renderer_context)
+        fast = CamelCaseJSONRenderer().render(data, accepted_media_type, renderer_context)
+        return fast, original
+
+    def test_same_bytes(self):
+        for data in PAYLOADS:
+            for media_type in (None, 'application/json; indent=2'):
+                with self.subTest(data=data, media_type=media_type):
+                    fast, original = self.render_both(data, media_type)
+                    self.assertEqual(fast, original)
+
+    def test_same_bytes_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.test_same_bytes()
+
+    def test_uses_orjson(self):
+        if renderers.orjson is None:
+            self.skipTest('orjson is not installed.')
+
+        data = {'planned_start_date': datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc), 'budget': '1.00'}
+        with mock.patch.object(renderers.renderers.JSONRenderer, 'render') as json_render:
+            self.assertEqual(CamelCaseJSONRenderer().render(data),
+                             b'{"plannedStartDate":"2022-01-01T00:00:00Z","budget":"1.00"}')
+        json_render.assert_not_called()
+
+    def test_inexact_values_fall_back(self):
+        for data in ({'value': 1e16}, {2.5: 'float key'}, {'big_int': 2 ** 70}):
+            with self.subTest(data=data), mock.patch.object(renderers.renderers.JSONRenderer, 'render') as json_render:
+                CamelCaseJSONRenderer().render(data)
+                json_render.assert_called_once()
+
+    def test_nan(self):
+        for renderer in (OriginalRenderer(), CamelCaseJSONRenderer()):
+            with self.assertRaises(ValueError):
+                renderer.render({'value': float('nan')})
+
+    def test_camel_key(self):
+        self.assertEqual(camel_key('planned_start_date'), 'plannedStartDate')
+        self.assertEqual(camel_key('key_2'), 'key2')
+        self.assertEqual(camel_key('_private'), 'Private')
+        self.assertIs(camel_key('planned_start_date'), renderers._camel_keys['planned_start_date'])
@@ -0,0 +1,61 @@
+from django.test import SimpleTestCase
+
+from gantt.scheduling import schedule, CycleError, build_successors
+
+
+class TestSchedule(SimpleTestCase):
+    def test_successors(self):
+        offsets, targets = build_successors(4, [0, 2, 0, 1], [1, 3, 2, 3])
+        self.assertEqual(offsets, [0, 2, 3, 4, 4])
+        self.assertEqual(sorted(targets[0:2]), [1, 2])
+        self.assertEqual(targets[2:3], [3])
+
+    def test_diamond(self):
+        #   0 -> 1 -> 3
+        #   0 -> 2 -> 3
+        durations = [2, 5, 1, 3]
+        result = schedule(durations, [0, 0, 1, 2], [1, 2, 3, 3])
+
+        self.assertEqual(result.early_start, [0, 2, 2, 7])
+        self.assertEqual(result.early_finish, [2, 7, 3, 10])
+        self.assertEqual(result.late_start, [0, 2, 6, 7])
+        self.assertEqual(result.late_finish, [2, 7, 7, 10])
+        self.assertEqual(result.total_float, [0, 0, 4, 0])
+        self.assertEqual(result.finish, 10)
+        self.assertEqual(result.critical_path(), [0, 1, 3])
+
+    def test_link_types(self):
+        # 0 -SS+1-> 1,  0 -FF+2-> 2,  1 -SF-> 3
+        result = schedule([4, 2, 3, 1], [0, 0, 1], [1, 2, 3], edge_types=['SS', 'FF', 'SF'], edge_lags=[1, 2, 0])
+
+        self.assertEqual(result.early_start, [0, 1, 3, 0])
+        self.assertEqual(result.early_finish, [4, 3, 6, 1])
+        self.assertEqual(result.late_finish, [4, 6, 6, 6])
+        self.assertEqual(result.total_float, [0, 3, 0, 5])
+        self.assertEqual(result.critical_path(), [0, 2])
+
+    def test_independent_activities(self):
+        result = schedule([3, 1], [], [], start=10)
+        self.assertEqual(result.early_start, [10, 10])
+        self.assertEqual(result.total_float, [0, 2])
+
+    def test_cycle(self):
+        with self.assertRaises(CycleError) as cm:
+            schedule([1, 1, 1, 1], [0, 1, 2], [1, 2, 1])
+
+        self.assertEqual(sorted(cm.exception.nodes), [1, 2])
+
+    def test_cycles_report(self):
+        # 0 -> 1 -> 0 -> 2,  3 -> 4 -> 5 -> 3 -> 6,  7
+        with self.assertRaises(CycleError) as cm:
+            schedule([1] * 8, [0, 1, 0, 3, 4, 5, 3], [1, 0, 2, 4, 5, 3, 6])
+
+        self.assertEqual(sorted(cm.exception.nodes), [0, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(sorted(sorted(cycle) for cycle in cm.exception.cycles), [[0, 1], [3, 4, 5]])
+
+    def test_long_chain(self):
+        """Long chains must not hit recursion limit."""
+        n = 100_000
+        result = schedule([1] * n, list(range(n - 1)), list(range(1, n)))
+        self.assertEqual(result.finish, n)
+        self.assertEqual(len(result.critical_path()), n)
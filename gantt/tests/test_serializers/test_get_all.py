@@ -0,0 +1,86 @@
+import datetime
+from decimal import Decimal
+
+from django.db.models import Prefetch
+from django.test import TestCase
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+
+from gantt.models import Project, Task, Activity, State, Assigned, Dependency
+from gantt.serializers import ProjectWithRelatedSerializer, ProjectSimpleVerboseSerializer
+from gantt.tests.base import GanttMixin
+from gantt.views import GetAll
+
+
+class GetAllDataMixin(GanttMixin):
+    """A project with tasks, activities, assignees and links, and its data by DRF serializers and the fast path."""
+
+    def setUp(self) -> None:
+        self.user.avatar = 'avatars/user.jpg'
+        self.user.first_name = 'first'
+        self.user.save()
+
+        start = datetime.datetime(2022, 1, 1, 10, 30, 15, 250, tzinfo=datetime.timezone.utc)
+        self.project = Project.objects.create(name='project', planned_start_date=start.date(),
+                                             planned_end_date=datetime.date(2022, 12, 1),
+                                             actual_start_date=start.date(), project_manager=self.user)
+        states = [State.objects.create(name=f'state{i}', project=self.project) for i in range(3)]
+
+        activities = []
+        for i in range(20):
+            task = Task.objects.create(name=f'task{i}', project=self.project, planned_start_date=start,
+                                       planned_end_date=start + datetime.timedelta(days=i),
+                                       actual_end_date=start if i % 2 else None,
+                                       planned_budget=Decimal('12.5') * i, description='x' * i)
+            for j in range(12):
+                activities.append(Activity(
+                    name=f'activity{i}-{j}', task=task, planned_start_date=start + datetime.timedelta(hours=j),
+                    planned_end_date=start + datetime.timedelta(days=j), state=states[j % 4] if j % 4 < 3 else None,
+                    planned_budget=None if j % 3 else Decimal('1000.1'), actual_budget=Decimal(j),
+                    actual_start_date=start if j % 2 else None, dependency=activities[-1] if j else None,
+                ))
+                activities[-1].save()
+
+        users = [self.user, self.username1, self.username2]
+        Assigned.objects.bulk_create([Assigned(activity=activity, user=users[k])
+                                      for i, activity in enumerate(activities) for k in range(i % 3)])
+        Dependency.objects.bulk_create([
+            Dependency(predecessor=activities[i - 5], successor=activities[i], type=Dependency.START_TO_START,
+                       lag=datetime.timedelta(hours=i, minutes=5))
+            for i in range(5, len(activities), 7)
+        ])
+
+        self.activity_ids = GetAll()._get_activity_ids(self.project.id)
+
+    def drf_data(self):
+        project = Project.objects.filter(id=self.project.id).prefetch_related(
+            'task_set',
+            Prefetch('task_set__activity_set', Activity.objects.filter(id__in=self.activity_ids)),
+            'task_set__activity_set__assigned_set',
+            'task_set__activity_set__assigned_set__user',
+            'task_set__activity_set__state',
+            'task_set__activity_set__predecessor_links'
+        ).first()
+        return ProjectWithRelatedSerializer(project).data
+
+    def fast_data(self):
+        return ProjectSimpleVerboseSerializer(self.project.id, self.activity_ids).data
+
+
+class TestProjectSimpleVerboseSerializer(GetAllDataMixin, TestCase):
+    """The fast path of `GetAll` must have the same output as DRF serializers."""
+
+    def test_equivalence(self):
+        drf_data, fast_data = self.drf_data(), self.fast_data()
+
+        self.assertEqual(fast_data, drf_data)
+        # the same order of keys and items
+        renderer = CamelCaseJSONRenderer()
+        self.assertEqual(renderer.render(fast_data), renderer.render(drf_data))
+
+        activity = fast_data['tasks'][0]['activities'][0]
+        self.assertEqual(activity['assignees'], [])
+        self.assertEqual(len(fast_data['tasks'][0]['activities']), GetAll.limit)
+        self.assertTrue(fast_data['tasks'][0]['activities'][1]['assignees'][0]['user']['avatar'].endswith('user.jpg'))
+
+    def test_not_found(self):
+        self.assertIsNone(ProjectSimpleVerboseSerializer(0, []).data)
@@ -33,5 +33,9 @@ app_name = 'gantt'
 urlpatterns = [
     path('', include(router.urls)),
     path('all/<int:pk>/', views.GetAll.as_view(), name='get_project_w_related'),
-    path('auto-schedule/<int:pk>/', views.AutoSchedule.as_view(), name="auto_schedule")
+    path('auto-schedule/<int:pk>/', views.AutoSchedule.as_view(), name="auto_schedule"),
+    path('critical-path/<int:pk>/', views.CriticalPathView.as_view(), name="critical_path"),
+    path('jobs/<str:job_id>/', views.JobView.as_view(), name="job"),
+    path('<int:proj_pk>/events/', views.ChangeLogView.as_view(), name="change_log"),
+    path('<int:proj_pk>/changes/', views.ProjectChangesView.as_view(), name="changes"),
 ]
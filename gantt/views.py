@@ -1,23 +1,35 @@
 from functools import wraps
+from itertools import islice
 
 import django_filters
-from django.core.cache import cache
-from django.db.models import Prefetch, Window
+from django.db import transaction
+from django.db.models import Window
 from django.db.models.functions import RowNumber
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.utils.decorators import method_decorator
-from django.utils.timezone import make_aware
+from django.urls import reverse
+from django.utils.http import parse_etags
 from django_cte import With
 from django_filters.rest_framework import FilterSet
 from drf_yasg.utils import swagger_auto_schema
-from rest_framework import viewsets, mixins, views
+from rest_framework import viewsets, mixins, views, status
+from rest_framework.exceptions import NotFound
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from Toiler.cache import get_or_compute
+from gantt import snapshots, changes
+from gantt.access import visible_project_ids, can_access, managed_project_ids
+from gantt.invalidation import activities_pre_key, ACTIVITIES_TIMEOUT
+from gantt.pagination import KeysetPagination
+from gantt.projections import ProjectionMixin
 from gantt.models import ChertActivity
 from gantt.permissons import IsProjectManagerOrReadOnly, IsProjectManagerOrReadOnlyComment
 from gantt.serializers import *
-from gantt.notifier import BulkNotify
+from gantt.jobs import get_queue
+from gantt.notifier import get_change_log
+from gantt.scheduling import ProjectGraph, CycleError, MICROSECOND, reschedule_successors
 from gantt.tests.base import Timer
 
 timer = Timer()
@@ -47,10 +59,7 @@ class StateViewSet(mixins.CreateModelMixin,
     permission_classes = [IsAuthenticated, IsProjectManagerOrReadOnly]
 
     def get_queryset(self):
-        return State.objects.filter(
-            Q(project__team__teammember__user=self.request.user) |
-            Q(project__project_manager=self.request.user)
-        ).distinct()
+        return State.objects.filter(project_id__in=visible_project_ids(self.request.user))
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -68,18 +77,16 @@ class StateListView(mixins.ListModelMixin, viewsets.GenericViewSet):
             return State.objects.filter(project_id=project_pk)
 
 
-class CommentListView(mixins.ListModelMixin, viewsets.GenericViewSet):
+class CommentListView(ProjectionMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     serializer_class = CommentVerboseSerializer
+    pagination_class = KeysetPagination
+    keyset_orderings = {'id': ('id',), 'created_at': ('created_at', 'id')}
 
     def get_queryset(self):
         activity_pk = self.kwargs.get('activity_pk')
         user = self.request.user
 
-        if Activity.objects.filter(
-                Q(task__project__project_manager=user) |
-                Q(task__project__team__teammember__user=user),
-                id=activity_pk
-        ).exists():
+        if Activity.objects.filter(project_id__in=visible_project_ids(user), id=activity_pk).exists():
             return Comment.objects.filter(activity_id=activity_pk)
 
 
@@ -91,10 +98,7 @@ class CommentDetailView(mixins.CreateModelMixin,
     permission_classes = [IsAuthenticated, IsProjectManagerOrReadOnlyComment]
 
     def get_queryset(self):
-        return Comment.objects.filter(
-            Q(activity__task__project__team__teammember__user=self.request.user) |
-            Q(activity__task__project__project_manager=self.request.user)
-        ).distinct()
+        return Comment.objects.filter(project_id__in=visible_project_ids(self.request.user))
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -109,7 +113,7 @@ class TeamViewSet(viewsets.ModelViewSet):
     filterset_fields = ('project',)  # TODO write tests
 
     def get_queryset(self):
-        return Team.objects.filter(project__project_manager=self.request.user)
+        return Team.objects.filter(project_id__in=managed_project_ids(self.request))
     # todo only project manager can create or modify the one
 
 
@@ -119,19 +123,20 @@ class RoleViewSet(viewsets.ModelViewSet):
     filterset_fields = ('project',)
 
     def get_queryset(self):
-        return Role.objects.filter(project__project_manager=self.request.user)
+        return Role.objects.filter(project_id__in=managed_project_ids(self.request))
 
 
 class TeamMemberGenericView(viewsets.GenericViewSet):
 
     def get_queryset(self):
-        return TeamMember.objects.filter(team__project__project_manager=self.request.user)
+        return TeamMember.objects.filter(team__project_id__in=managed_project_ids(self.request))
 
 
-def verbose_list(related: iter, serializer):
+def verbose_list(serializer):
     """
     when calling list method, If query_params contains the key 'verbose' with value 'true',
-    it changes serializer
+    it changes serializer.
+    Related objects of the serializer are loaded by `ProjectionMixin` of the view.
     """
 
     def wrapper(view):
@@ -140,13 +145,7 @@ def verbose_list(related: iter, serializer):
         @wraps(view.list)
         def func(self, request, *args, **kwargs):
             if self.request.query_params.get('verbose') == 'true':
-                queryset = self.get_queryset().prefetch_related(*related)
-                self.get_serializer = serializer
-
-                def get_queryset():
-                    return queryset
-
-                self.get_queryset = get_queryset
+                self.get_serializer_class = lambda: serializer
 
             return old_list(self, request, *args, **kwargs)
 
@@ -156,6 +155,43 @@ def verbose_list(related: iter, serializer):
     return wrapper
 
 
+def is_streamed(request) -> bool:
+    """If query_params contains the key 'stream' with value 'true' and the response is JSON."""
+    return request.query_params.get('stream') == 'true' and request.accepted_renderer.format == 'json'
+
+
+def render_items(renderer, items: list) -> bytes:
+    """Returns the rendered items of a JSON array without brackets, so chunks can be joined with commas."""
+    return renderer.render(items)[1:-1]
+
+
+class StreamingListMixin(mixins.ListModelMixin):
+    """
+    If the request `is_streamed()` and isn't paginated, `list()` writes the JSON array as it iterates the queryset
+    with `.iterator(chunk_size=stream_chunk_size)`, so memory of the worker doesn't grow with size of the list
+    and the first bytes are sent before the last rows are read.
+    """
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if not is_streamed(request) or (self.paginator and self.paginator.is_requested(request)):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        return StreamingHttpResponse(self.stream_list(queryset, renderer), content_type=renderer.media_type)
+
+    def stream_list(self, queryset, renderer):
+        yield b'['
+        if queryset is not None:
+            rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+            separator = b''
+            while chunk := list(islice(rows, self.stream_chunk_size)):
+                yield separator + render_items(renderer, self.get_serializer(chunk, many=True).data)
+                separator = b','
+        yield b']'
+
+
 class TeamProjectFilter(FilterSet):
     project = django_filters.ModelChoiceFilter(field_name="team__project",
                                                queryset=Project.objects.all())
@@ -165,8 +201,8 @@ class TeamProjectFilter(FilterSet):
         fields = ('project', 'team')
 
 
-@verbose_list(('team', 'role', 'user'), VerboseTeamMemberSerializer)
-class TeamMemberList(mixins.CreateModelMixin, mixins.ListModelMixin, TeamMemberGenericView):
+@verbose_list(VerboseTeamMemberSerializer)
+class TeamMemberList(ProjectionMixin, mixins.CreateModelMixin, mixins.ListModelMixin, TeamMemberGenericView):
     serializer_class = TeamMemberSerializer
     filter_backends = [DjangoFilterBackend]
     # filterset_fields = ('team__id',)
@@ -202,18 +238,18 @@ class ProjectViewSet(viewsets.ModelViewSet):
 # - - -  - - -- - - - - - - -- - - - - - -- - - - - -
 def project_exists(project_pk, user) -> bool:
     """ :returns True if user is project_manager or a team_member of the project, else False"""
-    return Project.objects.filter(
-        Q(project_manager=user) | Q(team__teammember__user=user), id=project_pk
-    ).exists()
+    return can_access(project_pk, user)
 
 
 class TaskGenericView(viewsets.GenericViewSet):
     def get_queryset(self):
-        return Task.objects.filter(project__project_manager=self.request.user)
+        return Task.objects.filter(project_id__in=managed_project_ids(self.request))
 
 
-class TaskListView(mixins.ListModelMixin, TaskGenericView):
+class TaskListView(ProjectionMixin, StreamingListMixin, TaskGenericView):
     serializer_class = TaskSerializer
+    pagination_class = KeysetPagination
+    keyset_orderings = {'id': ('id',), 'planned_start_date': ('planned_start_date', 'id')}
 
     def get_queryset(self):
         """
@@ -233,23 +269,23 @@ class TaskUpdateView(mixins.RetrieveModelMixin,
     serializer_class = TaskUpdateSerializer
 
     def get_queryset(self):
-        return Task.objects.filter(
-            Q(project__project_manager=self.request.user) |
-            Q(project__team__teammember__user=self.request.user)).distinct()  # todo change `distinct`
+        return Task.objects.filter(project_id__in=visible_project_ids(self.request.user))
 
 
 class TaskCreateView(mixins.CreateModelMixin, TaskGenericView):
     serializer_class = TaskSerializer
 
 
-@verbose_list(('state', 'assigned_set__user'), VerboseActivity)
-class ActivityListView(mixins.ListModelMixin, viewsets.GenericViewSet):
+@verbose_list(VerboseActivity)
+class ActivityListView(ProjectionMixin, StreamingListMixin, viewsets.GenericViewSet):
     serializer_class = ActivitySerializer
+    pagination_class = KeysetPagination
+    keyset_orderings = {'id': ('id',), 'planned_start_date': ('planned_start_date', 'id')}
 
     def get_queryset(self):
         project_pk = self.kwargs.get('proj_pk')
         if project_exists(project_pk, self.request.user):
-            return Activity.objects.filter(task__project_id=project_pk)
+            return Activity.objects.filter(project_id=project_pk)
 
 
 @set_update_schema(ActivityUpdateSerializer())
@@ -261,9 +297,19 @@ class ActivityViewSet(mixins.CreateModelMixin,
     serializer_class = ActivitySerializer
 
     def get_queryset(self):
-        return Activity.objects.filter(
-            Q(task__project__project_manager=self.request.user) |
-            Q(task__project__team__teammember__user=self.request.user)).distinct()
+        return Activity.objects.filter(project_id__in=visible_project_ids(self.request.user))\
+            .prefetch_related('predecessor_links')
+
+    def perform_update(self, serializer):
+        """Reschedules activities after the activity, if its dates or predecessors are changed."""
+        instance = serializer.instance
+        old_dates = (instance.planned_start_date, instance.planned_end_date, instance.dependency_id)
+
+        with transaction.atomic():
+            activity = serializer.save()
+            new_dates = (activity.planned_start_date, activity.planned_end_date, activity.dependency_id)
+            if old_dates != new_dates or 'predecessor_links' in serializer.validated_data:
+                reschedule_successors(activity.project, activity)
 
 
 @set_update_schema(AssignedUpdateSerializer)
@@ -275,23 +321,22 @@ class AssignedCreateView(mixins.CreateModelMixin,
     serializer_class = AssignedSerializer
 
     def get_queryset(self):
-        user = self.request.user
-        return Assigned.objects.filter(
-            user__teammember__team__project__project_manager=user
-        ).distinct()
+        return Assigned.objects.filter(project_id__in=managed_project_ids(self.request))
 
 
-@verbose_list(('user',), VerboseAssignedSerializer)
-class AssignedListView(mixins.ListModelMixin, viewsets.GenericViewSet):
+@verbose_list(VerboseAssignedSerializer)
+class AssignedListView(ProjectionMixin, StreamingListMixin, viewsets.GenericViewSet):
     serializer_class = AssignedSerializer
+    pagination_class = KeysetPagination
+    keyset_orderings = {'id': ('id',)}
 
     def get_queryset(self):
         project_pk = self.kwargs.get('proj_pk')
         if project_exists(project_pk, self.request.user):
-            return Assigned.objects.filter(activity__task__project__id=project_pk)
+            return Assigned.objects.filter(project_id=project_pk)
 
 
-class AssignedToMeListView(mixins.ListModelMixin, viewsets.GenericViewSet):
+class AssignedToMeListView(ProjectionMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     serializer_class = AssignedToMeSerializer
 
     def get_queryset(self):
@@ -299,39 +344,84 @@ class AssignedToMeListView(mixins.ListModelMixin, viewsets.GenericViewSet):
 
 
 class GetAll(views.APIView):
-    serializer_class = ProjectWithRelatedSerializer  # ProjectSimpleVerboseSerializer
+    serializer_class = ProjectSimpleVerboseSerializer  # the same output as `ProjectWithRelatedSerializer`
     limit = TaskWithActivitiesSerializer.limit
-    cache_pre_key = 'activities_in_project_{:d}'
+    cache_pre_key = activities_pre_key
+    stream_chunk_size = 100  # tasks
 
     @swagger_auto_schema(responses={200: ProjectWithRelatedSerializer()})
     def get(self, request, pk):
+        """
+        Returns a pre-rendered snapshot of the project with an `ETag`.
+        If the snapshot in `If-None-Match` is still the latest one, it responds 304 without touching database.
+        With `?stream=true`, a snapshot that isn't built yet is streamed instead of building it.
+        """
         project_pk = pk
-        if project_exists(project_pk, self.request.user):
+        if not project_exists(project_pk, self.request.user):
+            return Response({})
+
+        version = snapshots.get_version(project_pk)
+        etag = snapshots.make_etag(project_pk, version)
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return self._snapshot_response(HttpResponseNotModified(), etag)
+
+        if is_streamed(request) and snapshots.get_built(project_pk, version) is None:
+            return self.stream_response(project_pk, etag)
+
+        content = snapshots.get_or_build(project_pk, version, lambda: self.render_snapshot(project_pk))
+        if content is None:
+            return Response({})
+
+        return self._snapshot_response(HttpResponse(content, content_type='application/json'), etag)
 
-            activities = self.get_activity_ids(project_pk)
+    def render_snapshot(self, project_pk):
+        data = self.get_data(project_pk)
+        if data is None:
+            return None
 
-            project = Project.objects.filter(id=project_pk). \
-                prefetch_related(
-                'task_set',
-                Prefetch('task_set__activity_set', Activity.objects.filter(id__in=activities)),
-                'task_set__activity_set__assigned_set',
-                'task_set__activity_set__assigned_set__user',
-                'task_set__activity_set__state'
-            ).first()
-            if project:
-                data = self.serializer_class(project).data
-                return Response(data)
+        return self.renderer_classes[0]().render(data)
 
-        return Response({})
+    def get_data(self, project_pk):
+        return self.serializer_class(project_pk, self.get_activity_ids(project_pk)).data
+
+    def stream_response(self, project_pk, etag):
+        """
+        Streams the data without building a snapshot, tasks are loaded and rendered `stream_chunk_size` at a time.
+        The bytes are the same as the snapshot.
+        """
+        serializer = self.serializer_class(project_pk, self.get_activity_ids(project_pk))
+        project = serializer.get_project()
+        if project is None:
+            return Response({})
+
+        renderer = self.renderer_classes[0]()
+        project['tasks'] = []
+        head = renderer.render(project)[:-2]  # without `]}` of empty tasks
+
+        def stream():
+            yield head
+            separator = b''
+            for tasks in serializer.iter_tasks(self.stream_chunk_size):
+                yield separator + render_items(renderer, tasks)
+                separator = b','
+            yield b']}'
+
+        return self._snapshot_response(StreamingHttpResponse(stream(), content_type=renderer.media_type), etag)
+
+    @staticmethod
+    def _snapshot_response(response, etag):
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
     def get_activity_ids(self, project_id):
         cache_key = self.cache_pre_key.format(project_id)
-        result = cache.get(cache_key)
-        if result:
-            return result
+        return get_or_compute(cache_key, lambda: self._get_activity_ids(project_id), ACTIVITIES_TIMEOUT)
 
+    def _get_activity_ids(self, project_id):
         cte = With(
-            ChertActivity.objects.filter(task__project_id=project_id)
+            ChertActivity.objects.filter(project_id=project_id)
                 .annotate(
                 row_number=Window(
                     expression=RowNumber(),
@@ -340,106 +430,153 @@ class GetAll(views.APIView):
                 )
             ).only('id', 'task_id')
         )
-        result = tuple(
+        return tuple(
             cte.queryset().with_cte(cte).filter(row_number__lte=self.limit).values_list('id', flat=True)
         )
 
-        cache.set(cache_key, result)
-        return result
-
 
 class AutoSchedule(views.APIView):
     """
-    Schedules tasks and activities to the earliest possible plan.
+    Schedules tasks and activities to the earliest possible plan in a background job.
+
+    It responds 202 with the job, its status is given by `jobs/<id>/` and published with "job_changed" events.
+    Only rows that their dates are changed are written, and one "schedule_changed" event is published.
     """
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.activity_map = dict()
-        self.task_map = dict()
 
+    @swagger_auto_schema(responses={202: JobSerializer()})
     def put(self, request, pk):
         project_pk = pk
         project = get_object_or_404(Project.objects.filter(id=project_pk, project_manager=request.user))
 
-        activities: 'QuerySet[Activity]' = Activity.objects.filter(task__project_id=project_pk)
-        tasks = Task.objects.filter(project_id=project_pk)
+        job = get_queue().enqueue('auto_schedule', request.user.id, project_id=project.id)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED,
+                        headers={'Location': reverse('gantt:job', kwargs={'job_id': job.id})})
 
-        for activity in activities:
-            self.activity_map[activity.id] = activity
 
-        day_zero = make_aware(datetime.datetime.utcfromtimestamp(0))
-        day_infinity = make_aware(datetime.datetime.today() + datetime.timedelta(weeks=1000))
-        for task in tasks:
-            task.planned_start_date = day_infinity
-            task.planned_end_date = day_zero
-            self.task_map[task.id] = task
+class JobView(views.APIView):
+    """Returns status of a background job of the user."""
 
-        activity_list = self._topological_sort(activities)
-        self._early_path(project, activity_list)
+    @swagger_auto_schema(responses={200: JobSerializer()})
+    def get(self, request, job_id):
+        job = get_queue().get(job_id)
+        if job is None or job.user_id != request.user.id:
+            raise NotFound
 
-        return Response({})
+        return Response(JobSerializer(job).data)
 
-    def _early_path(self, project, activities):
-        project_start_date = datetime.datetime.fromordinal(project.planned_start_date.toordinal())
-        project_end_date = datetime.datetime.fromordinal(project.planned_end_date.toordinal())
-        project_start_date = make_aware(project_start_date)
-        project_end_date = make_aware(project_end_date)
 
-        for i in range(len(activities)):
-            activity = activities[i]
-            duration = activity.planned_end_date - activity.planned_start_date
+class ProjectChangesView(views.APIView):
+    """
+    Returns objects of the project that are changed since version `since` and the `version` of this response,
+    which the client sends as `since` the next time, see `gantt.changes`.
 
-            activity_early_start = project_start_date
-            activity_early_final = project_start_date + duration
+    Without `since`, or if `since` is expired, it's only `version` (410 if expired), the client fetches
+    the whole project (`GetAll`) after this request.
+    Links to deleted activities and the state of activities with a deleted state are removed by the client.
+    """
 
-            if activity.dependency_id:
-                d_ef = self.activity_map[activity.dependency_id].early_final
-                activity_early_start = d_ef
-                activity_early_final = d_ef + duration
+    @swagger_auto_schema(responses={200: ProjectChangesResponseSerializer(), 410: 'the whole project must be fetched'})
+    def get(self, request, proj_pk):
+        if not project_exists(proj_pk, request.user):
+            raise NotFound
 
-            activity.early_final = activity_early_final
-            activity.planned_start_date = activity_early_start
-            activity.planned_end_date = activity_early_final
+        version = changes.current_version()
+        if 'since' not in request.query_params:
+            return Response({'version': version})
 
-            task = self.task_map[activity.task_id]
-            task.planned_start_date = min(max(project_start_date, activity_early_start), task.planned_start_date)
-            task.planned_end_date = max(min(project_end_date, activity_early_final), task.planned_end_date)
+        try:
+            since = int(request.query_params['since'])
+        except ValueError:
+            return Response({'detail': '"since" must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        tasks = self.task_map.values()
-        Task.objects.bulk_update(tasks, fields=['planned_start_date', 'planned_end_date'])
-        Activity.objects.bulk_update(activities, fields=['planned_start_date', 'planned_end_date'])
+        try:
+            expired = changes.is_expired(since)
+        except OverflowError:
+            return Response({'detail': '"since" is not a version.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        self._notify_tasks_updated(tasks)
-        self._notify_activities_updated(activities)
+        if expired:
+            return Response({'detail': 'changes are expired, fetch the whole project.', 'version': version},
+                            status=status.HTTP_410_GONE)
 
-    def _topological_sort(self, activities):
-        stack = []
-        visited = set()
+        data = ProjectChangesSerializer(proj_pk, changes.from_version(since)).data
+        data['version'] = version
+        return Response(data)
 
-        def traverse(activity):
-            if activity.id in visited:
-                return
 
-            if activity.dependency_id:
-                depend_activity = self.activity_map[activity.dependency_id]
-                traverse(depend_activity)
+class ChangeLogView(views.APIView):
+    """
+    Returns events of the project after seq `after`, at most `limit` ones, see `gantt.changelog`.
+    A client that missed events of the "changes" channel fetches them from seq of the last event that it got.
 
-            stack.append(activity)
-            visited.add(activity.id)
+    If some of them are not in the log any more, it's 410 and the client fetches the whole project (`GetAll`)
+    after this request, then it continues from `last` of the response. Without `after` it's just `last`.
+    """
+    max_limit = 1000
 
-        for act in activities:
-            traverse(act)
+    @swagger_auto_schema(responses={200: ChangeLogSerializer(), 410: 'the whole project must be fetched'})
+    def get(self, request, proj_pk):
+        if not project_exists(proj_pk, request.user):
+            raise NotFound
 
-        return stack
+        try:
+            after = int(request.query_params['after']) if 'after' in request.query_params else None
+            limit = min(int(request.query_params.get('limit', 500)), self.max_limit)
+        except ValueError:
+            return Response({'detail': '"after" and "limit" must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if after is not None and after < 0:
+            return Response({'detail': '"after" must not be negative.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    @staticmethod
-    def _notify_activities_updated(activities):
-        with BulkNotify('updated', 'activity') as b:
-            for activity in activities:
-                b.notify(activity.id, activity.task_id)
+        log = get_change_log()
+        last = log.last_seq(proj_pk)
+        if after is None:
+            return Response({'last': last, 'events': []})
 
-    @staticmethod
-    def _notify_tasks_updated(tasks):
-        with BulkNotify('updated', 'task') as b:
-            for task in tasks:
-                b.notify(task.id, task.project_id)
\ No newline at end of file
+        events = log.read(proj_pk, after, max(limit, 1))
+        if events is None:
+            return Response({'detail': 'events are not in the change log, fetch the whole project.', 'last': last},
+                            status=status.HTTP_410_GONE)
+
+        return Response({'last': last, 'events': events})
+
+
+class CriticalPathView(views.APIView):
+    """
+    Returns early and late dates of activities, their total float and the critical path
+    when the project is scheduled to the earliest possible plan. Nothing is saved.
+    """
+
+    @swagger_auto_schema(responses={200: CriticalPathSerializer()})
+    def get(self, request, pk):
+        if not project_exists(pk, request.user):
+            raise NotFound
+
+        project = get_object_or_404(Project.objects.filter(id=pk))
+
+        graph = ProjectGraph(project)
+        try:
+            result = graph.schedule()
+        except CycleError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        to_datetime = graph.to_datetime
+        activities = [
+            {
+                'id': activity_id,
+                'task': graph.task_ids[i],
+                'early_start': to_datetime(result.early_start[i]),
+                'early_finish': to_datetime(result.early_finish[i]),
+                'late_start': to_datetime(result.late_start[i]),
+                'late_finish': to_datetime(result.late_finish[i]),
+                'total_float': (result.late_start[i] - result.early_start[i]) * MICROSECOND,
+                'critical': result.is_critical(i),
+            }
+            for i, activity_id in enumerate(graph.ids)
+        ]
+
+        data = {
+            'project': project.id,
+            'finish': to_datetime(result.finish),
+            'activities': activities,
+            'critical_path': [graph.ids[i] for i in result.critical_path()],
+        }
+        return Response(CriticalPathSerializer(data).data)
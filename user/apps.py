@@ -5,4 +5,5 @@ class MyappConfig(AppConfig):
     name = 'user'
 
     def ready(self):
-        import user.signals
\ No newline at end of file
+        import user.signals
+        import user.authentication  # `_testing_env` must be evaluated before test runner sets DEBUG to False
\ No newline at end of file
@@ -2,6 +2,8 @@ from logging import getLogger
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from gantt.invalidation import invalidate_projects
+from gantt.models import ProjectAccess
 from gantt.signals import notify
 from .models import User
 
@@ -18,4 +20,8 @@ def activity_post_save_handler(instance: User, created, update_fields, **kwargs)
     if update_fields and len(update_fields) == 1 and 'last_login' in update_fields:
         return  # when the user just logged in
 
+    if not created:
+        # assignees are rendered in snapshots of projects
+        invalidate_projects(ProjectAccess.objects.filter(user_id=instance.id).values_list('project_id', flat=True))
+
     notify("added" if created else "updated", "user", instance.id, 0)